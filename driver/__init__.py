@@ -1 +1,3 @@
-from .circuit import ExpBase, NumBase, MitigatedBase, Circuit
\ No newline at end of file
+from .circuit import ExpBase, NumBase, NoisyBase, MitigatedBase, Circuit
+from .simulator import StateVector, PauliVector, NoiseModel
+from .emulator import Emulator
\ No newline at end of file
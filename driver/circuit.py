@@ -1,8 +1,9 @@
+import copy
 import numpy as np
-from scipy.linalg import expm
-import qupy as qp
-from qupy.operator import X, Z, rx, rz
 from .util import name_to_alpha
+from .instruction import InstructionList, RZ, RX90, RZX45
+from .optimize import optimize_instruction
+from .simulator import StateVector, PauliVector, NoiseModel, RX90_MATRIX, RZX45_MATRIX, RX90_PTM, RZX45_PTM, rz_to_ptm, unitary_to_ptm
 from .decompose import matrix_to_su2, matrix_to_su4
 
 class ExpBase:
@@ -10,22 +11,34 @@ class ExpBase:
     Basic operation commands for controling the experimental system
     Note:
     Base has the basical operation commands, which can be executed directrly on the experimental system.
+    The commands are recorded into the InstructionList, and lowered into the sequencer code once when the sequence is read.
     """
     def __init__(self, qubit_name_list, cross_name_list):
         self.name = "ExpBase"
         self.trigger_point = 0
         self.qubit_name_list = qubit_name_list
         self.cross_name_list = cross_name_list
+        self.alpha = {qubit_name: name_to_alpha(qubit_name) for qubit_name in qubit_name_list}
+        self.target_cross = {qubit_name: [cross_name for cross_name in cross_name_list if qubit_name == cross_name[1]] for qubit_name in qubit_name_list}
         self._reset()
 
     def _reset(self):
         """Reset the sequence memory
         """
-        self.sequence = {}
-        for qubit_name in self.qubit_name_list:
-            self.sequence[qubit_name] = ""
-        for cross_name in self.cross_name_list:
-            self.sequence[cross_name] = ""
+        self.instruction = InstructionList(self.qubit_name_list, self.cross_name_list)
+        self.trigger_offset = self.trigger_point
+        self._sequence = None
+
+    @property
+    def sequence(self):
+        """Sequencer code of each port lowered from the recorded instructions
+        The lowered code is cached for the instruction list and its length.
+        Returns:
+            dict: sequencer code keyed by qubit name and cross name
+        """
+        if (self._sequence is None) or (self._sequence[0] is not self.instruction) or (self._sequence[1] != len(self.instruction)):
+            self._sequence = (self.instruction, len(self.instruction), self._lower())
+        return self._sequence[2]
 
     def rz(self, phase, qubit_name):
         """Execute a rz gate with given angle
@@ -33,58 +46,198 @@ class ExpBase:
             phase (float) : rotation angle
             qubit_name (str): name of qubit
         """
-        self.sequence[qubit_name] += "Z{:f} ".format(phase*180/np.pi)
+        self.instruction.rz(phase, qubit_name)
 
-        for cross_name in self.cross_name_list:
-            if qubit_name == cross_name[1]:
-                self.sequence[cross_name] += "Z{:f} ".format(phase*180/np.pi)
-    
     def rx90(self, qubit_name):
         """Execute a rx90 gate
         Args:
             qubit_name (str): name of qubit
         """
-        alpha = name_to_alpha(qubit_name)
-        self.sequence[qubit_name] += "P0 HPI{0} ".format(alpha)
+        self.instruction.rx90(qubit_name)
 
     def rzx45(self, cross_name):
         """Execute a rzx45 gate
         Args:
             cross_name (str, str, str): (name of control qubit, name of target qubit, name of port)
         """
-        calpha = name_to_alpha(cross_name[0])
-        talpha = name_to_alpha(cross_name[1])
-        self.sequence[cross_name[0]] += "T{0} WCR{1}{2} ".format(self.trigger_point, calpha, talpha) # qubit (control)
-        self.sequence[cross_name[1]] += "T{0} DCT{1}{2} ".format(self.trigger_point, calpha, talpha) # qubit (target)
-        self.sequence[cross_name]    += "T{0} DCR{1}{2} ".format(self.trigger_point, calpha, talpha) # port ("cr1", "cr2")
-        self.trigger_point           += 1
+        self.instruction.rzx45(cross_name)
+        self.trigger_point += 1
+
+    def fork(self):
+        """Copy of the base for a job built on top of the current instructions
+        The recorded instructions are shared as the frozen prefix, and its lowered code is cached,
+        so the cost of the fork and its lowering is proportional to the instructions appended after the fork.
+        Returns:
+            ExpBase: forked base
+        """
+        out = copy.copy(self)
+        out.instruction = self.instruction.fork()
+        out._sequence = None
+        return out
+
+    def replay(self, base):
+        """Execute the recorded instructions on the other base, e.g. NumBase for simulation
+        Args:
+            base (NumBase): base to execute
+        """
+        self.instruction.replay(base)
+
+    def optimize(self, duration=None):
+        """Optimize the recorded instructions by merging rz gates and fusing single-qubit gates
+        Args:
+            duration (dict): duration of each opcode used for the report
+        Returns:
+            dict: gate count and estimated pulse duration before and after the optimization
+        """
+        self.instruction, report = optimize_instruction(self.instruction, duration)
+        self._sequence = None
+        return report
+
+    def _lower(self):
+        """Lower the recorded instructions into the sequencer code
+        Returns:
+            dict: sequencer code keyed by qubit name and cross name
+        """
+        return self._lower_instruction(self.instruction)[0]
+
+    def _lower_instruction(self, instruction):
+        """Lower the instructions, reusing the cached code of the frozen prefix
+        Args:
+            instruction (InstructionList): instructions to lower
+        Returns:
+            dict: sequencer code keyed by qubit name and cross name
+            int: trigger point after the instructions
+        """
+        prefix = instruction.prefix
+        if prefix is None:
+            sequence = {}
+            trigger_point = self.trigger_offset
+        else:
+            if self.trigger_offset not in prefix.lowered:
+                prefix.lowered[self.trigger_offset] = self._lower_instruction(prefix)
+            sequence, trigger_point = prefix.lowered[self.trigger_offset]
+
+        tokens = {}
+        for qubit_name in self.qubit_name_list:
+            tokens[qubit_name] = []
+        for cross_name in self.cross_name_list:
+            tokens[cross_name] = []
+
+        for opcode, port, angle in instruction.iterate_own():
+            if opcode == RZ:
+                qubit_name = self.qubit_name_list[port]
+                token = "Z{:f} ".format(angle*180/np.pi)
+                tokens[qubit_name].append(token)
+                for cross_name in self.target_cross[qubit_name]:
+                    tokens[cross_name].append(token)
+            elif opcode == RX90:
+                self._lower_rx90(tokens, self.qubit_name_list[port])
+            else:
+                self._lower_rzx45(tokens, self.cross_name_list[port], trigger_point)
+                trigger_point += 1
+        return {port_name: sequence.get(port_name, "") + "".join(token_list) for port_name, token_list in tokens.items()}, trigger_point
+
+    def _lower_rx90(self, tokens, qubit_name):
+        tokens[qubit_name].append("P0 HPI{0} ".format(self.alpha[qubit_name]))
+
+    def _lower_rzx45(self, tokens, cross_name, trigger_point):
+        calpha = self.alpha[cross_name[0]]
+        talpha = self.alpha[cross_name[1]]
+        tokens[cross_name[0]].append("T{0} WCR{1}{2} ".format(trigger_point, calpha, talpha)) # qubit (control)
+        tokens[cross_name[1]].append("T{0} DCT{1}{2} ".format(trigger_point, calpha, talpha)) # qubit (target)
+        tokens[cross_name].append("T{0} DCR{1}{2} ".format(trigger_point, calpha, talpha))    # port ("cr1", "cr2")
 
 class NumBase:
     """Numerical Base Commands.
     Basic operation commands for calculating the numerical system
     Note:
     Base has the basical operation commands, which is equivalent to those of the ExpBase.
+    The state is simulated by the NumPy statevector engine, and a batch of circuits runs simultaneously if batch_size is given,
+    where the phase of rz can be given for each element of the batch.
     """
-    def __init__(self, qubit_name_list, cross_name_list):
+    def __init__(self, qubit_name_list, cross_name_list, batch_size=None):
         self.name = "NumBase"
         self.qubit_name_list = qubit_name_list
         self.cross_name_list = cross_name_list
+        self.batch_size = batch_size
         self.qubit_name_dict = {}
         for index, qubit_name in enumerate(qubit_name_list):
             self.qubit_name_dict[qubit_name] = index
         self._reset()
 
     def _reset(self):
-        self.q = qp.qubit.Qubits(len(self.qubit_name_dict))
+        self.q = StateVector(len(self.qubit_name_dict), self.batch_size)
+
+    def fork(self):
+        """Copy of the base with the copied state
+        Returns:
+            NumBase: forked base
+        """
+        out = copy.copy(self)
+        out.q = self.q.copy()
+        return out
 
     def rz(self, phase, qubit_name):
-        self.q.gate(rz(phase), target=self.qubit_name_dict[qubit_name])
+        self.q.rz(phase, self.qubit_name_dict[qubit_name])
 
     def rx90(self, qubit_name):
-        self.q.gate(rx(0.5*np.pi), target=self.qubit_name_dict[qubit_name])
+        self.q.gate(RX90_MATRIX, self.qubit_name_dict[qubit_name])
 
     def rzx45(self, cross_name):
-        self.q.gate(expm(-0.5j*np.kron(Z,X)*0.25*np.pi), target=[self.qubit_name_dict[cross_name[0]], self.qubit_name_dict[cross_name[1]]])
+        self.q.gate(RZX45_MATRIX, [self.qubit_name_dict[cross_name[0]], self.qubit_name_dict[cross_name[1]]])
+
+    def gate(self, operator, qubit_name_list):
+        """Apply the unitary directly, e.g. the random gates of the batch of the sequences
+        Args:
+            operator (np.ndarray): unitary of shape (2^k, 2^k), or (batch, 2^k, 2^k) for a gate per element of the batch
+            qubit_name_list (list): k target qubit names
+        """
+        self.q.gate(operator, [self.qubit_name_dict[qubit_name] for qubit_name in qubit_name_list])
+
+    def get_probability(self):
+        """Probability of each computational basis state, the first qubit being the most significant bit
+        """
+        return self.q.get_probability()
+
+class NoisyBase(NumBase):
+    """Noisy Numerical Base Commands.
+    Basic operation commands for calculating the noisy numerical system
+    Note:
+    The density matrix is simulated in the Pauli basis, and the channels of the noise model are applied after rx90 and rzx45.
+    """
+    def __init__(self, qubit_name_list, cross_name_list, noise_model=None, batch_size=None):
+        self.noise_model = NoiseModel() if noise_model is None else noise_model
+        super().__init__(qubit_name_list, cross_name_list, batch_size)
+        self.name = "NoisyBase"
+
+    def _reset(self):
+        self.q = PauliVector(len(self.qubit_name_dict), self.batch_size)
+
+    def rz(self, phase, qubit_name):
+        self.q.gate(rz_to_ptm(phase), self.qubit_name_dict[qubit_name])
+
+    def rx90(self, qubit_name):
+        target = self.qubit_name_dict[qubit_name]
+        self.q.gate(RX90_PTM, target)
+        self.q.gate(self.noise_model.get_channel(RX90), target)
+
+    def rzx45(self, cross_name):
+        target = [self.qubit_name_dict[cross_name[0]], self.qubit_name_dict[cross_name[1]]]
+        self.q.gate(RZX45_PTM, target)
+        self.q.gate(self.noise_model.get_channel(RZX45), target)
+
+    def gate(self, operator, qubit_name_list):
+        """Apply the unitary directly without the noise
+        Args:
+            operator (np.ndarray): unitary of shape (2^k, 2^k), or (batch, 2^k, 2^k) for a gate per element of the batch
+            qubit_name_list (list): k target qubit names
+        """
+        self.q.gate(unitary_to_ptm(operator), [self.qubit_name_dict[qubit_name] for qubit_name in qubit_name_list])
+
+    def get_probability(self):
+        """Probability of each read outcome including the readout error, the first qubit being the most significant bit
+        """
+        return self.q.get_probability(self.noise_model.get_readout_matrix())
 
 class MitigatedBase(ExpBase):
     """Experimental Base Commands with Error Mitigation.
@@ -104,21 +257,14 @@ class MitigatedBase(ExpBase):
     #         self.rz(np.pi, qubit_name)
     #     super().rx90(qubit_name)
 
-    def rx90(self, qubit_name):
-        """Execute a rx90 gate
-        Args:
-            qubit_name (str): name of qubit
+    def _lower_rx90(self, tokens, qubit_name):
+        """Lower a rx90 gate surrounded by the waits
         """
-        alpha = name_to_alpha(qubit_name)
-
-        for _ in range(self.mitigation_number):
-            self.sequence[qubit_name] += "WAIT{0} ".format(alpha)
+        wait = ["WAIT{0} ".format(self.alpha[qubit_name])]*self.mitigation_number
+        tokens[qubit_name].extend(wait)
+        tokens[qubit_name].append("P0 HPI{0} ".format(self.alpha[qubit_name]))
+        tokens[qubit_name].extend(wait)
 
-        self.sequence[qubit_name] += "P0 HPI{0} ".format(alpha)
-        
-        for _ in range(self.mitigation_number):
-            self.sequence[qubit_name] += "WAIT{0} ".format(alpha)
-    
     # def rzx45(self, cross_name):
     #     for _ in range(self.mitigation_number):
     #         super().rzx45(cross_name)
@@ -127,33 +273,25 @@ class MitigatedBase(ExpBase):
     #         self.rz(np.pi, cross_name[1])
     #     super().rzx45(cross_name)
 
-    def rzx45(self, cross_name):
-        """Execute a rzx45 gate
-        Args:
-            cross_name (str, str, str): (name of control qubit, name of target qubit, name of port)
+    def _lower_rzx45(self, tokens, cross_name, trigger_point):
+        """Lower a rzx45 gate surrounded by the waits
         """
-        calpha = name_to_alpha(cross_name[0])
-        talpha = name_to_alpha(cross_name[1])
-
-        self.sequence[cross_name[0]] += "T{0} ".format(self.trigger_point)
-        self.sequence[cross_name[1]] += "T{0} ".format(self.trigger_point)
-        self.sequence[cross_name]    += "T{0} ".format(self.trigger_point)
+        calpha = self.alpha[cross_name[0]]
+        talpha = self.alpha[cross_name[1]]
+        port_list = [cross_name[0], cross_name[1], cross_name]
+        wait = ["WAIT{0}{1} ".format(calpha, talpha)]*self.mitigation_number
 
-        for _ in range(self.mitigation_number):
-            self.sequence[cross_name[0]] += "WAIT{0}{1} ".format(calpha, talpha)
-            self.sequence[cross_name[1]] += "WAIT{0}{1} ".format(calpha, talpha)
-            self.sequence[cross_name]    += "WAIT{0}{1} ".format(calpha, talpha)
+        for port_name in port_list:
+            tokens[port_name].append("T{0} ".format(trigger_point))
+        for port_name in port_list:
+            tokens[port_name].extend(wait)
 
-        self.sequence[cross_name[0]] += "WCR{0}{1} ".format(calpha, talpha) # qubit (control)
-        self.sequence[cross_name[1]] += "DCT{0}{1} ".format(calpha, talpha) # qubit (target)
-        self.sequence[cross_name]    += "DCR{0}{1} ".format(calpha, talpha) # port ("cr1", "cr2")
+        tokens[cross_name[0]].append("WCR{0}{1} ".format(calpha, talpha)) # qubit (control)
+        tokens[cross_name[1]].append("DCT{0}{1} ".format(calpha, talpha)) # qubit (target)
+        tokens[cross_name].append("DCR{0}{1} ".format(calpha, talpha))    # port ("cr1", "cr2")
 
-        for _ in range(self.mitigation_number):
-            self.sequence[cross_name[0]] += "WAIT{0}{1} ".format(calpha, talpha)
-            self.sequence[cross_name[1]] += "WAIT{0}{1} ".format(calpha, talpha)
-            self.sequence[cross_name]    += "WAIT{0}{1} ".format(calpha, talpha)
-
-        self.trigger_point           += 1
+        for port_name in port_list:
+            tokens[port_name].extend(wait)
 
 class Circuit:
     """Circuit Processor for Experiments and Numerics.
@@ -176,6 +314,27 @@ class Circuit:
         """
         self.base._reset()
 
+    def fork(self):
+        """Copy of the circuit on the forked base, used instead of copy.deepcopy for each job
+        Returns:
+            Circuit: forked circuit
+        """
+        out = copy.copy(self)
+        out.base = self.base.fork()
+        out.rz = out.base.rz
+        out.rx90 = out.base.rx90
+        out.rzx45 = out.base.rzx45
+        return out
+
+    def optimize(self, duration=None):
+        """Optimize the recorded gate stream, only for the experimental bases
+        Args:
+            duration (dict): duration of each opcode used for the report
+        Returns:
+            dict: gate count and estimated pulse duration before and after the optimization
+        """
+        return self.base.optimize(duration)
+
     def ry90(self, qubit_name):
         """Execute a ry90 gate
         Args:
@@ -295,4 +454,47 @@ class Circuit:
         self.su2(gates[2][1], cross_name[1])
         self.cnot(cross_name)
         self.su2(gates[3][0], cross_name[0])
-        self.su2(gates[3][1], cross_name[1])
\ No newline at end of file
+        self.su2(gates[3][1], cross_name[1])
+
+def test_fork():
+    qubit_name_list = ["Q1", "Q2"]
+    cross_name_list = [("Q1", "Q2", "cr1")]
+    def prefix(circuit):
+        circuit.ry90("Q1")
+        circuit.cnot(cross_name_list[0])
+    def suffix(circuit, phase):
+        circuit.rz(phase, "Q2")
+        circuit.rzx90(cross_name_list[0])
+        circuit.rx90("Q1")
+
+    for base_function in [lambda: ExpBase(qubit_name_list, cross_name_list), lambda: MitigatedBase(qubit_name_list, cross_name_list, 2)]:
+        template = Circuit(base_function())
+        prefix(template)
+        template_sequence = dict(template.base.sequence)
+        child_list = [template.fork() for _ in range(2)]
+        for index, child in enumerate(child_list):
+            suffix(child, 0.1*(index + 1))
+        grandchild = child_list[0].fork()
+        suffix(grandchild, 0.3)
+        suffix(child_list[0], 0.4)
+        template.rx90("Q2")
+
+        for circuit, phase_list in [(child_list[0], [0.1, 0.4]), (child_list[1], [0.2]), (grandchild, [0.1, 0.3])]:
+            reference = Circuit(base_function())
+            prefix(reference)
+            for phase in phase_list:
+                suffix(reference, phase)
+            assert(circuit.base.sequence == reference.base.sequence)
+            assert(len(circuit.base.instruction) == len(reference.base.instruction))
+        reference = Circuit(base_function())
+        prefix(reference)
+        assert(reference.base.sequence == template_sequence)
+        reference.rx90("Q2")
+        assert(template.base.sequence == reference.base.sequence)
+
+    template = Circuit(NumBase(qubit_name_list, cross_name_list))
+    template.rx90("Q1")
+    child = template.fork()
+    child.cnot(cross_name_list[0])
+    assert(np.allclose(template.base.get_probability(), [0.5, 0, 0.5, 0]))
+    assert(np.allclose(child.base.get_probability(), [0.5, 0, 0, 0.5]))
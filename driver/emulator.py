@@ -0,0 +1,154 @@
+import numpy as np
+from .instruction import InstructionList, RZ, RX90, RZX45
+from .circuit import NoisyBase
+from .histogram import sample_histogram, array_to_histogram
+
+def sequence_to_instruction(sequence):
+    """Recover the instructions from the sequencer code lowered by ExpBase or MitigatedBase
+    The single-qubit tokens of each qubit port are merged in the order of the triggers of the rzx45 gates,
+    and the waits of the error mitigation are ignored.
+    Args:
+        sequence (dict): sequencer code keyed by qubit name and cross name
+    Returns:
+        InstructionList: recovered instructions
+    """
+    qubit_name_list = [port_name for port_name in sequence.keys() if type(port_name) is str]
+    cross_name_list = [port_name for port_name in sequence.keys() if type(port_name) is tuple]
+    instruction = InstructionList(qubit_name_list, cross_name_list)
+
+    cross_trigger = {}
+    for port, cross_name in enumerate(cross_name_list):
+        trigger = None
+        for token in sequence[cross_name].split():
+            if token[0] == "T" and token[1:].isdigit():
+                trigger = int(token[1:])
+            elif token.startswith("DCR"):
+                cross_trigger[trigger] = port
+
+    segments = []
+    for port, qubit_name in enumerate(qubit_name_list):
+        segment = {None: []}
+        trigger = None
+        for token in sequence[qubit_name].split():
+            if token[0] == "Z":
+                segment[trigger].append((RZ, float(token[1:])*np.pi/180))
+            elif token.startswith("HPI"):
+                segment[trigger].append((RX90, 0.))
+            elif token[0] == "T" and token[1:].isdigit():
+                trigger = int(token[1:])
+                segment[trigger] = []
+        segments.append(segment)
+
+    for trigger in [None] + sorted(cross_trigger.keys()):
+        if trigger is not None:
+            instruction.append(RZX45, cross_trigger[trigger])
+        for port, segment in enumerate(segments):
+            for opcode, angle in segment.get(trigger, []):
+                instruction.append(opcode, port, angle)
+    return instruction
+
+def sample_job_table(job_table, probability, shot=1024, generator=None, as_dict=False):
+    """Fill the results of the jobs with the histograms sampled in a single vectorized call
+    The histograms are normalized as those of driver/instrument.take_data, and accessed by the bitstrings.
+    Args:
+        job_table (JobTable): jobs to fill
+        probability (np.ndarray): probability of each job of shape (jobs, 2^n), e.g. exact one of the simulation
+        shot (int): number of shots of the jobs without the shot attribute
+        generator (np.random.Generator): random generator, or seed of the new generator
+        as_dict (bool): if True, the results are the dicts keyed by the bitstrings instead of Histogram
+    Returns:
+        np.ndarray: counts of shape (jobs, 2^n)
+    """
+    shot_array = np.array([getattr(job, "shot", None) or shot for job in job_table.table])
+    count = sample_histogram(probability, shot_array, generator)
+    for job, histogram in zip(job_table.table, array_to_histogram(count, as_dict=as_dict)):
+        job.result = histogram
+        job.end_flag = True
+    return count
+
+class Emulator:
+    """Noisy emulator of the instruments.
+    take_data fills the results of the jobs with the histograms sampled from the noisy simulation of their sequences,
+    normalized in the same way as driver/instrument.take_data, so the experiments can run offline.
+    Args:
+        noise_model (NoiseModel): noise of the gates and the readout, noiseless if None
+        shot (int): number of shots of the jobs without the shot attribute
+        seed (int or np.random.Generator): seed of the sampling
+        as_dict (bool): if True, the results are the dicts keyed by the bitstrings instead of Histogram
+    """
+    def __init__(self, noise_model=None, shot=1024, seed=None, as_dict=False):
+        self.noise_model = noise_model
+        self.shot = shot
+        self.generator = np.random.default_rng(seed)
+        self.as_dict = as_dict
+
+    def simulate(self, sequence):
+        """Probability of each read outcome of the sequence
+        Args:
+            sequence (dict): sequencer code keyed by qubit name and cross name
+        Returns:
+            np.ndarray: probability of shape (2^n,), the first qubit being the most significant bit
+        """
+        instruction = sequence_to_instruction(sequence)
+        base = NoisyBase(instruction.qubit_name_list, instruction.cross_name_list, self.noise_model)
+        instruction.replay(base)
+        return base.get_probability()
+
+    def take_data(self, job_table):
+        """Fill the results of the jobs with the sampled histograms
+        Args:
+            job_table (JobTable): jobs to execute
+        """
+        probability = np.array([self.simulate(job.sequence) for job in job_table.table])
+        sample_job_table(job_table, probability, self.shot, self.generator, self.as_dict)
+
+def test_emulator():
+    from .circuit import ExpBase, MitigatedBase, NumBase, Circuit
+    from .simulator import NoiseModel
+    from ..objects import Job, JobTable
+    qubit_name_list = ["Q1", "Q2", "Q3"]
+    cross_name_list = [("Q1", "Q2", "cr1"), ("Q3", "Q2", "cr2")]
+    generator = np.random.default_rng(0)
+    gate_list = [np.linalg.qr(generator.normal(size=(4, 4)) + 1j*generator.normal(size=(4, 4)))[0] for _ in range(4)]
+    reference = Circuit(NumBase(qubit_name_list, cross_name_list))
+    for index, gate in enumerate(gate_list):
+        reference.su4(gate, cross_name_list[index%2])
+        reference.rx90("Q3")
+    for base in [ExpBase(qubit_name_list, cross_name_list), MitigatedBase(qubit_name_list, cross_name_list, 1)]:
+        circuit = Circuit(base)
+        for index, gate in enumerate(gate_list):
+            circuit.su4(gate, cross_name_list[index%2])
+            circuit.rx90("Q3")
+        probability = Emulator().simulate(circuit.base.sequence)
+        assert(np.allclose(probability, reference.base.get_probability(), atol=1e-6))
+
+    circuit = Circuit(ExpBase(qubit_name_list, cross_name_list))
+    circuit.rx90("Q1")
+    circuit.rx90("Q1")
+    noise_model = NoiseModel(depolarizing={RX90: 0.1}, readout_error=(0.0, 0.2))
+    probability = Emulator(noise_model).simulate(circuit.base.sequence)
+    assert(np.isclose(probability[0b100], 0.5*(1 + 0.9*0.9)*0.8))
+
+    job_table = JobTable()
+    job_table.submit(Job({"sequence": circuit.base.sequence, "shot": 100000}))
+    Emulator(noise_model, seed=0).take_data(job_table)
+    assert(abs(job_table.table[0].result["100"] - probability[0b100]) < 0.01)
+
+def test_sample_job_table():
+    import time
+    from ..objects import Job, JobTable
+    generator = np.random.default_rng(0)
+    number_of_job = 5000
+    probability = generator.dirichlet(np.ones(8), size=number_of_job)
+    job_table = JobTable()
+    for index in range(number_of_job):
+        job_table.submit(Job({"shot": 1000 if index%2 else None}))
+    start = time.time()
+    count = sample_job_table(job_table, probability, shot=200, generator=generator)
+    assert(time.time() - start < 5)
+    assert(np.all(count[1::2].sum(axis=1) == 1000) and np.all(count[::2].sum(axis=1) == 200))
+    result = job_table.table[1].result
+    assert(list(result.keys())[:2] == ["000", "001"] and np.isclose(sum(result.values()), 1))
+    assert(np.isclose(result["011"], count[1, 3]/1000))
+    sample_job_table(job_table, probability, generator=generator, as_dict=True)
+    assert(type(job_table.table[0].result) is dict and len(job_table.table[0].result) == 8)
@@ -1,17 +1,60 @@
 import numpy as np
+from ..util.histogram import Histogram
 
 def normalize_histogram(histogram):
     """Devide the elements of the histogram with the sum of the elements
     Args:
-        histogram (dict): population of the histogram before normalization
+        histogram (dict or Histogram): population of the histogram before normalization
     Returns:
-        histogram (dict): population of the histogram after normalization
+        histogram (dict or Histogram): population of the histogram after normalization
     """
+    if isinstance(histogram, Histogram):
+        return histogram.normalize()
     total = np.sum(list(histogram.values()))
     for key in histogram.keys():
         histogram[key]/= total
     return histogram
 
+def get_bitstring_list(number_of_qubit):
+    """Keys of the histogram, the first qubit being the leftmost
+    Args:
+        number_of_qubit (int): number of the measured qubits
+    Returns:
+        list: bitstrings in the order of the integer outcome
+    """
+    return [format(outcome, "0{0}b".format(number_of_qubit)) for outcome in range(2**number_of_qubit)]
+
+def sample_histogram(probability, shot, generator=None):
+    """Sample the finite-shot histograms of all the jobs in a single multinomial call
+    Args:
+        probability (np.ndarray): probability of shape (jobs, 2^n)
+        shot (int or np.ndarray): number of shots of all the jobs, or of each job of shape (jobs,)
+        generator (np.random.Generator): random generator, or seed of the new generator
+    Returns:
+        np.ndarray: counts of shape (jobs, 2^n)
+    """
+    generator = np.random.default_rng(generator)
+    probability = np.asarray(probability, dtype=np.float64)
+    probability = probability/probability.sum(axis=-1, keepdims=True)
+    return generator.multinomial(shot, probability)
+
+def array_to_histogram(count, normalize=True, as_dict=False):
+    """Convert the counts into the histograms
+    Args:
+        count (np.ndarray): counts of shape (jobs, 2^n)
+        normalize (bool): if True, the histograms are normalized as normalize_histogram
+        as_dict (bool): if True, the histograms are the dicts keyed by the bitstrings instead of Histogram
+    Returns:
+        list: histogram of each job
+    """
+    count = np.asarray(count)
+    if normalize:
+        count = count/count.sum(axis=-1, keepdims=True)
+    if as_dict:
+        bitstring_list = get_bitstring_list(int(np.log2(count.shape[-1])))
+        return [dict(zip(bitstring_list, row)) for row in count.tolist()]
+    return [Histogram(row) for row in count]
+
 def get_hist_dict(dataset, projector):
     """Process the experimental results to the dictionary of the histogram
     Args:
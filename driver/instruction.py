@@ -0,0 +1,123 @@
+import itertools
+from array import array
+
+RZ = 0
+RX90 = 1
+RZX45 = 2
+
+OPCODE_NAME = {RZ: "rz", RX90: "rx90", RZX45: "rzx45"}
+
+class InstructionList:
+    """Typed array-backed list of the base instructions.
+    Each instruction is stored as (opcode, port index, angle) in three typed columns.
+    Note:
+    The port index refers to qubit_name_list for rz and rx90, and to cross_name_list for rzx45.
+    A forked list shares the instructions recorded before the fork as a frozen prefix,
+    and only stores the instructions appended after the fork.
+    """
+    def __init__(self, qubit_name_list, cross_name_list):
+        self.qubit_name_list = qubit_name_list
+        self.cross_name_list = cross_name_list
+        self.qubit_index = {qubit_name: index for index, qubit_name in enumerate(qubit_name_list)}
+        self.cross_index = {cross_name: index for index, cross_name in enumerate(cross_name_list)}
+        self.clear()
+
+    def clear(self):
+        """Remove all the instructions
+        """
+        self.prefix = None
+        self._clear_own()
+
+    def _clear_own(self):
+        self.opcode = array("B")
+        self.port = array("i")
+        self.angle = array("d")
+        self.lowered = {}
+
+    def append(self, opcode, port, angle=0.):
+        """Append an instruction
+        Args:
+            opcode (int): RZ, RX90 or RZX45
+            port (int): port index
+            angle (float): rotation angle of rz
+        """
+        self.opcode.append(opcode)
+        self.port.append(port)
+        self.angle.append(angle)
+
+    def rz(self, phase, qubit_name):
+        self.append(RZ, self.qubit_index[qubit_name], phase)
+
+    def rx90(self, qubit_name):
+        self.append(RX90, self.qubit_index[qubit_name])
+
+    def rzx45(self, cross_name):
+        self.append(RZX45, self.cross_index[cross_name])
+
+    def copy(self):
+        out = InstructionList.__new__(InstructionList)
+        out.__dict__.update(self.__dict__)
+        out.opcode = array("B", self.opcode)
+        out.port = array("i", self.port)
+        out.angle = array("d", self.angle)
+        out.lowered = {}
+        return out
+
+    def fork(self):
+        """Copy-on-write copy in O(1)
+        The current instructions are frozen into the prefix shared by this list and the fork,
+        and both of them record the later instructions separately.
+        Returns:
+            InstructionList: forked list
+        """
+        if len(self.opcode):
+            frozen = InstructionList.__new__(InstructionList)
+            frozen.__dict__.update(self.__dict__)
+            self.prefix = frozen
+            self._clear_own()
+        out = InstructionList.__new__(InstructionList)
+        out.__dict__.update(self.__dict__)
+        out._clear_own()
+        return out
+
+    def count(self, opcode):
+        """Number of the instructions of the opcode
+        """
+        prefix_count = 0 if self.prefix is None else self.prefix.count(opcode)
+        return prefix_count + self.opcode.count(opcode)
+
+    def iterate_own(self):
+        """Iterate the instructions recorded after the prefix
+        """
+        return zip(self.opcode, self.port, self.angle)
+
+    def __len__(self):
+        prefix_length = 0 if self.prefix is None else len(self.prefix)
+        return prefix_length + len(self.opcode)
+
+    def __iter__(self):
+        if self.prefix is None:
+            return self.iterate_own()
+        return itertools.chain(self.prefix, self.iterate_own())
+
+    def get_port_name(self, opcode, port):
+        """Name of the port of the instruction
+        Returns:
+            str or (str, str, str): qubit name, or cross name for rzx45
+        """
+        if opcode == RZX45:
+            return self.cross_name_list[port]
+        return self.qubit_name_list[port]
+
+    def replay(self, base):
+        """Execute the instructions on the base, e.g. NumBase for simulation
+        Args:
+            base (ExpBase or NumBase): base to execute
+        """
+        for opcode, port, angle in self:
+            if opcode == RZ:
+                base.rz(angle, self.qubit_name_list[port])
+            elif opcode == RX90:
+                base.rx90(self.qubit_name_list[port])
+            else:
+                base.rzx45(self.cross_name_list[port])
@@ -0,0 +1,135 @@
+import numpy as np
+from qupy.operator import rx, rz
+from .instruction import InstructionList, RZ, RX90, RZX45
+from .decompose import matrix_to_su2
+
+ROUND_ERROR = 1e-10
+
+# estimated pulse duration of each instruction in ns, rz is virtual
+GATE_DURATION = {RZ: 0., RX90: 20., RZX45: 200.}
+
+def _wrap(angle):
+    """Wrap the angle into (-pi, pi]
+    """
+    return np.pi - (np.pi - angle) % (2*np.pi)
+
+def _simplify(run):
+    """Merge adjacent rz gates, drop identity rz gates and cancel rx90^4
+    Args:
+        run (list): (opcode, angle) of the single-qubit instructions in time order
+    Returns:
+        list: simplified instructions
+    """
+    out = []
+    for opcode, angle in run:
+        if opcode == RZ:
+            if out and out[-1][0] == RZ:
+                angle += out.pop()[1]
+            angle = _wrap(angle)
+            if abs(angle) > ROUND_ERROR:
+                out.append((RZ, angle))
+        else:
+            out.append((RX90, 0.))
+            if len(out) >= 4 and all(op == RX90 for op, _ in out[-4:]):
+                del out[-4:]
+    return out
+
+def _get_unitary(run):
+    unitary = np.eye(2, dtype=np.complex128)
+    for opcode, angle in run:
+        unitary = (rz(angle) if opcode == RZ else rx(0.5*np.pi)) @ unitary
+    return unitary
+
+def _resynthesize(run):
+    """Replace the run by the u3 decomposition if it has fewer rx90 gates
+    Args:
+        run (list): simplified single-qubit instructions
+    Returns:
+        list: instructions with the same unitary up to the global phase
+    """
+    rx90_count = sum(opcode == RX90 for opcode, _ in run)
+    if rx90_count < 2:
+        return run
+    unitary = _get_unitary(run)
+    if abs(unitary[1,0]) < ROUND_ERROR:
+        candidate = _simplify([(RZ, np.angle(unitary[1,1]/unitary[0,0]))])
+    else:
+        phases = matrix_to_su2(unitary)
+        candidate = _simplify([(RZ, phases[2]), (RX90, 0.), (RZ, phases[1]), (RX90, 0.), (RZ, phases[0])])
+    candidate_rx90_count = sum(opcode == RX90 for opcode, _ in candidate)
+    if (candidate_rx90_count, len(candidate)) < (rx90_count, len(run)):
+        return candidate
+    return run
+
+def estimate_duration(instruction, duration=None):
+    """Estimate the pulse duration of the instructions with the as-soon-as-possible schedule
+    Args:
+        instruction (InstructionList): instructions to estimate
+        duration (dict): duration of each opcode, GATE_DURATION if None
+    Returns:
+        float: duration of the longest qubit
+    """
+    duration = GATE_DURATION if duration is None else duration
+    time = {qubit_name: 0. for qubit_name in instruction.qubit_name_list}
+    for opcode, port, angle in instruction:
+        if opcode == RZX45:
+            cross_name = instruction.cross_name_list[port]
+            start = max(time[cross_name[0]], time[cross_name[1]])
+            time[cross_name[0]] = time[cross_name[1]] = start + duration[RZX45]
+        else:
+            time[instruction.qubit_name_list[port]] += duration[opcode]
+    return max(time.values(), default=0.)
+
+def optimize_instruction(instruction, duration=None):
+    """Optimize the recorded instructions with virtual-Z phase folding and single-qubit gate fusion
+    Each run of single-qubit instructions between rzx45 gates is simplified by merging rz gates (mod 2pi),
+    cancelling rx90^4 and resynthesizing the run into at most two rx90 gates, e.g. for successive su2 blocks.
+    Args:
+        instruction (InstructionList): instructions to optimize
+        duration (dict): duration of each opcode used for the report, GATE_DURATION if None
+    Returns:
+        InstructionList: optimized instructions
+        dict: gate count and estimated pulse duration before and after the optimization
+    """
+    out = InstructionList(instruction.qubit_name_list, instruction.cross_name_list)
+    runs = [[] for _ in instruction.qubit_name_list]
+
+    def flush(qubit_index):
+        for opcode, angle in _resynthesize(_simplify(runs[qubit_index])):
+            out.append(opcode, qubit_index, angle)
+        runs[qubit_index] = []
+
+    for opcode, port, angle in instruction:
+        if opcode == RZX45:
+            cross_name = instruction.cross_name_list[port]
+            flush(instruction.qubit_index[cross_name[0]])
+            flush(instruction.qubit_index[cross_name[1]])
+            out.append(RZX45, port)
+        else:
+            runs[port].append((opcode, angle))
+    for qubit_index in range(len(runs)):
+        flush(qubit_index)
+
+    report = {}
+    for key, value in [("before", instruction), ("after", out)]:
+        report[key] = {
+            "gate_count" : len(value),
+            "rx90_count" : value.count(RX90),
+            "rz_count" : value.count(RZ),
+            "duration" : estimate_duration(value, duration),
+        }
+    report["gate_count_reduction"] = report["before"]["gate_count"] - report["after"]["gate_count"]
+    report["duration_reduction"] = report["before"]["duration"] - report["after"]["duration"]
+    return out, report
+
+def test_optimize_sequence():
+    from .circuit import ExpBase
+    base = ExpBase(["Q1"], [])
+    for phase in [0.1, 0.2, 0.3]:
+        base.rx90("Q1")
+        base.rz(phase, "Q1")
+    before = base.sequence
+    base.optimize()
+    after = ExpBase(["Q1"], [])
+    base.instruction.replay(after)
+    assert(base.sequence == after.sequence and base.sequence != before)
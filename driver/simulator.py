@@ -0,0 +1,330 @@
+import functools
+import numpy as np
+from scipy.linalg import expm
+from qupy.operator import I, X, Y, Z, rx
+from .instruction import RX90, RZX45
+
+# constant gate matrices, computed once
+RX90_MATRIX = rx(0.5*np.pi)
+RZX45_MATRIX = expm(-0.5j*np.kron(Z,X)*0.25*np.pi)
+
+# Pauli vector of |0><0| and the map from its I and Z elements to the populations of |0> and |1>
+ZERO_PAULI = np.array([1., 0., 0., 1.])
+PAULI_TO_POPULATION = np.array([[0.5, 0.5], [0.5, -0.5]])
+
+def apply_operator(state, operator, target, dim):
+    """Apply the operator on the target axes of the batched tensor
+    Args:
+        state (np.ndarray): tensor of shape (batch, dim, ..., dim), where the axis 1+q is the qubit q
+        operator (np.ndarray): operator of shape (dim^k, dim^k), or (batch, dim^k, dim^k) for an operator per element of the batch
+        target (int or list): k target qubits, the first one being the most significant of the operator
+        dim (int): local dimension, 2 for the statevector and 4 for the Pauli vector
+    Returns:
+        np.ndarray: tensor after the operation
+    """
+    target = [target] if np.ndim(target) == 0 else list(target)
+    axes = [1 + qubit for qubit in target]
+    size = len(target)
+    operator = np.asarray(operator)
+    if operator.ndim == 2:
+        operator = operator.reshape((dim,)*(2*size))
+        state = np.tensordot(operator, state, axes=(list(range(size, 2*size)), axes))
+        return np.moveaxis(state, list(range(size)), axes)
+    state = np.moveaxis(state, axes, list(range(-size, 0)))
+    shape = state.shape
+    state = state.reshape(shape[0], -1, dim**size) @ np.swapaxes(operator, -1, -2)
+    return np.moveaxis(state.reshape(shape), list(range(-size, 0)), axes)
+
+class StateVector:
+    """Batched statevector of the qubits.
+    The state is stored as the array of shape (batch, 2, ..., 2), where the axis 1+q is the qubit q.
+    Note:
+    The gates are applied on the target axes with tensordot, and a batch of circuits, e.g. all the random sequences of one length,
+    runs simultaneously when the gate is given for each element of the batch.
+    Without batch_size the batch axis is hidden from get_state and get_probability, compatible with qupy.qubit.Qubits.
+    """
+    def __init__(self, size, batch_size=None, dtype=np.complex128):
+        self.size = size
+        self.batch_size = batch_size
+        self.dtype = dtype
+        self.reset()
+
+    def reset(self):
+        """Reset the state to |0...0>
+        """
+        self.state = np.zeros((1 if self.batch_size is None else self.batch_size,) + (2,)*self.size, dtype=self.dtype)
+        self.state[(slice(None),) + (0,)*self.size] = 1
+
+    def copy(self):
+        out = StateVector.__new__(StateVector)
+        out.__dict__.update(self.__dict__)
+        out.state = self.state.copy()
+        return out
+
+    def set_state(self, state):
+        """Set the state
+        Args:
+            state (np.ndarray): flattened or tensor state, with the leading batch axis if batch_size is given
+        """
+        self.state = np.asarray(state, dtype=self.dtype).reshape(self.state.shape)
+
+    def get_state(self, flatten=True):
+        """Get the state
+        Args:
+            flatten (bool): if True, each state is flattened into the vector of length 2^n, the qubit 0 being the most significant bit
+        Returns:
+            np.ndarray: state of shape ([batch,] 2^n) or ([batch,] 2, ..., 2)
+        """
+        state = self.state.reshape(self.state.shape[0], -1) if flatten else self.state
+        return state if self.batch_size is not None else state[0]
+
+    def get_probability(self):
+        """Probability of each computational basis state
+        Returns:
+            np.ndarray: probability of shape ([batch,] 2^n)
+        """
+        state = self.get_state()
+        return state.real**2 + state.imag**2
+
+    def gate(self, operator, target):
+        """Apply the gate
+        Args:
+            operator (np.ndarray): unitary of shape (2^k, 2^k), or (batch, 2^k, 2^k) for a gate per element of the batch
+            target (int or list): k target qubits, the first one being the most significant of the operator
+        """
+        self.state = apply_operator(self.state, operator, target, 2)
+
+    def diagonal(self, diagonal, target):
+        """Apply the single-qubit diagonal gate by multiplying the phases
+        Args:
+            diagonal (np.ndarray): diagonal of shape (2,), or (batch, 2) for a gate per element of the batch
+            target (int): target qubit
+        """
+        diagonal = np.asarray(diagonal)
+        shape = [1]*self.state.ndim
+        shape[0] = diagonal.shape[0] if diagonal.ndim == 2 else 1
+        shape[1 + target] = 2
+        self.state = self.state * diagonal.reshape(shape)
+
+    def rz(self, phase, target):
+        """Apply the rz gate
+        Args:
+            phase (float or np.ndarray): rotation angle, or angles of shape (batch,)
+            target (int): target qubit
+        """
+        phase = 0.5*np.asarray(phase, dtype=np.float64)
+        self.diagonal(np.stack([np.exp(-1j*phase), np.exp(1j*phase)], axis=-1), target)
+
+@functools.lru_cache(maxsize=None)
+def get_pauli_basis(size):
+    """Pauli matrices of the qubits in the order of I, X, Y, Z, the first qubit being the most significant
+    Args:
+        size (int): number of qubits
+    Returns:
+        np.ndarray: Pauli matrices of shape (4^size, 2^size, 2^size)
+    """
+    basis = np.ones((1, 1, 1), dtype=np.complex128)
+    for _ in range(size):
+        basis = np.einsum("iab,jcd->ijacbd", basis, np.array([I, X, Y, Z]))
+        basis = basis.reshape(basis.shape[0]*basis.shape[1], basis.shape[2]*basis.shape[3], -1)
+    return basis
+
+def unitary_to_ptm(unitary):
+    """Pauli transfer matrix of the unitary, R_ij = Tr(P_i U P_j U^dagger)/2^k
+    Args:
+        unitary (np.ndarray): unitary of shape (2^k, 2^k), or (batch, 2^k, 2^k)
+    Returns:
+        np.ndarray: Pauli transfer matrix of shape ([batch,] 4^k, 4^k)
+    """
+    unitary = np.asarray(unitary)
+    dim = unitary.shape[-1]
+    basis = get_pauli_basis(int(np.log2(dim)))
+    channel = np.einsum("...ab,jbc,...dc->...jad", unitary, basis, unitary.conj())
+    return np.einsum("iba,...jab->...ij", basis, channel).real/dim
+
+def rz_to_ptm(phase):
+    """Pauli transfer matrix of the rz gate
+    Args:
+        phase (float or np.ndarray): rotation angle, or angles of shape (batch,)
+    Returns:
+        np.ndarray: Pauli transfer matrix of shape ([batch,] 4, 4)
+    """
+    phase = np.asarray(phase, dtype=np.float64)
+    ptm = np.zeros(phase.shape + (4, 4))
+    ptm[..., 0, 0] = ptm[..., 3, 3] = 1
+    ptm[..., 1, 1] = ptm[..., 2, 2] = np.cos(phase)
+    ptm[..., 2, 1] = np.sin(phase)
+    ptm[..., 1, 2] = -np.sin(phase)
+    return ptm
+
+def depolarizing_ptm(probability, size=1):
+    """Pauli transfer matrix of the depolarizing channel, rho -> (1-p) rho + p I/2^size
+    Args:
+        probability (float): depolarizing probability
+        size (int): number of qubits
+    Returns:
+        np.ndarray: Pauli transfer matrix of shape (4^size, 4^size)
+    """
+    return np.diag([1.] + [1. - probability]*(4**size - 1))
+
+def amplitude_damping_ptm(gamma):
+    """Pauli transfer matrix of the amplitude damping channel of a qubit
+    Args:
+        gamma (float): probability of the decay from |1> to |0>
+    Returns:
+        np.ndarray: Pauli transfer matrix of shape (4, 4)
+    """
+    ptm = np.diag([1., np.sqrt(1. - gamma), np.sqrt(1. - gamma), 1. - gamma])
+    ptm[3, 0] = gamma
+    return ptm
+
+RX90_PTM = unitary_to_ptm(RX90_MATRIX)
+RZX45_PTM = unitary_to_ptm(RZX45_MATRIX)
+
+class NoiseModel:
+    """Noise of the gates and the readout.
+    The depolarizing and amplitude damping channels are applied after each rx90 and rzx45 gate as the Pauli transfer matrices,
+    and rz is noiseless as it is virtual.
+    Args:
+        depolarizing (dict): depolarizing probability keyed by the opcode, RX90 or RZX45
+        amplitude_damping (dict): amplitude damping probability of each target qubit keyed by the opcode
+        readout_error (tuple): probabilities to read |0> as 1 and |1> as 0
+    """
+    def __init__(self, depolarizing=None, amplitude_damping=None, readout_error=(0., 0.)):
+        self.depolarizing = {} if depolarizing is None else depolarizing
+        self.amplitude_damping = {} if amplitude_damping is None else amplitude_damping
+        self.readout_error = readout_error
+        self._channel = {}
+
+    def get_channel(self, opcode):
+        """Pauli transfer matrix of the noise after the gate
+        Args:
+            opcode (int): RX90 or RZX45
+        Returns:
+            np.ndarray: Pauli transfer matrix of shape (4^k, 4^k) on the k target qubits
+        """
+        if opcode not in self._channel:
+            size = 2 if opcode == RZX45 else 1
+            damping = np.ones((1, 1))
+            for _ in range(size):
+                damping = np.kron(damping, amplitude_damping_ptm(self.amplitude_damping.get(opcode, 0.)))
+            self._channel[opcode] = damping @ depolarizing_ptm(self.depolarizing.get(opcode, 0.), size)
+        return self._channel[opcode]
+
+    def get_readout_matrix(self):
+        """Confusion matrix of the readout
+        Returns:
+            np.ndarray: probability of the read value (row) for the prepared state (column)
+        """
+        error0, error1 = self.readout_error
+        return np.array([[1. - error0, error1], [error0, 1. - error1]])
+
+class PauliVector:
+    """Batched density matrix of the qubits in the Pauli basis.
+    The state is stored as the real array r_i = Tr(P_i rho) of shape (batch, 4, ..., 4), where the axis 1+q is the qubit q.
+    Note:
+    The gates and the noise channels are applied as the Pauli transfer matrices on the target axes.
+    """
+    def __init__(self, size, batch_size=None):
+        self.size = size
+        self.batch_size = batch_size
+        self.reset()
+
+    def reset(self):
+        """Reset the state to |0...0><0...0|
+        """
+        state = np.ones((1 if self.batch_size is None else self.batch_size,))
+        for _ in range(self.size):
+            state = np.multiply.outer(state, ZERO_PAULI)
+        self.state = state
+
+    def copy(self):
+        out = PauliVector.__new__(PauliVector)
+        out.__dict__.update(self.__dict__)
+        out.state = self.state.copy()
+        return out
+
+    def gate(self, ptm, target):
+        """Apply the Pauli transfer matrix
+        Args:
+            ptm (np.ndarray): Pauli transfer matrix of shape (4^k, 4^k), or (batch, 4^k, 4^k)
+            target (int or list): k target qubits, the first one being the most significant of the matrix
+        """
+        self.state = apply_operator(self.state, ptm, target, 4)
+
+    def get_probability(self, readout_matrix=None):
+        """Probability of each computational basis outcome
+        Args:
+            readout_matrix (np.ndarray): confusion matrix of the readout of each qubit, ideal if None
+        Returns:
+            np.ndarray: probability of shape ([batch,] 2^n), the qubit 0 being the most significant bit
+        """
+        state = self.state[(slice(None),) + (slice(0, 4, 3),)*self.size]
+        operator = PAULI_TO_POPULATION if readout_matrix is None else readout_matrix @ PAULI_TO_POPULATION
+        for qubit in range(self.size):
+            state = apply_operator(state, operator, qubit, 2)
+        probability = np.clip(state.reshape(state.shape[0], -1), 0, None)
+        return probability if self.batch_size is not None else probability[0]
+
+def test_state_vector():
+    import qupy as qp
+    from qupy.operator import rz
+    from ..util.group.common import haar_random_unitary
+    generator = np.random.default_rng(0)
+    size = 3
+    ref = qp.qubit.Qubits(size)
+    sv = StateVector(size)
+    for _ in range(20):
+        qubit, other = generator.choice(size, 2, replace=False)
+        phase = generator.uniform(-np.pi, np.pi)
+        ref.gate(rz(phase), target=qubit)
+        sv.rz(phase, qubit)
+        ref.gate(RX90_MATRIX, target=qubit)
+        sv.gate(RX90_MATRIX, qubit)
+        ref.gate(RZX45_MATRIX, target=[qubit, other])
+        sv.gate(RZX45_MATRIX, [qubit, other])
+    assert(np.allclose(ref.get_state(), sv.get_state()))
+
+    batch_size = 4
+    batch = StateVector(size, batch_size=batch_size)
+    single_list = [StateVector(size) for _ in range(batch_size)]
+    for _ in range(5):
+        unitary = haar_random_unitary(4, batch_size, generator)
+        phase = generator.uniform(-np.pi, np.pi, batch_size)
+        batch.gate(unitary, [2, 0])
+        batch.rz(phase, 1)
+        for index, single in enumerate(single_list):
+            single.gate(unitary[index], [2, 0])
+            single.rz(phase[index], 1)
+    assert(np.allclose(batch.get_state(), [single.get_state() for single in single_list]))
+    assert(np.allclose(batch.get_probability().sum(axis=1), 1))
+
+def test_pauli_vector():
+    from ..util.group.common import haar_random_unitary
+    generator = np.random.default_rng(0)
+    unitary = haar_random_unitary(4, 3, generator)
+    ptm = unitary_to_ptm(unitary)
+    assert(np.allclose(ptm @ np.swapaxes(ptm, -1, -2), np.eye(16)))
+    assert(np.allclose(rz_to_ptm(0.3), unitary_to_ptm(np.diag([np.exp(-0.15j), np.exp(0.15j)]))))
+
+    sv = StateVector(3, batch_size=3)
+    pv = PauliVector(3, batch_size=3)
+    sv.gate(unitary, [0, 2])
+    pv.gate(ptm, [0, 2])
+    sv.gate(RX90_MATRIX, 1)
+    pv.gate(RX90_PTM, 1)
+    sv.rz(np.arange(3), 1)
+    pv.gate(rz_to_ptm(np.arange(3)), 1)
+    sv.gate(RZX45_MATRIX, [1, 0])
+    pv.gate(RZX45_PTM, [1, 0])
+    assert(np.allclose(sv.get_probability(), pv.get_probability()))
+
+    noise_model = NoiseModel(depolarizing={RX90: 0.1}, amplitude_damping={RX90: 0.2}, readout_error=(0.05, 0.1))
+    pv = PauliVector(1)
+    pv.gate(RX90_PTM, 0)
+    pv.gate(RX90_PTM, 0)
+    pv.gate(noise_model.get_channel(RX90), 0)
+    excited = 0.9*1 + 0.1*0.5
+    excited *= 0.8
+    expected = np.array([[0.95, 0.1], [0.05, 0.9]]) @ np.array([1 - excited, excited])
+    assert(np.allclose(pv.get_probability(noise_model.get_readout_matrix()), expected))
@@ -1 +1 @@
-from .randomized_benchmarking import RandomizedBenchmarking, InterleavedRandomizedBenchmarking, AdjointRandomizedBenchmarking, UnitarityRandomizedBenchmarking, FastUnitarityRandomizedBenchmarking
\ No newline at end of file
+from .randomized_benchmarking import RandomizedBenchmarking, InterleavedRandomizedBenchmarking, AdjointRandomizedBenchmarking, UnitarityRandomizedBenchmarking, FastUnitarityRandomizedBenchmarking, NativeGate
\ No newline at end of file
@@ -3,7 +3,8 @@ import itertools
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.optimize import curve_fit
-from ...objects import Report, Job, JobTable
+from ...objects import Report, Job, JobTable, map_job, fork_circuit
+from ...util.group.common import spawn_seed
 
 def exp_decay(x,a,b,p):
     y = a*p**x + b
@@ -13,7 +14,223 @@ def double_exp_decay(x,p1,p2):
     y = 1/3.*p1**x + 2/3.*p2**x
     return y
 
-class RandomizedBenchmarking:
+def sample_gate_array(group, length, seed_list):
+    """Sample the random gates of the sequences, each from its own random stream
+    Args:
+        group (GroupBase): group to sample
+        length (int): number of random gates in each sequence
+        seed_list (list): np.random.SeedSequence of each sequence, see spawn_seed
+    Returns:
+        np.ndarray: gate matrices of shape (random, length, dim, dim)
+        np.ndarray: element indices of shape (random, length), -1 if the group has no precomputed decomposition
+    """
+    dim = 2**group.num_qubit
+    random = len(seed_list)
+    if group.get_decomposition() is None:
+        rand_gate_array = np.array([group.sample(length, seed=seed) for seed in seed_list]).reshape(random, length, dim, dim)
+        return rand_gate_array, np.full((random, length), -1)
+    rand_index_array = np.array([group.sample_index(length, seed=seed) for seed in seed_list]).reshape(random, length)
+    return group.element[rand_index_array], rand_index_array
+
+def get_recovery_index(group, rand_index_array, interleaved=None):
+    """Compose the random sequences by the group table and find the recovery gates
+    Args:
+        group (GroupBase): group of the random gates
+        rand_index_array (np.ndarray): element indices of shape (random, length)
+        interleaved (dict): interleaved gate, whose "gate" is the matrix
+    Returns:
+        np.ndarray: element indices of the recovery gates, -1 if the sequences cannot be composed by the table
+    """
+    recovery_index_array = np.full(rand_index_array.shape[:-1], -1)
+    if group.get_decomposition() is None:
+        return recovery_index_array
+    interleaved_index = None
+    if interleaved is not None:
+        interleaved_index = int(group.find_index(interleaved["gate"]))
+        if interleaved_index < 0:
+            return recovery_index_array
+    return group.inverse(group.compose(rand_index_array, interleaved_index))
+
+def get_sequence(group, length, seed, interleaved=None, recovery=True):
+    """Sample one random sequence
+    Args:
+        group (GroupBase): group to sample
+        length (int): sequence length, the number of random gates is length-1
+        seed (np.random.SeedSequence): seed of the sequence
+        interleaved (dict): interleaved gate, whose "gate" is the matrix
+        recovery (bool): if True, the recovery gate inverting the sequence is appended
+    Returns:
+        list: gate matrices
+        list: element indices of the gates, -1 for the gates without the precomputed decomposition
+    """
+    if length == 0:
+        return [], []
+    rand_gate_array, rand_index_array = sample_gate_array(group, length-1, [seed])
+    gate_array = list(rand_gate_array[0])
+    index_array = rand_index_array[0].tolist()
+    if not recovery:
+        return gate_array, index_array
+    recovery_index = int(get_recovery_index(group, rand_index_array, interleaved)[0])
+    if recovery_index < 0:
+        gate = np.identity(2**group.num_qubit)
+        for rand in gate_array:
+            gate = rand@gate
+            if interleaved is not None:
+                gate = interleaved["gate"]@gate
+        gate_array.append(gate.T.conj())
+    else:
+        gate_array.append(group.element[recovery_index])
+    return gate_array, index_array + [recovery_index]
+
+def detach(experiment):
+    """Shallow copy of the experiment without the executed jobs, which is sent to the worker processes
+    The circuit is forked once so that the later forks of the jobs do not modify the shared template.
+    """
+    detached = copy.copy(experiment)
+    detached.circuit = fork_circuit(experiment.circuit)
+    detached.job_table = JobTable(name=experiment.name)
+    return detached
+
+class NativeGate:
+    """Native-gate commands of driver.Circuit used by the precomputed decompositions of the group elements
+    The qubit indices of the experiment are mapped to the qubit names and the cross names of the circuit,
+    and the gates are executed by rz(phase, qubit_name), rx90(qubit_name) and cnot(cross_name).
+    Args:
+        qubit_name_list (list): qubit name of each qubit index
+        cross_name_list (list): cross names (name of control qubit, name of target qubit, name of port) used by cnot
+    """
+    def __init__(self, qubit_name_list, cross_name_list):
+        self.qubit_name_list = list(qubit_name_list)
+        self.cross_name_dict = {(cross_name[0], cross_name[1]): cross_name for cross_name in cross_name_list}
+
+    @classmethod
+    def from_circuit(cls, circuit):
+        """Native gates on the qubits and the crosses of the circuit
+        Args:
+            circuit (Circuit): circuit with qubit_name_list and cross_name_list, e.g. driver.Circuit
+        Returns:
+            NativeGate: native gates indexed by the position in circuit.qubit_name_list
+        """
+        return cls(circuit.qubit_name_list, circuit.cross_name_list)
+
+    def rz(self, cir, phase, target):
+        cir.rz(phase, self.qubit_name_list[target])
+
+    def rx90(self, cir, target):
+        cir.rx90(self.qubit_name_list[target])
+
+    def cnot(self, cir, control, target):
+        key = (self.qubit_name_list[control], self.qubit_name_list[target])
+        if key not in self.cross_name_dict:
+            raise ValueError("no cross from {0} to {1}".format(*key))
+        cir.cnot(self.cross_name_dict[key])
+
+def apply_su2_phases(cir, native_gate, phases, target):
+    """Execute the single-qubit gate given by the rz phases of the virtual-Z decomposition
+    """
+    native_gate.rz(cir, phases[2], target)
+    native_gate.rx90(cir, target)
+    native_gate.rz(cir, phases[1], target)
+    native_gate.rx90(cir, target)
+    native_gate.rz(cir, phases[0], target)
+
+def apply_gate(cir, group, gate, index, qubit_index, native_gate=None):
+    """Execute the gate, using the precomputed decomposition of the group element if possible
+    The decomposition is used if index is not -1 and native_gate is given,
+    otherwise the gate is executed by su2(gate, target=) or su4(gate, control=, target=) of the circuit.
+    Args:
+        cir (Circuit): circuit to execute
+        group (GroupBase): group of the gate
+        gate (np.ndarray): matrix of the gate
+        index (int): element index of the gate
+        qubit_index (list): target qubits
+        native_gate (NativeGate): native-gate commands of the circuit, the decomposition is not used if None
+    """
+    num_qubit = int(np.log2(gate.shape[0]))
+    if index < 0 or native_gate is None:
+        if num_qubit == 1:
+            cir.su2(gate, target=qubit_index[0])
+        if num_qubit == 2:
+            cir.su4(gate, control=qubit_index[0], target=qubit_index[1])
+        return
+    phases = group.get_decomposition()[index]
+    if num_qubit == 1:
+        apply_su2_phases(cir, native_gate, phases, qubit_index[0])
+    if num_qubit == 2:
+        for layer, layer_phases in enumerate(phases):
+            apply_su2_phases(cir, native_gate, layer_phases[0], qubit_index[0])
+            apply_su2_phases(cir, native_gate, layer_phases[1], qubit_index[1])
+            if layer != len(phases)-1:
+                native_gate.cnot(cir, qubit_index[0], qubit_index[1])
+
+# number of jobs in each call of take_data by default, which bounds the jobs and the waveforms held at once
+UPLOAD_CHUNK_SIZE = 256
+
+class SequenceBenchmarking:
+    """Base of the benchmarkings by the random sequences of the group elements.
+    The jobs are not generated in __init__, so job_table is empty until execute,
+    which compiles the jobs lazily and streams them into take_data in chunks.
+    The subclasses give compile_job, and generate_task if a random sequence is measured in several jobs.
+    """
+    recovery = True
+
+    def generate_task(self):
+        """Generate the conditions of the random sequences
+        Yields:
+            tuple: length, shot and seed of each random sequence
+        """
+        for (length, random, shot), length_seed in zip(self.sequence_list, spawn_seed(self.seed, len(self.sequence_list))):
+            for seed in spawn_seed(length_seed, random):
+                yield length, shot, seed
+
+    def get_sequence(self, length, seed):
+        """Sample one random sequence, with the recovery gate if the class has recovery
+        Returns:
+            list: gate matrices
+            list: element indices of the gates
+        """
+        return get_sequence(self.group, length, seed, self.interleaved, self.recovery)
+
+    def get_gate_array(self, job):
+        """Gate matrices of the job regenerated from its seed
+        """
+        return self.get_sequence(job.length, job.seed)[0]
+
+    def apply_sequence(self, cir, gate_array, index_array):
+        """Execute the gates of the sequence with the interleaved ansatz between them
+        """
+        for pos, (gate, index) in enumerate(zip(gate_array, index_array)):
+            apply_gate(cir, self.group, gate, index, self.qubit_index, self.native_gate)
+            if self.interleaved is not None:
+                if pos != len(gate_array)-1:
+                    cir.qtrigger(self.qubit_index)
+                    cir.call(self.interleaved["ansatz"])
+                    cir.qtrigger(self.qubit_index)
+
+    def generate_job(self, executor=None):
+        """Generate the jobs lazily in the order of generate_task
+        Args:
+            executor (concurrent.futures.Executor or int): executor compiling the jobs concurrently, or number of the worker processes which receive the experiment once, serial if None
+        Yields:
+            Job: job of each task
+        """
+        return map_job(detach(self).compile_job, self.generate_task(), executor)
+
+    def execute(self, take_data, chunk_size=UPLOAD_CHUNK_SIZE, executor=None, deduplicate=False):
+        """Execute the jobs streamed from generate_job
+        Args:
+            take_data (callable): function which fills the results of the jobs in a job table
+            chunk_size (int): number of jobs in each call of take_data, e.g. one instrument upload, all the jobs at once if None
+            executor (concurrent.futures.Executor or int): executor compiling the jobs concurrently, or number of the worker processes, serial if None
+            deduplicate (bool): if True, the identical sequences in each chunk are executed once with the summed shots
+        """
+        self.job_table.reset()
+        self.job_table.consume(take_data, self.generate_job(executor), chunk_size, deduplicate)
+
+class RandomizedBenchmarking(SequenceBenchmarking):
+    """Randomized benchmarking of the group, optionally interleaved with the target gate.
+    job_table is filled by execute, not by __init__.
+    """
     def __init__(
         self,
         circuit,
@@ -23,6 +240,7 @@ class RandomizedBenchmarking:
         seed = 0,
         interleaved = None,
         initial_inverse = False,
+        native_gate = None,
         ):
 
         self.name               = "RandomizedBenchmarking"
@@ -34,63 +252,42 @@ class RandomizedBenchmarking:
         self.sequence_list      = sequence_list
         self.length_list        = np.array(sequence_list).T[0].tolist()
         self.report             = Report(name="randomized_benchmarking")
-        
-        self.job_table = JobTable(name=self.name)
-        for (length, random, shot) in self.sequence_list:
-            
-            ## generate gate_array ##
-            sequence_array = []
-            if length == 0:
-                for idx in range(random):
-                    gate_array = []
-                    sequence_array.append(gate_array)
-                    
-            else:
-                rand_gate_array = group.sample(random*(length-1), seed=self.seed)
-                rand_gate_array = rand_gate_array.reshape(random, length-1, 2**self.number_of_qubit, 2**self.number_of_qubit)
-                for rand_gates in rand_gate_array:
-                    gate_array = []
-                    gate = np.identity(2**self.number_of_qubit)
-                    for rand in rand_gates:
-                        gate_array.append(rand)
-                        gate = rand@gate
-                        if self.interleaved is not None:
-                            gate = self.interleaved["gate"]@gate
-                    gate_array.append(gate.T.conj())
-                    sequence_array.append(gate_array)
-                    
-            ## apply experiment ##
-            for gate_array in sequence_array:
-                cir = copy.deepcopy(circuit)
-                if initial_inverse:
-                    for idx in self.qubit_index:
-                        cir.X(idx)
-                    cir.qtrigger(self.qubit_index)
-                for pos, gate in enumerate(gate_array):
-                    if int(np.log2(gate.shape[0])) == 1:
-                        cir.su2(gate, target=self.qubit_index[0])
-                    if int(np.log2(gate.shape[0])) == 2:
-                        cir.su4(gate, control=self.qubit_index[0], target=self.qubit_index[1])
-                    if interleaved is not None:
-                        if pos != len(gate_array)-1:
-                            cir.qtrigger(self.qubit_index)
-                            cir.call(self.interleaved["ansatz"])
-                            cir.qtrigger(self.qubit_index)
-                cir.qtrigger(self.qubit_index)
-                cir.measurement_all()
-
-                ## job submition ##
-                condition = {
-                    "length"      : length,
-                    "gate_array"  : gate_array,
-                    "shot"        : shot,
-                    "sequence"    : cir.get_waveform_information(),
-#                     "sequence"    : cir,
-                }
-                self.job_table.submit(Job(condition))
-
-    def execute(self, take_data):
-        take_data(self.job_table)
+        self.circuit            = circuit
+        self.group              = group
+        self.native_gate        = native_gate
+        self.job_table          = JobTable(name=self.name)
+
+    def compile_job(self, task):
+        """Sample and compile one random sequence
+        The circuit is dropped after lowering,
+        and the job keeps the seed and the element indices of its sequence instead of the gate matrices.
+        Args:
+            task (tuple): length, shot and seed of the sequence
+        Returns:
+            Job: job of the sequence
+        """
+        length, shot, seed = task
+        gate_array, index_array = self.get_sequence(length, seed)
+
+        ## apply experiment ##
+        cir = fork_circuit(self.circuit)
+        if self.initial_inverse:
+            for idx in self.qubit_index:
+                cir.X(idx)
+            cir.qtrigger(self.qubit_index)
+        self.apply_sequence(cir, gate_array, index_array)
+        cir.qtrigger(self.qubit_index)
+        cir.measurement_all()
+
+        ## job submition ##
+        condition = {
+            "length"      : length,
+            "index_array" : index_array,
+            "seed"        : seed,
+            "shot"        : shot,
+            "sequence"    : cir.get_waveform_information(),
+        }
+        return Job(condition)
 
     def tmp_analyze(self):
         self.hist_table = {}
@@ -171,14 +368,15 @@ class InterleavedRandomizedBenchmarking:
         sequence_list,
         seed = 0,
         interleaved = None,
+        native_gate = None,
         ):
 
-        self.standard_rb = RandomizedBenchmarking(circuit, qubit_index, group, sequence_list, seed, interleaved=None)
-        self.interleaved_rb = RandomizedBenchmarking(circuit, qubit_index, group, sequence_list, seed, interleaved)
+        self.standard_rb = RandomizedBenchmarking(circuit, qubit_index, group, sequence_list, seed, interleaved=None, native_gate=native_gate)
+        self.interleaved_rb = RandomizedBenchmarking(circuit, qubit_index, group, sequence_list, seed, interleaved, native_gate=native_gate)
 
-    def execute(self, take_data):
-        self.standard_rb.execute(take_data)
-        self.interleaved_rb.execute(take_data)
+    def execute(self, take_data, chunk_size=UPLOAD_CHUNK_SIZE, executor=None, deduplicate=False):
+        self.standard_rb.execute(take_data, chunk_size, executor, deduplicate)
+        self.interleaved_rb.execute(take_data, chunk_size, executor, deduplicate)
 
     def analyze(self):
         self.standard_rb.analyze()
@@ -216,16 +414,17 @@ class AdjointRandomizedBenchmarking:
         sequence_list,
         seed = 0,
         interleaved = None,
+        native_gate = None,
         ):
 
-        self.standard_rb = RandomizedBenchmarking(circuit, qubit_index, group, sequence_list, seed, initial_inverse=False, interleaved=interleaved)
-        self.inversed_rb = RandomizedBenchmarking(circuit, qubit_index, group, sequence_list, seed, initial_inverse=True, interleaved=interleaved)
+        self.standard_rb = RandomizedBenchmarking(circuit, qubit_index, group, sequence_list, seed, initial_inverse=False, interleaved=interleaved, native_gate=native_gate)
+        self.inversed_rb = RandomizedBenchmarking(circuit, qubit_index, group, sequence_list, seed, initial_inverse=True, interleaved=interleaved, native_gate=native_gate)
         self.number_of_qubit = self.standard_rb.number_of_qubit
         self.length_list = self.standard_rb.length_list
 
-    def execute(self, take_data):
-        self.standard_rb.execute(take_data)
-        self.inversed_rb.execute(take_data)
+    def execute(self, take_data, chunk_size=UPLOAD_CHUNK_SIZE, executor=None, deduplicate=False):
+        self.standard_rb.execute(take_data, chunk_size, executor, deduplicate)
+        self.inversed_rb.execute(take_data, chunk_size, executor, deduplicate)
 
     def analyze(self):
         self.standard_rb.analyze()
@@ -277,7 +476,12 @@ class AdjointRandomizedBenchmarking:
         plt.tight_layout()
         plt.show()
         
-class UnitarityRandomizedBenchmarking:
+class UnitarityRandomizedBenchmarking(SequenceBenchmarking):
+    """Unitarity randomized benchmarking measuring each random sequence in every Pauli basis.
+    job_table is filled by execute, not by __init__.
+    """
+    recovery = False
+
     def __init__(
         self,
         circuit,
@@ -286,6 +490,7 @@ class UnitarityRandomizedBenchmarking:
         sequence_list,
         seed = 0,
         interleaved = None,
+        native_gate = None,
         ):
 
         self.name               = "UnitarityRandomizedBenchmarking"
@@ -295,64 +500,54 @@ class UnitarityRandomizedBenchmarking:
         self.interleaved        = interleaved
         self.sequence_list      = sequence_list
         self.length_list        = np.array(sequence_list).T[0].tolist()
-        
-        self.job_table = JobTable(name=self.name)
-        for (length, random, shot) in self.sequence_list:
-            
-            ## generate gate_array ##
-            sequence_array = []
-            if length == 0:
-                for idx in range(random):
-                    gate_array = []
-                    sequence_array.append(gate_array)
-                    
-            else:
-                rand_gate_array = group.sample(random*(length-1), seed=self.seed)
-                rand_gate_array = rand_gate_array.reshape(random, length-1, 2**self.number_of_qubit, 2**self.number_of_qubit)
-                for rand_gates in rand_gate_array:
-                    gate_array = []
-                    gate = np.identity(2**self.number_of_qubit)
-                    for rand in rand_gates:
-                        gate_array.append(rand)
-                        gate = rand@gate
-                        if self.interleaved is not None:
-                            gate = self.interleaved["gate"]@gate
-                    sequence_array.append(gate_array)
-                    
-            ## apply experiment ##
+        self.circuit            = circuit
+        self.group              = group
+        self.native_gate        = native_gate
+        self.job_table          = JobTable(name=self.name)
+
+    def generate_task(self):
+        """Generate the conditions of the random sequences
+        The sequences of each length are resampled from their seeds for each measurement basis.
+        Yields:
+            tuple: length, shot, seed and measurement basis of each job
+        """
+        for (length, random, shot), length_seed in zip(self.sequence_list, spawn_seed(self.seed, len(self.sequence_list))):
+            seed_list = spawn_seed(length_seed, random)
             for meas_pauli_list in itertools.product(["X","Y","Z"], repeat=self.number_of_qubit):
-                for gate_array in sequence_array:
-                    cir = copy.deepcopy(circuit)
-                    for pos, gate in enumerate(gate_array):
-                        if int(np.log2(gate.shape[0])) == 1:
-                            cir.su2(gate, target=self.qubit_index[0])
-                        if int(np.log2(gate.shape[0])) == 2:
-                            cir.su4(gate, control=self.qubit_index[0], target=self.qubit_index[1])
-                        if interleaved is not None:
-                            if pos != len(gate_array) - 1:
-                                cir.qtrigger(self.qubit_index)
-                                cir.call(self.interleaved["ansatz"])
-                                cir.qtrigger(self.qubit_index)
-                    cir.qtrigger(self.qubit_index)
-                    for target, meas_pauli in zip(self.qubit_index, meas_pauli_list):
-                        cir.meas_axis(meas_pauli, target)
-                    cir.qtrigger(self.qubit_index)
-                    for idx in self.qubit_index:
-                        for mux in cir.port_table.nodes[idx].mux:
-                            cir.measurement(mux)
-
-                    ## job submition ##
-                    condition = {
-                        "length"         : length,
-                        "gate_array"     : gate_array,
-                        "observed_pauli" : meas_pauli_list,
-                        "shot"           : shot,
-                        "sequence"       : cir.get_waveform_information(),
-                    }
-                    self.job_table.submit(Job(condition))
-
-    def execute(self, take_data):
-        take_data(self.job_table)
+                for seed in seed_list:
+                    yield length, shot, seed, meas_pauli_list
+
+    def compile_job(self, task):
+        """Sample and compile one random sequence measured in the basis
+        Args:
+            task (tuple): length, shot, seed and measurement basis of the job
+        Returns:
+            Job: job of the sequence
+        """
+        length, shot, seed, meas_pauli_list = task
+        gate_array, index_array = self.get_sequence(length, seed)
+
+        ## apply experiment ##
+        cir = fork_circuit(self.circuit)
+        self.apply_sequence(cir, gate_array, index_array)
+        cir.qtrigger(self.qubit_index)
+        for target, meas_pauli in zip(self.qubit_index, meas_pauli_list):
+            cir.meas_axis(meas_pauli, target)
+        cir.qtrigger(self.qubit_index)
+        for idx in self.qubit_index:
+            for mux in cir.port_table.nodes[idx].mux:
+                cir.measurement(mux)
+
+        ## job submition ##
+        condition = {
+            "length"         : length,
+            "index_array"    : index_array,
+            "seed"           : seed,
+            "observed_pauli" : meas_pauli_list,
+            "shot"           : shot,
+            "sequence"       : cir.get_waveform_information(),
+        }
+        return Job(condition)
 
     def analyze(self):
         
@@ -394,7 +589,12 @@ class UnitarityRandomizedBenchmarking:
         plt.legend()
         plt.show()
         
-class FastUnitarityRandomizedBenchmarking:
+class FastUnitarityRandomizedBenchmarking(SequenceBenchmarking):
+    """Unitarity randomized benchmarking from the variance of the Z-basis parity of the random sequences.
+    job_table is filled by execute, not by __init__.
+    """
+    recovery = False
+
     def __init__(
         self,
         circuit,
@@ -403,6 +603,7 @@ class FastUnitarityRandomizedBenchmarking:
         sequence_list,
         seed = 0,
         interleaved = None,
+        native_gate = None,
         ):
 
         self.name               = "FastUnitarityRandomizedBenchmarking"
@@ -414,52 +615,37 @@ class FastUnitarityRandomizedBenchmarking:
         self.length_list        = np.array(sequence_list).T[0].tolist()
         self.random_index       = np.array(sequence_list).T[1].tolist()[0]
         self.report             = Report(name="unitarity_randomized_benchmarking")
-        
-        self.job_table = JobTable(name=self.name)
-        for (length, random, shot) in self.sequence_list:
-            
-            ## generate gate_array ##
-            sequence_array = []
-            rand_gate_array = group.sample(random*(length-1), seed=self.seed)
-            rand_gate_array = rand_gate_array.reshape(random, length-1, 2**self.number_of_qubit, 2**self.number_of_qubit)
-            for rand_gates in rand_gate_array:
-                gate_array = []
-                gate = np.identity(2**self.number_of_qubit)
-                for rand in rand_gates:
-                    gate_array.append(rand)
-                    gate = rand@gate
-                    if self.interleaved is not None:
-                        gate = self.interleaved["gate"]@gate
-                sequence_array.append(gate_array)
-                    
-            ## apply experiment ##
-            for gate_array in sequence_array:
-                cir = copy.deepcopy(circuit)
-                for pos, gate in enumerate(gate_array):
-                    if int(np.log2(gate.shape[0])) == 1:
-                        cir.su2(gate, target=self.qubit_index[0])
-                    if int(np.log2(gate.shape[0])) == 2:
-                        cir.su4(gate, control=self.qubit_index[0], target=self.qubit_index[1])
-                    if interleaved is not None:
-                        if pos != len(gate_array) - 1:
-                            cir.qtrigger(self.qubit_index)
-                            cir.call(self.interleaved["ansatz"])
-                            cir.qtrigger(self.qubit_index)
-                cir.qtrigger(self.qubit_index)
-                cir.measurement_all()
-
-                ## job submition ##
-                condition = {
-                    "length"         : length,
-                    "gate_array"     : gate_array,
-                    "shot"           : shot,
-                    "sequence"       : cir.get_waveform_information(),
-                }
-                self.job_table.submit(Job(condition))
-
-    def execute(self, take_data):
-        take_data(self.job_table)
-        
+        self.circuit            = circuit
+        self.group              = group
+        self.native_gate        = native_gate
+        self.job_table          = JobTable(name=self.name)
+
+    def compile_job(self, task):
+        """Sample and compile one random sequence
+        Args:
+            task (tuple): length, shot and seed of the sequence
+        Returns:
+            Job: job of the sequence
+        """
+        length, shot, seed = task
+        gate_array, index_array = self.get_sequence(length, seed)
+
+        ## apply experiment ##
+        cir = fork_circuit(self.circuit)
+        self.apply_sequence(cir, gate_array, index_array)
+        cir.qtrigger(self.qubit_index)
+        cir.measurement_all()
+
+        ## job submition ##
+        condition = {
+            "length"         : length,
+            "index_array"    : index_array,
+            "seed"           : seed,
+            "shot"           : shot,
+            "sequence"       : cir.get_waveform_information(),
+        }
+        return Job(condition)
+
     def tmp_analyze(self):
         self.hist_table = {}
         for length in self.length_list:
@@ -501,4 +687,26 @@ class FastUnitarityRandomizedBenchmarking:
         plt.axhline(0, color="black", linestyle="--")
         plt.ylim(-1,1)
         plt.legend()
-        plt.show()
\ No newline at end of file
+        plt.show()
+def test_native_gate():
+    from ...driver import NumBase, Circuit
+    from ...util.group import CliffordGroup
+    class SimulatedCircuit(Circuit):
+        def qtrigger(self, qubit_index):
+            pass
+        def measurement_all(self):
+            pass
+        def get_waveform_information(self):
+            return self.base.get_probability()
+    circuit = SimulatedCircuit(NumBase(["Q1", "Q2"], [("Q1", "Q2", "cr1")]))
+    native_gate = NativeGate.from_circuit(circuit)
+    experiment = RandomizedBenchmarking(circuit, [0, 1], CliffordGroup(2, cache_directory=None), [[4, 3, 100]], native_gate=native_gate)
+    job_list = list(experiment.generate_job())
+    assert(len(job_list) == 3 and all(np.all(np.array(job.index_array) >= 0) for job in job_list))
+    assert(all(np.isclose(job.sequence[0], 1) for job in job_list))
+    assert(np.isclose(circuit.base.get_probability()[0], 1))
+    try:
+        list(RandomizedBenchmarking(circuit, [1, 0], experiment.group, [[4, 1, 100]], native_gate=native_gate).generate_job())
+        assert(False)
+    except ValueError:
+        pass
@@ -1,12 +1,12 @@
 import itertools
 import numpy as np
 import matplotlib.pyplot as plt
-from .direct_estimation import DirectEstimation
+from .direct_estimation import DirectEstimation, execute_direct_estimation
 from ...objects import Report
-from ...util.pauli_expression import PauliObservable
+from ...util.pauli_expression import PauliObservable, prepare_clique_dict
 from ...util.visualize import show_po
 from ...util.indicator import energy
-from ...util.histogram import expect_pauli
+from ...util.histogram import expect_pauli_batch
 
 def find_intercept(xdata, ydata):
     slope, intercept = np.polyfit(xdata, ydata, 1)
@@ -25,9 +25,7 @@ class DirectEnergyEstimation:
         self.excitation_number = excitation_number
         self.prep_index = ["0"*i + "1" + "0"*(self.number_of_qubit-i-1) for i in range(excitation_number)]
         self.po_target = PauliObservable(observable = hamiltonian_notation)
-        self.po_target.calculate()
-        self.po_target.get_graph()
-        self.po_target.get_clique_dict(strategy=clique_cover_strategy)
+        prepare_clique_dict(self.po_target, strategy=clique_cover_strategy)
         self.clique_cover_strategy = clique_cover_strategy
 
     def set_circuit(self, circuits, qubit_index):
@@ -53,9 +51,8 @@ class DirectEnergyEstimation:
         # for variational_optimization : line 19
         self.de = self.des[1]
 
-    def execute(self, take_data):
-        for de in self.des.values():
-            de.execute(take_data)
+    def execute(self, take_data, deduplicate=False):
+        execute_direct_estimation(list(self.des.values()), take_data, deduplicate)
 
     def analyze(self):
         for de in self.des.values():
@@ -67,10 +64,9 @@ class DirectEnergyEstimation:
             for key, de in self.des.items():
                 po_ansatzs[index][key] = {}
                 for clique_label, clique_nodes in self.po_target.clique_dict.items():
-                    for meas_pauli in clique_nodes:
-                        meas_histogram = de.data_table[("I"*self.number_of_qubit, clique_label)][index]
-                        expected_value = expect_pauli(meas_pauli, meas_histogram)
-                        po_ansatzs[index][key][meas_pauli] = expected_value
+                    meas_histogram = de.data_table[("I"*self.number_of_qubit, clique_label)][index]
+                    expected_values = expect_pauli_batch(clique_nodes, meas_histogram)
+                    po_ansatzs[index][key].update(zip(clique_nodes, expected_values.tolist()))
                         
         for index in self.prep_index:
             po_ansatzs[index][0] = {}
@@ -1,5 +1,5 @@
 import copy
-from ...objects import Job, JobTable, Report
+from ...objects import Job, JobTable, Report, fork_circuit
 
 class DirectEstimation:
     def __init__(
@@ -15,7 +15,7 @@ class DirectEstimation:
         self.job_table  = JobTable(name=self.name)
         for condition in spam_condition_list:
             
-            cir = copy.deepcopy(circuit)
+            cir = fork_circuit(circuit)
             for i, (pauli, index) in enumerate(zip(condition["prep_pauli"], condition["prep_index"])):
                 cir.prep_init(pauli, index, qubit_index[i])
 #             cir.call(ansatz)
@@ -28,8 +28,13 @@ class DirectEstimation:
             condition["sequence"] = cir.get_waveform_information()
             self.job_table.submit(Job(condition))
 
-    def execute(self, take_data):
-        take_data(self.job_table)
+    def execute(self, take_data, deduplicate=False):
+        """Execute the jobs
+        Args:
+            take_data (callable): function which fills the results of the jobs in a job table
+            deduplicate (bool): if True, the identical sequences are executed once with the summed shots
+        """
+        self.job_table.execute(take_data, deduplicate)
 
     def make_data_table(self):
         self.data_table = {}
@@ -67,9 +72,9 @@ class MitigatedDirectEstimation(DirectEstimation):
                 job_table.submit(Job(spam_condition))
             self.job_tables[key] = job_table
 
-    def execute(self, take_data):
+    def execute(self, take_data, deduplicate=False):
         for job_table in self.job_tables.values():
-            take_data(job_table)
+            job_table.execute(take_data, deduplicate)
 
     def make_data_table(self):
         self.data_tables = {}
@@ -87,3 +92,55 @@ class MitigatedDirectEstimation(DirectEstimation):
         for data_table in self.data_tables.values():
             data_table = {}
         self.report = None
+
+def execute_direct_estimation(de_list, take_data, deduplicate=False):
+    """Execute the jobs of the direct estimations, e.g. one for each noise scaling
+    Args:
+        de_list (list): list of DirectEstimation
+        take_data (callable): function which fills the results of the jobs in a job table
+        deduplicate (bool): if True, the jobs of all the estimations are executed together,
+            and the identical sequences among them are executed once with the summed shots
+    """
+    if not deduplicate:
+        for de in de_list:
+            de.execute(take_data)
+        return
+    job_table = JobTable(name="DirectEstimation")
+    for de in de_list:
+        job_table.table.extend(de.job_table.table)
+    job_table.execute(take_data, deduplicate)
+
+def test_execute_direct_estimation():
+    class RecordingCircuit:
+        def __init__(self):
+            self.token_list = []
+        def fork(self):
+            out = RecordingCircuit()
+            out.token_list = list(self.token_list)
+            return out
+        def prep_init(self, pauli, index, target):
+            self.token_list.append(("prep", pauli, index, target))
+        def meas_axis(self, pauli, target):
+            self.token_list.append(("meas", pauli, target))
+        def qtrigger(self, qubit_index):
+            pass
+        def measurement_all(self):
+            pass
+        def get_waveform_information(self):
+            return {"Q1": " ".join(str(token) for token in self.token_list)}
+    def get_spam_condition_list():
+        return [{"prep_pauli": prep, "prep_index": "0", "meas_pauli": "Z", "shot": 100} for prep in ["X", "Y", "Z"]]
+    def take_data(job_table):
+        shot_list.append([job.shot for job in job_table.table])
+        for job in job_table.table:
+            job.result = {"0": 1., "1": 0.}
+            job.end_flag = True
+
+    de_list = [DirectEstimation(lambda cir: None, RecordingCircuit(), [0], get_spam_condition_list()) for _ in range(2)]
+    shot_list = []
+    execute_direct_estimation(de_list, take_data, deduplicate=True)
+    assert(shot_list == [[200, 200, 200]])
+    assert(all(job.end_flag and job.result["0"] == 1. for de in de_list for job in de.job_table.table))
+    shot_list = []
+    execute_direct_estimation(de_list, take_data)
+    assert(shot_list == [[100, 100, 100], [100, 100, 100]])
@@ -1,11 +1,11 @@
 import itertools
 import numpy as np
-from .direct_estimation import DirectEstimation
+from .direct_estimation import DirectEstimation, execute_direct_estimation
 from ...objects import Report
-from ...util.pauli_expression import PauliTransferMatrix, StabilizerPauliTransferMatrix
+from ...util.pauli_expression import PauliTransferMatrix, StabilizerPauliTransferMatrix, prepare_clique_dict
 from ...util.visualize import show_ptm
 from ...util.indicator import average_gate_fidelity
-from ...util.histogram import expect_pauli
+from ...util.histogram import expect_pauli_transfer_batch
 
 def find_intercept(xdata, ydata):
     slope, intercept = np.polyfit(xdata, ydata, 1)
@@ -28,9 +28,7 @@ class DirectFidelityEstimation:
             stabilizer_prep = stabilizer_prep,
             stabilizer_meas = stabilizer_meas
             )
-        self.ptm_target.calculate()
-        self.ptm_target.get_graph()
-        self.ptm_target.get_clique_dict(strategy=clique_cover_strategy)
+        prepare_clique_dict(self.ptm_target, strategy=clique_cover_strategy)
 
     def set_circuit(self, circuits, qubit_index):
         self.circuit = circuits["1"]
@@ -50,21 +48,17 @@ class DirectFidelityEstimation:
         self.de = DirectEstimation(ansatz, self.circuit, self.qubit_index, spam_condition_list)
         self.job_table = self.de.job_table
 
-    def execute(self, take_data):
-        self.de.execute(take_data)
+    def execute(self, take_data, deduplicate=False):
+        self.de.execute(take_data, deduplicate)
 
     def analyze(self):
         self.de.make_data_table()
 
         ptm_ansatz = {}
         for clique_label, clique_nodes in self.ptm_target.clique_dict.items():
-            for node in clique_nodes:
-                prep_pauli, meas_pauli = node
-                prep_histogram = {}
-                for prep_index, meas_histogram in self.de.data_table[clique_label].items():
-                    expected_value = expect_pauli(meas_pauli, meas_histogram)
-                    prep_histogram[prep_index] = expected_value
-                expected_value = expect_pauli(prep_pauli, prep_histogram)
+            prep_paulis, meas_paulis = zip(*clique_nodes)
+            expected_values = expect_pauli_transfer_batch(prep_paulis, meas_paulis, self.de.data_table[clique_label])
+            for node, expected_value in zip(clique_nodes, expected_values.tolist()):
                 ptm_ansatz[node] = expected_value/(2**self.number_of_qubit)
 
         self.ptm_ansatz = PauliTransferMatrix(gate=None, ptm_dict=ptm_ansatz)
@@ -74,8 +68,8 @@ class DirectFidelityEstimation:
         self.report = Report(name="direct_fidelity_estimatoin")
         self.report.add_information("score", self.score)
         self.report.add_information("subspace average gate fidelty", self.fidelity)
-        self.report.add_information("target pauli transfer matrix", self.ptm_target.ptm)
-        self.report.add_information("ansatz pauli transfer matrix", self.ptm_ansatz.ptm)
+        self.report.add_information("target pauli transfer matrix", dict(self.ptm_target.ptm))
+        self.report.add_information("ansatz pauli transfer matrix", dict(self.ptm_ansatz.ptm))
         self.report.add_information("qubit index", self.qubit_index)
 
     def visualize(self):
@@ -103,9 +97,7 @@ class DirectFidelityEstimation2:
             stabilizer_prep = stabilizer_prep,
             stabilizer_meas = stabilizer_meas
             )
-        self.ptm_target.calculate()
-        self.ptm_target.get_graph()
-        self.ptm_target.get_clique_dict(strategy=clique_cover_strategy)
+        prepare_clique_dict(self.ptm_target, strategy=clique_cover_strategy)
 
     def set_circuit(self, circuits, qubit_index):
         self.circuits = circuits
@@ -130,9 +122,8 @@ class DirectFidelityEstimation2:
         self.de = self.des[1]
         self.job_table = self.de.job_table
 
-    def execute(self, take_data):
-        for de in self.des.values():
-            de.execute(take_data)
+    def execute(self, take_data, deduplicate=False):
+        execute_direct_estimation(list(self.des.values()), take_data, deduplicate)
 
     def analyze(self):
         for de in self.des.values():
@@ -142,13 +133,9 @@ class DirectFidelityEstimation2:
         for key, de in self.des.items():
             ptm_ansatzs[key] = {}
             for clique_label, clique_nodes in self.ptm_target.clique_dict.items():
-                for node in clique_nodes:
-                    prep_pauli, meas_pauli = node
-                    prep_histogram = {}
-                    for prep_index, meas_histogram in de.data_table[clique_label].items():
-                        expected_value = expect_pauli(meas_pauli, meas_histogram)
-                        prep_histogram[prep_index] = expected_value
-                    expected_value = expect_pauli(prep_pauli, prep_histogram)
+                prep_paulis, meas_paulis = zip(*clique_nodes)
+                expected_values = expect_pauli_transfer_batch(prep_paulis, meas_paulis, de.data_table[clique_label])
+                for node, expected_value in zip(clique_nodes, expected_values.tolist()):
                     ptm_ansatzs[key][node] = expected_value/(2**self.number_of_qubit)
         
         ptm_ansatzs[0] = {}
@@ -176,9 +163,9 @@ class DirectFidelityEstimation2:
         self.report = Report(name="direct_fidelity_estimatoin")
         self.report.add_information("score", self.score)
         self.report.add_information("subspace average gate fidelty", self.fidelity)
-        self.report.add_information("target pauli transfer matrix", self.ptm_target.ptm)
+        self.report.add_information("target pauli transfer matrix", dict(self.ptm_target.ptm))
         for key, ptm_ansatz in self.ptm_ansatzs.items():
-            self.report.add_information(f"ansatz pauli transfer matrix {key}", ptm_ansatz.ptm)
+            self.report.add_information(f"ansatz pauli transfer matrix {key}", dict(ptm_ansatz.ptm))
         self.report.add_information("qubit index", self.qubit_index)
 
     def visualize(self):
@@ -1,3 +1,4 @@
 from .report import Report
-from .table import Job, JobTable
-from .stepper import Stepper
\ No newline at end of file
+from .table import Job, JobTable, iterate_job_table, map_job
+from .stepper import Stepper
+from .circuit import fork_circuit
\ No newline at end of file
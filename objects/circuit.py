@@ -0,0 +1,17 @@
+import copy
+
+def fork_circuit(circuit):
+    """Copy the template circuit for a job
+    The circuit is forked in O(1) if it has the fork method, e.g. driver.circuit.Circuit,
+    and deep-copied otherwise.
+    Note:
+    The experiment circuits driven by qtrigger, measurement_all and get_waveform_information are not defined in this package
+    and have no fork method, so they are still deep-copied for each job.
+    Args:
+        circuit: template circuit
+    Returns:
+        copy of the circuit, whose later gates do not affect the template
+    """
+    if hasattr(circuit, "fork"):
+        return circuit.fork()
+    return copy.deepcopy(circuit)
@@ -1,3 +1,11 @@
+import copy
+import functools
+import pickle
+import hashlib
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
 class Job:
     def __init__(self, conditions):
         self.result     = None
@@ -14,3 +22,198 @@ class JobTable:
 
     def reset(self):
         self.table  = []
+
+    def deduplicate(self):
+        """Merge the jobs with the identical sequences
+        Returns:
+            JobTable: table of the unique jobs, whose shot is the sum of the shots of the merged jobs
+            list: index of the unique job for each job
+        """
+        unique_table = JobTable(name=self.name)
+        unique_index = {}
+        index_list = []
+        for job in self.table:
+            key = get_sequence_key(job.sequence)
+            if key in unique_index:
+                unique_job = unique_table.table[unique_index[key]]
+                if getattr(unique_job, "shot", None) is not None:
+                    unique_job.shot += job.shot
+            else:
+                unique_index[key] = len(unique_table.table)
+                condition = {name: value for name, value in job.__dict__.items() if name not in ["result", "end_flag"]}
+                unique_table.submit(Job(condition))
+            index_list.append(unique_index[key])
+        return unique_table, index_list
+
+    def execute(self, take_data, deduplicate=False):
+        """Execute the jobs
+        Args:
+            take_data (callable): function which fills the results of the jobs in a job table
+            deduplicate (bool): if True, each unique sequence is executed once with the summed shots,
+                and its result is copied to all the jobs with the sequence
+        """
+        if not deduplicate:
+            take_data(self)
+            return
+        unique_table, index_list = self.deduplicate()
+        take_data(unique_table)
+        for job, index in zip(self.table, index_list):
+            unique_job = unique_table.table[index]
+            job.result = copy.copy(unique_job.result)
+            job.end_flag = unique_job.end_flag
+
+    def consume(self, take_data, job_iterator, chunk_size=None, deduplicate=False):
+        """Execute the jobs chunk by chunk and keep them without their sequences
+        Args:
+            take_data (callable): function which fills the results of the jobs in a job table
+            job_iterator (iterable): jobs to execute, e.g. a generator creating them lazily
+            chunk_size (int): number of jobs in each call of take_data, all the jobs at once if None
+            deduplicate (bool): if True, the identical sequences in each chunk are executed once, see execute
+        """
+        for job_table in iterate_job_table(job_iterator, chunk_size, self.name):
+            job_table.execute(take_data, deduplicate)
+            for job in job_table.table:
+                job.sequence = None
+                self.submit(job)
+
+def get_sequence_key(sequence):
+    """Content hash of the compiled sequence
+    Args:
+        sequence: compiled sequence of the job, e.g. the sequencer code keyed by port name
+    Returns:
+        str: sha256 hex digest of the pickled sequence
+    """
+    return hashlib.sha256(pickle.dumps(sequence, protocol=4)).hexdigest()
+
+def iterate_job_table(job_iterator, chunk_size=None, name=None):
+    """Group the jobs into job tables, e.g. one for each instrument upload
+    Args:
+        job_iterator (iterable): jobs to group
+        chunk_size (int): number of jobs in each table, all the jobs in one table if None
+        name (str): name of the tables
+    Yields:
+        JobTable: table of at most chunk_size jobs
+    """
+    job_table = JobTable(name=name)
+    for job in job_iterator:
+        job_table.submit(job)
+        if len(job_table.table) == chunk_size:
+            yield job_table
+            job_table = JobTable(name=name)
+    if job_table.table:
+        yield job_table
+
+# function of the worker process, shipped once by the initializer of the executor created in map_job
+_worker_function = None
+
+def _set_worker_function(function):
+    global _worker_function
+    _worker_function = function
+
+def _apply_worker_chunk(chunk):
+    return [_worker_function(task) for task in chunk]
+
+def _apply_chunk(function, chunk):
+    return [function(task) for task in chunk]
+
+def map_job(function, task_iterator, executor=None, chunk_size=16, window=8):
+    """Apply the function to the tasks lazily and in order, concurrently if the executor is given
+    At most window chunks are in flight, so that the tasks are not consumed far ahead of the results.
+    Note:
+    If executor is the number of the worker processes, a process pool is created for the call,
+    and the function is sent to each worker once by the initializer.
+    If the iteration stops early, the chunks not yet started are cancelled.
+    A given executor receives the function with every chunk, which is cheap for a thread pool,
+    but repeats the pickled function, e.g. the experiment with its group tables, for a process pool.
+    Args:
+        function (callable): function creating the job of a task, picklable for a process pool
+        task_iterator (iterable): tasks to apply
+        executor (concurrent.futures.Executor or int): executor, e.g. ThreadPoolExecutor, or number of the worker processes, serial if None
+        chunk_size (int): number of tasks sent to a worker at once
+        window (int): number of chunks in flight
+    Yields:
+        object: result of each task in the order of the tasks
+    """
+    if executor is None:
+        yield from map(function, task_iterator)
+        return
+    if isinstance(executor, int):
+        pool = ProcessPoolExecutor(executor, initializer=_set_worker_function, initargs=(function,))
+        try:
+            yield from _map_chunk(pool, _apply_worker_chunk, task_iterator, chunk_size, window)
+        finally:
+            pool.shutdown(wait=True)
+        return
+    yield from _map_chunk(executor, functools.partial(_apply_chunk, function), task_iterator, chunk_size, window)
+
+def _map_chunk(executor, apply_chunk, task_iterator, chunk_size, window):
+    task_iterator = iter(task_iterator)
+    pending = deque()
+    try:
+        while True:
+            while len(pending) < window:
+                chunk = list(itertools.islice(task_iterator, chunk_size))
+                if not chunk:
+                    break
+                pending.append(executor.submit(apply_chunk, chunk))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+def _get_test_job(task):
+    from ..driver import ExpBase, Circuit
+    seed, length = task
+    cross_name = ("Q1", "Q2", "cr1")
+    circuit = Circuit(ExpBase(["Q1", "Q2"], [cross_name]))
+    for position in range(length):
+        circuit.rz(0.1*seed*(position + 1), "Q1")
+        circuit.rx90("Q2")
+        circuit.cnot(cross_name)
+    return Job({"seed": seed, "sequence": circuit.base.sequence})
+
+def test_map_job():
+    from concurrent.futures import ThreadPoolExecutor
+    task_list = [(seed, seed%5 + 1) for seed in range(40)]
+    serial = [job.sequence for job in map_job(_get_test_job, task_list)]
+    assert(len(set(str(sequence) for sequence in serial)) == len(task_list))
+    with ThreadPoolExecutor(4) as executor:
+        assert([job.sequence for job in map_job(_get_test_job, task_list, executor, chunk_size=3, window=2)] == serial)
+    with ProcessPoolExecutor(2) as executor:
+        assert([job.sequence for job in map_job(_get_test_job, task_list, executor, chunk_size=3, window=2)] == serial)
+    assert([job.sequence for job in map_job(_get_test_job, iter(task_list), 2, chunk_size=3, window=2)] == serial)
+    job_iterator = map_job(_get_test_job, task_list, 2, chunk_size=1, window=4)
+    assert(next(job_iterator).seed == 0)
+    job_iterator.close()
+
+def test_deduplicate():
+    call_list = []
+    def take_data(job_table):
+        call_list.append([job.shot for job in job_table.table])
+        for job in job_table.table:
+            job.result = {"sequence": job.sequence, "shot": job.shot}
+            job.end_flag = True
+    sequence_list = [{"Q1": "A"}, {"Q1": "B"}, {"Q1": "A"}, {"Q1": "C"}, {"Q1": "A"}, {"Q1": "B"}]
+    job_table = JobTable()
+    for index, sequence in enumerate(sequence_list):
+        job_table.submit(Job({"sequence": dict(sequence), "shot": 100*(index + 1), "index": index}))
+    unique_table, index_list = job_table.deduplicate()
+    assert(index_list == [0, 1, 0, 2, 0, 1])
+    assert([job.shot for job in unique_table.table] == [900, 800, 400] and job_table.table[0].shot == 100)
+
+    job_table.execute(take_data, deduplicate=True)
+    assert(call_list == [[900, 800, 400]])
+    for job, sequence in zip(job_table.table, sequence_list):
+        assert(job.end_flag and job.result["sequence"] == sequence)
+    assert(job_table.table[0].result == job_table.table[2].result and job_table.table[0].result is not job_table.table[2].result)
+
+    call_list.clear()
+    job_table.execute(take_data)
+    assert(call_list == [[100, 200, 300, 400, 500, 600]])
+
+    call_list.clear()
+    consumed = JobTable()
+    consumed.consume(take_data, iter(job_table.table), chunk_size=4, deduplicate=True)
+    assert(call_list == [[400, 200, 400], [500, 600]] and all(job.sequence is None for job in consumed.table))
@@ -1,4 +1,5 @@
 
 from .clifford_group import CliffordGroup
 from .icosahedral_group import IcosahedralGroup
-from .unitary_group import UnitaryGroup
\ No newline at end of file
+from .unitary_group import UnitaryGroup
+from .symplectic_clifford_group import SymplecticCliffordGroup
\ No newline at end of file
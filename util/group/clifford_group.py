@@ -1,87 +1,161 @@
 
+import os
 import numpy as np
-import itertools
 from .group_base import GroupBase
-from .common import I,X,Y,Z,H,S,CZ, list_product
+from .common import I,H,S,CZ, batch_product, batch_kron, load_or_compute, decompose_element
+from ..pauli_expression.clifford_tableau import get_tableau, conjugate_pauli
 
 """Reference
 Unique decomposition https://arxiv.org/abs/1310.6813
 """
 
+def generate_element(num_qubit : int) -> np.ndarray:
+    """generate the Clifford group elements with the unique decomposition by batched products
+
+    Arguments:
+        num_qubit {int} -- number of qubits
+
+    Returns:
+        np.ndarray -- elements of shape (order, 2**num_qubit, 2**num_qubit)
+    """
+    IH = np.kron(I,H)
+    HI = np.kron(H,I)
+    HH = np.kron(H,H)
+    SI = np.kron(S,I)
+    IS = np.kron(I,S)
+
+    A1 = I
+    A2 = H
+    A3 = H@S@H
+    B1 = IH@CZ@HH@CZ@HH@CZ
+    B2 = CZ@HH@CZ
+    B3 = HI@SI@CZ@HH@CZ
+    B4 = HI@CZ@HH@CZ
+    C1 = I
+    C2 = H@S@S@H
+    D1 = CZ@HH@CZ@HH@CZ@IH
+    D2 = HI@CZ@HH@CZ@IH
+    D3 = HH@IS@CZ@HH@CZ@IH
+    D4 = HH@CZ@HH@CZ@IH
+    E1 = I
+    E2 = S
+    E3 = S@S
+    E4 = S@S@S
+    A = np.array([A1,A2,A3])
+    B = np.array([B1,B2,B3,B4])
+    C = np.array([C1,C2])
+    D = np.array([D1,D2,D3,D4])
+    E = np.array([E1,E2,E3,E4])
+
+    L = []
+    M = []
+    for ind_qubit in range(num_qubit):
+        shiftI = np.eye(2**ind_qubit)
+        if ind_qubit == 0:
+            Lc = C
+            Mc = E
+            Al = batch_kron(shiftI, A)
+            L.append(batch_product(Al,Lc))
+        else:
+            Llast = batch_kron(L[-1], I)
+            Al = batch_kron(shiftI, A)
+            L.append(np.concatenate([Llast, batch_product(Al,Lc)]))
+        M.append(Mc)
+        if ind_qubit+1 < num_qubit:
+            LcL = batch_kron(shiftI, B)
+            LcR = batch_kron(Lc, I)
+            McL = batch_kron(D, shiftI)
+            McR = batch_kron(I, Mc)
+            Lc = batch_product(LcL,LcR)
+            Mc = batch_product(McL,McR)
+
+    N = [batch_product(L[ind_qubit],M[ind_qubit]) for ind_qubit in range(num_qubit)]
+
+    Nc = N[0]
+    for ind_qubit in range(1,num_qubit):
+        Nc = batch_product(N[ind_qubit], batch_kron(Nc, I))
+    return Nc
+
+CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".cache", "qex")
+# bump when the element order of generate_element or the format of decompose_element changes, so that the stale files are not loaded
+CACHE_VERSION = 1
+
 class CliffordGroup(GroupBase):
-    def __init__(self, num_qubit : int) -> None:
+    def __init__(self, num_qubit : int, cache_directory : str = CACHE_DIRECTORY) -> None:
         """Constructor of CliffordGroup class
+
+        The elements and their decompositions are saved as .npy files in cache_directory
+        and loaded memory-mapped by the later instances.
         
         Arguments:
             num_qubit {int} -- number of qubits
+            cache_directory {str} -- directory of the cache files, not cached if None
 
         """
         self.num_qubit = num_qubit
         self.name = "Clifford"
+        self.cache_directory = cache_directory
+        self.element = load_or_compute(self._get_cache_path("element"), lambda: generate_element(num_qubit))
 
-        IH = np.kron(I,H)
-        HI = np.kron(H,I)
-        HH = np.kron(H,H)
-        SI = np.kron(S,I)
-        IS = np.kron(I,S)
-
-        A1 = I
-        A2 = H
-        A3 = H@S@H
-        B1 = IH@CZ@HH@CZ@HH@CZ
-        B2 = CZ@HH@CZ
-        B3 = HI@SI@CZ@HH@CZ
-        B4 = HI@CZ@HH@CZ
-        C1 = I
-        C2 = H@S@S@H
-        D1 = CZ@HH@CZ@HH@CZ@IH
-        D2 = HI@CZ@HH@CZ@IH
-        D3 = HH@IS@CZ@HH@CZ@IH
-        D4 = HH@CZ@HH@CZ@IH
-        E1 = I
-        E2 = S
-        E3 = S@S
-        E4 = S@S@S
-        A = [A1,A2,A3]
-        B = [B1,B2,B3,B4]
-        C = [C1,C2]
-        D = [D1,D2,D3,D4]
-        E = [E1,E2,E3,E4]
-
-        L = []
-        M = []
-        for ind_qubit in range(num_qubit):
-            if ind_qubit == 0:
-                Lc = C
-                Mc = E
-                Llast = []
-            else:
-                Llast = [np.kron(item,I) for item in L[-1]]
-            shiftI = np.eye(2**ind_qubit)
-            Al = [np.kron(shiftI,item) for item in A]
-            L.append( Llast + list_product(Al,Lc) )
-            M.append(Mc)
-            if ind_qubit+1 < num_qubit:
-                shiftI = np.eye(2**ind_qubit)
-                LcL = [np.kron(shiftI,item) for item in B]
-                LcR = [np.kron(item,I) for item in Lc]
-                McL = [np.kron(item,shiftI) for item in D]
-                McR = [np.kron(I,item) for item in Mc]
-                Lc = list_product(LcL,LcR)
-                Mc = list_product(McL,McR)
-
-        N = []
-        for ind_qubit in range(num_qubit):
-            N.append(list_product(L[ind_qubit],M[ind_qubit]))
-        
-        Nc = N[0]
-        for ind_qubit in range(1,num_qubit):
-            temp = []
-            for item1 in N[ind_qubit]:
-                for item2 in Nc:
-                    temp.append(item1@np.kron(item2,I))
-            Nc = temp
-        self.element = np.array(Nc)
+    def _get_cache_path(self, item : str) -> str:
+        if self.cache_directory is None:
+            return None
+        return os.path.join(self.cache_directory, "clifford{}_{}_v{}.npy".format(self.num_qubit, item, CACHE_VERSION))
+
+    def get_decomposition(self) -> np.ndarray:
+        """rz phases of the native gates for every element, computed once and saved in the cache directory
+
+        Returns:
+            np.ndarray -- rz phases indexed by the element index, see decompose_element
+        """
+        function = lambda: load_or_compute(self._get_cache_path("decomposition"), lambda: decompose_element(self.element))
+        return self._get_cached("decomposition", function)
+
+    def get_tableau(self) -> tuple:
+        """tableaux of the elements, computed once per group
+
+        Returns:
+            tuple -- x masks, z masks and phase exponents of shape (len(element), 2*num_qubit)
+        """
+        return self._get_cached("tableau", lambda: get_tableau(self.element))
+
+    def _get_key(self, tableau : tuple) -> np.ndarray:
+        """pack the tableaux into integer keys, which identify the elements up to the global phase
+        """
+        if self.num_qubit > 3:
+            raise ValueError("tableau key is only for num_qubit <= 3")
+        x, z, e = tableau
+        width = 2*self.num_qubit + 2
+        key = np.zeros(x.shape[:-1], dtype=np.uint64)
+        for row in range(2*self.num_qubit):
+            value = (x[...,row] << np.uint64(self.num_qubit + 2)) | (z[...,row] << np.uint64(2)) | e[...,row].astype(np.uint64)
+            key |= value << np.uint64(row*width)
+        return key
+
+    def _key_to_index(self, key : np.ndarray) -> np.ndarray:
+        def function():
+            element_key = self._get_key(self.get_tableau())
+            order = np.argsort(element_key)
+            return element_key[order], order
+        sorted_key, order = self._get_cached("key", function)
+        position = np.minimum(np.searchsorted(sorted_key, key), len(sorted_key)-1)
+        return np.where(sorted_key[position] == key, order[position], -1)
+
+    def multiply(self, index1, index2) -> np.ndarray:
+        """element indices of the products element[index1]@element[index2] by the tableau composition
+
+        Arguments:
+            index1 {np.ndarray} -- element indices of the left
+            index2 {np.ndarray} -- element indices of the right
+
+        Returns:
+            np.ndarray -- element indices of the products
+        """
+        tx, tz, te = self.get_tableau()
+        index1, index2 = np.broadcast_arrays(index1, index2)
+        left = (tx[index1][...,None,:], tz[index1][...,None,:], te[index1][...,None,:])
+        tableau = conjugate_pauli(left, tx[index2], tz[index2], te[index2])
+        return self._key_to_index(self._get_key(tableau))
     
 def test_clifford():
     """test function for Clifford class    
@@ -93,15 +167,15 @@ def test_clifford():
         return a
 
     num_qubit = 1
-    cg = CliffordGroup(num_qubit)
+    cg = CliffordGroup(num_qubit, cache_directory=None)
     cg.sample(10)
     cg._check_is_group()
     assert(order(num_qubit)==len(cg.element))
 
     num_qubit = 2
-    cg = CliffordGroup(num_qubit)
+    cg = CliffordGroup(num_qubit, cache_directory=None)
     cg.sample(10)
-    #cg._check_is_group() # too heavy
+    cg._check_is_group()
     assert(order(num_qubit)==len(cg.element))
 
 if __name__ == "__main__":
@@ -1,3 +1,4 @@
+import os
 import numpy as np
 
 
@@ -21,9 +22,116 @@ CZ[3,3] = -1
 def pauli_exp(pauli : np.ndarray,angle : float) -> np.ndarray:
     return np.cos(angle/2)*np.eye(2) + 1.j*np.sin(angle/2)*pauli
 
+def batch_product(array1 : np.ndarray, array2 : np.ndarray) -> np.ndarray:
+    """products of all the pairs in the same order as list_product
+
+    Arguments:
+        array1 {np.ndarray} -- matrices of shape (n1, dim, dim)
+        array2 {np.ndarray} -- matrices of shape (n2, dim, dim)
+
+    Returns:
+        np.ndarray -- matrices of shape (n1*n2, dim, dim)
+    """
+    array1 = np.asarray(array1)
+    array2 = np.asarray(array2)
+    return np.matmul(array1[:,None], array2[None,:]).reshape((-1,) + array1.shape[1:])
+
+def batch_kron(array1 : np.ndarray, array2 : np.ndarray) -> np.ndarray:
+    """Kronecker products broadcasted over the leading axes
+
+    Arguments:
+        array1 {np.ndarray} -- matrices of shape (..., m, m)
+        array2 {np.ndarray} -- matrices of shape (..., n, n)
+
+    Returns:
+        np.ndarray -- matrices of shape (..., m*n, m*n)
+    """
+    array1 = np.asarray(array1)
+    array2 = np.asarray(array2)
+    out = np.einsum("...ij,...kl->...ikjl", array1, array2)
+    return out.reshape(out.shape[:-4] + (array1.shape[-2]*array2.shape[-2], array1.shape[-1]*array2.shape[-1]))
+
+def load_or_compute(path : str, function) -> np.ndarray:
+    """load the array memory-mapped from the .npy file, or compute and save it
+
+    Arguments:
+        path {str} -- path of the .npy file, not cached if None
+        function {callable} -- function computing the array
+
+    Returns:
+        np.ndarray -- loaded or computed array
+    """
+    if path is None:
+        return function()
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+    array = function()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = "{}.{}.tmp.npy".format(path[:-len(".npy")], os.getpid())
+        np.save(temp_path, array)
+        os.replace(temp_path, path)
+    except OSError:
+        pass
+    return array
+
+def spawn_seed(seed, count : int) -> list:
+    """independent child seeds, e.g. one for each random sequence
+
+    The children of the same seed are reproducible and their streams do not overlap,
+    so that they can be sampled in any order, thread or process.
+
+    Arguments:
+        seed {int or np.random.SeedSequence} -- parent seed
+        count {int} -- number of children
+
+    Returns:
+        list -- list of np.random.SeedSequence
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return seed.spawn(count)
+
+def haar_random_unitary(dim : int, count : int, generator : np.random.Generator) -> np.ndarray:
+    """sample Haar random unitary matrices by the batched QR decomposition of complex Gaussian matrices
+
+    Arguments:
+        dim {int} -- dimension of the matrices
+        count {int} -- number of samples
+        generator {np.random.Generator} -- random generator
+
+    Returns:
+        np.ndarray -- unitary matrices of shape (count, dim, dim)
+    """
+    gaussian = generator.standard_normal((count, dim, dim)) + 1.j*generator.standard_normal((count, dim, dim))
+    q, r = np.linalg.qr(gaussian)
+    diagonal = np.diagonal(r, axis1=-2, axis2=-1)
+    return q*(diagonal/np.abs(diagonal))[:,None,:]
+
 def list_product(list1 : list,list2 : list) -> list:
     list3 = []
     for item1 in list1:
         for item2 in list2:
             list3.append(item1@item2)
     return list3
+
+
+def decompose_element(element : np.ndarray) -> np.ndarray:
+    """Decompose the elements into the rz phases of the native gates
+
+    Single-qubit elements are decomposed into rz-rx90-rz-rx90-rz,
+    and two-qubit elements into four layers of single-qubit gates interleaved with cnot by Cartan's KAK decomposition.
+
+    Arguments:
+        element {np.ndarray} -- matrices of the elements
+
+    Returns:
+        np.ndarray -- rz phases of shape (len(element), 3) for single-qubit, (len(element), 4, 2, 3) for two-qubit
+    """
+    from ...driver.decompose import matrix_to_su2, matrix_to_su4
+    num_qubit = int(np.log2(element.shape[-1]))
+    if num_qubit == 1:
+        return np.array([matrix_to_su2(u) for u in element])
+    if num_qubit == 2:
+        return np.array([[[matrix_to_su2(u) for u in layer] for layer in matrix_to_su4(gate)] for gate in element])
+    raise ValueError("decomposition is only for single-qubit and two-qubit elements")
@@ -1,39 +1,240 @@
 
 import numpy as np
+from .common import decompose_element
+
+ROUND_ERROR = 1e-8
+HASH_GRID = 2**12
+
+def get_probe(dim : int) -> np.ndarray:
+    """fixed random unit vector to which the matrices are applied in the canonical form
+    """
+    probe = np.random.RandomState(0).normal(size=(2, dim))
+    probe = probe[0] + 1.j*probe[1]
+    return probe/np.linalg.norm(probe)
+
+def get_canonical_form(image : np.ndarray) -> np.ndarray:
+    """canonical form of the unitary matrices, which is invariant under the global phase
+
+    Arguments:
+        image {np.ndarray} -- matrices applied to the probe vector, of shape (..., dim)
+
+    Returns:
+        np.ndarray -- image multiplied by the phase which makes its first entry real positive
+    """
+    phase = image[...,:1]
+    canonical = image*(phase.conj()/np.abs(phase))
+    canonical[...,0] = np.abs(phase[...,0])
+    return canonical
+
+def get_canonical_hash(canonical : np.ndarray, offset : float = 0.5) -> np.ndarray:
+    """hash the canonical forms rounded on the grid of 1/HASH_GRID shifted by offset cells
+
+    Arguments:
+        canonical {np.ndarray} -- canonical forms of shape (..., dim)
+        offset {float} -- shift of the grid in units of the cell
+
+    Returns:
+        np.ndarray -- uint64 hashes of shape (...)
+    """
+    value = np.ascontiguousarray(canonical).view(np.float64)
+    grid = np.floor(value*HASH_GRID + offset).astype(np.int64).view(np.uint64)
+    weight = np.random.RandomState(0).randint(1, 2**62, size=grid.shape[-1], dtype=np.int64).view(np.uint64) | np.uint64(1)
+    return grid@weight
 
 class GroupBase():
+    _cache = {}
+
     def __init__(self):
         self.element = None
         raise NotImplementedError("This is abstract class")
 
-    def _check_is_group(self) -> None:
+    def _check_is_group(self, chunk_size : int = 256) -> None:
         """test function to check the element list consists a group
+
+        The products of all the pairs are looked up by their canonical forms in chunks of rows.
+        This costs O(|G|^2) and works for any num_qubit.
+
+        Arguments:
+            chunk_size {int} -- number of left elements multiplied at once
         """
+        image = self.element@get_probe(self.element.shape[-1])
+        assert((self._lookup(get_canonical_form(image)) == np.arange(len(self.element))).all())
+        assert(self.get_identity_index() >= 0)
+        assert((self.get_inverse_table() >= 0).all())
 
         cnt=0
-        for ind1 in range(len(self.element)):
-            e1 = self.element[ind1]
-            for ind2 in range(len(self.element)):
-                e2 = self.element[ind2]
-                e = e1@e2
-                flag=False
-                for e3 in self.element:
-                    ee = e@e3.T.conjugate()
-                    if( np.abs(ee[0,0]-ee[1,1]) < 1e-10 and np.abs(ee[0,1])<1e-10 and np.abs(ee[1,0])<1e-10 ):
-                        flag = True
-                if(not flag):
-                    print("* error at : ", ind1,ind2)
-                    cnt+=1
+        for start in range(0, len(self.element), chunk_size):
+            product = np.matmul(image, self.element[start:start+chunk_size].transpose(0,2,1))
+            error = np.argwhere(self._lookup(get_canonical_form(product)) < 0)
+            for ind1, ind2 in error:
+                print("* error at : ", start+ind1, ind2)
+            cnt += len(error)
         assert(cnt==0)
 
+    def _get_cached(self, item : str, function):
+        """Compute the item once per group and share it among the instances
+        """
+        key = (self.name, self.num_qubit, item)
+        if key not in GroupBase._cache:
+            GroupBase._cache[key] = function()
+        return GroupBase._cache[key]
+
+    def get_decomposition(self) -> np.ndarray:
+        """rz phases of the native gates for every element, computed once per group
+
+        Returns:
+            np.ndarray -- rz phases indexed by the element index, see decompose_element
+        """
+        return self._get_cached("decomposition", lambda: decompose_element(self.element))
+
+    def _get_hash_table(self, offset : float) -> tuple:
+        """open addressing hash table of the canonical forms of the elements, computed once per group and grid
+
+        Returns:
+            tuple -- slots of the element indices, hashes of the elements and the longest probe
+        """
+        def function():
+            image = self.element@get_probe(self.element.shape[-1])
+            element_hash = get_canonical_hash(get_canonical_form(image), offset)
+            size = 1 << int(4*len(self.element)).bit_length()
+            table = np.full(size, -1)
+            max_probe = 1
+            for index, value in enumerate(element_hash.tolist()):
+                slot = value & (size-1)
+                probe = 1
+                while table[slot] >= 0:
+                    slot = (slot+1) & (size-1)
+                    probe += 1
+                table[slot] = index
+                max_probe = max(max_probe, probe)
+            return table, element_hash, max_probe
+        return self._get_cached(("hash", offset), function)
+
+    def _lookup_hash(self, canonical : np.ndarray, offset : float) -> np.ndarray:
+        table, element_hash, max_probe = self._get_hash_table(offset)
+        value = get_canonical_hash(canonical, offset).ravel()
+        index = np.full(value.shape, -1)
+        active = np.arange(len(value))
+        slot = value & np.uint64(len(table)-1)
+        for _ in range(max_probe):
+            candidate = table[slot]
+            match = (candidate >= 0) & (element_hash[candidate] == value[active])
+            index[active[match]] = candidate[match]
+            remain = (candidate >= 0) & ~match
+            active = active[remain]
+            slot = (slot[remain] + np.uint64(1)) & np.uint64(len(table)-1)
+        return index.reshape(canonical.shape[:-1])
+
+    def _lookup(self, canonical : np.ndarray) -> np.ndarray:
+        """element indices of the canonical forms in O(1) per form, -1 if not found
+
+        The forms rounded near the cell boundary of the grid are looked up again on the grid shifted by half a cell.
+        """
+        index = self._lookup_hash(canonical, 0.5)
+        missing = index < 0
+        if missing.any():
+            index[missing] = self._lookup_hash(canonical[missing], 0.)
+        return index
+
+    def find_index(self, matrices : np.ndarray) -> np.ndarray:
+        """find the element indices of the matrices up to the global phase
+
+        Arguments:
+            matrices {np.ndarray} -- matrices of shape (..., dim, dim)
+
+        Returns:
+            np.ndarray -- element indices, -1 for the matrices not in the group
+        """
+        matrices = np.asarray(matrices, dtype=np.complex128)
+        return self._lookup(get_canonical_form(matrices@get_probe(matrices.shape[-1])))
+
+    def get_identity_index(self) -> int:
+        return int(self._get_cached("identity", lambda: self.find_index(np.eye(self.element.shape[-1]))))
+
+    def get_product_table(self, chunk_size : int = 256) -> np.ndarray:
+        """Cayley table of the group, computed once per group
+
+        The products are looked up by their images of the probe vector in chunks of rows,
+        so the memory is O(chunk_size |G| dim) besides the table of O(|G|^2).
+
+        Arguments:
+            chunk_size {int} -- number of left elements multiplied at once
+
+        Returns:
+            np.ndarray -- table[i,j] is the index of element[i]@element[j]
+        """
+        def function():
+            image = self.element@get_probe(self.element.shape[-1])
+            table = np.empty((len(self.element), len(self.element)), dtype=np.int64)
+            for start in range(0, len(self.element), chunk_size):
+                product = np.matmul(image, self.element[start:start+chunk_size].transpose(0,2,1))
+                table[start:start+chunk_size] = self._lookup(get_canonical_form(product))
+            return table
+        return self._get_cached("product", function)
+
+    def get_inverse_table(self) -> np.ndarray:
+        """inverse lookup of the group, computed once per group
+
+        Returns:
+            np.ndarray -- table[i] is the index of the inverse of element[i]
+        """
+        return self._get_cached("inverse", lambda: self.find_index(self.element.conj().transpose(0,2,1)))
+
+    def multiply(self, index1, index2) -> np.ndarray:
+        """element indices of the products element[index1]@element[index2]
+
+        Arguments:
+            index1 {np.ndarray} -- element indices of the left
+            index2 {np.ndarray} -- element indices of the right
+
+        Returns:
+            np.ndarray -- element indices of the products
+        """
+        return self.get_product_table()[index1, index2]
+
+    def inverse(self, index) -> np.ndarray:
+        """element indices of the inverses of element[index]
+        """
+        return self.get_inverse_table()[index]
+
+    def compose(self, index_array, interleaved_index=None) -> np.ndarray:
+        """element indices of the products of the sequences applied in order along the last axis
+
+        Arguments:
+            index_array {np.ndarray} -- element indices of shape (..., length)
+            interleaved_index {int} -- element index applied after every element of the sequences
+
+        Returns:
+            np.ndarray -- element indices of index_array[...,-1] ... index_array[...,0]
+        """
+        index_array = np.asarray(index_array)
+        total = np.full(index_array.shape[:-1], self.get_identity_index())
+        for position in range(index_array.shape[-1]):
+            total = self.multiply(index_array[...,position], total)
+            if interleaved_index is not None:
+                total = self.multiply(np.full_like(total, interleaved_index), total)
+        return total
+
+    def sample_index(self, count, seed=0):
+        """randomly choose <code>count</code> of element indices
+        
+        Arguments:
+            count {int} -- number of samples
+            seed {int, np.random.SeedSequence or np.random.Generator} -- seed of the random generator
+        
+        Returns:
+            np.ndarray -- indices of chosen elements
+        """
+        return np.random.default_rng(seed).integers(self.element.shape[0], size=count)
+
     def sample(self, count, seed=0):
         """randomly choose <code>count</code> of elements
         
         Arguments:
             count {int} -- number of samples
+            seed {int, np.random.SeedSequence or np.random.Generator} -- seed of the random generator
         
         Returns:
             list -- list of chosen elements
         """
-        np.random.seed(seed)
-        return self.element[np.random.choice(self.element.shape[0],size=count,replace=True)]
+        return self.element[self.sample_index(count, seed=seed)]
@@ -88,6 +88,8 @@ def test_icosahedral():
     Icosahedral_order = 60
     ig._check_is_group()
     ig.sample(10)
+    product = np.einsum("aij,bjk->abik", ig.element, ig.element)
+    assert((ig.get_product_table() == ig.find_index(product)).all())
     assert(len(ig.element) == Icosahedral_order)
 
 if __name__ == "__main__":
@@ -0,0 +1,321 @@
+
+import numpy as np
+from .group_base import GroupBase
+from ..pauli_expression.pauli_label import popcount
+from ..pauli_expression.clifford_tableau import compose_tableau, inverse_tableau, tableau_to_matrix
+
+"""Reference
+How to efficiently select an arbitrary Clifford group element https://arxiv.org/abs/1406.2170
+
+A Clifford gate up to the global phase is identified by the pair of integers (symplectic index, sign index).
+The symplectic index in [0, |Sp(2n)|) is mapped to the symplectic matrix by the Koenig-Smolin bijection,
+and the bit r of the sign index in [0, 4^n) is the sign of the r-th row of the tableau.
+The symplectic matrix is stored as the integer array of its rows of shape (..., 2n), whose entry 2q and 2q+1 are
+the images of X_q and Z_q as bit vectors, with the bit 2q and 2q+1 as the x-part and z-part of qubit q.
+"""
+
+def get_symplectic_order(num_qubit : int) -> int:
+    """order of the symplectic group Sp(2n, 2)
+    """
+    order = 1
+    for ind in range(1, num_qubit+1):
+        order *= 2**(2*ind-1)*(4**ind-1)
+    return order
+
+EVEN = 0x5555555555555555
+MAX_QUBIT = 5
+PARITY = (popcount(np.arange(1 << 2*MAX_QUBIT)) & np.uint64(1)).astype(np.int64)
+
+def _swap(v : np.ndarray) -> np.ndarray:
+    """swap the x-part and z-part of each qubit
+    """
+    return ((v & EVEN) << 1) | ((v >> 1) & EVEN)
+
+def _inner(v : np.ndarray, w : np.ndarray) -> np.ndarray:
+    """symplectic inner product of the bit vectors, 0 or 1
+    """
+    return PARITY[v & _swap(w)]
+
+def _transvection(k : np.ndarray, v : np.ndarray) -> np.ndarray:
+    """symplectic transvection v -> v + <k,v> k
+    """
+    return v ^ (k*_inner(k, v))
+
+def _lowest_pair(pair : np.ndarray) -> np.ndarray:
+    """bit of the x-part of the first qubit flagged in pair, 0 if none
+    """
+    return pair & -pair
+
+def _find_transvection(x : np.ndarray, y : np.ndarray) -> tuple:
+    """find two transvections which map the nonzero vectors x to y
+
+    Arguments:
+        x {np.ndarray} -- bit vectors
+        y {np.ndarray} -- bit vectors
+
+    Returns:
+        tuple -- vectors of the transvection applied first and second
+    """
+    x, y = np.broadcast_arrays(x, y)
+    equal = x == y
+    direct = (_inner(x, y) == 1) & ~equal
+    rest = ~equal & ~direct
+
+    x_pair = (x | (x >> 1)) & EVEN
+    y_pair = (y | (y >> 1)) & EVEN
+    both = _lowest_pair(x_pair & y_pair)
+    has_both = both != 0
+    z = (x ^ y) & (both | (both << 1))
+    zero = has_both & (z == 0)
+    differ = ((x & both) != 0) != ((x & (both << 1)) != 0)
+    z |= np.where(zero, (both << 1) | np.where(differ, both, 0), 0)
+
+    for vector, only in [(x, x_pair & ~y_pair), (y, ~x_pair & y_pair)]:
+        bit = np.where(has_both, 0, _lowest_pair(only))
+        a = (vector & bit) != 0
+        b = (vector & (bit << 1)) != 0
+        z |= np.where(a == b, bit << 1, np.where(a, bit << 1, 0) | np.where(b, bit, 0))
+
+    first = np.where(direct, x ^ y, np.where(rest, x ^ z, 0))
+    second = np.where(rest, y ^ z, 0)
+    return first, second
+
+def index_to_symplectic(index : np.ndarray, num_qubit : int) -> np.ndarray:
+    """symplectic matrices of the indices by the Koenig-Smolin bijection
+
+    Arguments:
+        index {np.ndarray} -- integers in [0, |Sp(2n)|)
+        num_qubit {int} -- number of qubits
+
+    Returns:
+        np.ndarray -- rows of the symplectic matrices as bit vectors, of shape (..., 2n)
+    """
+    index = np.asarray(index, dtype=np.int64)
+
+    coset = []
+    for ind_qubit in range(num_qubit, 0, -1):
+        size = 4**ind_qubit - 1
+        first_row = index % size + 1
+        index = index // size
+        coset.append((first_row, index % 2**(2*ind_qubit-1)))
+        index = index >> (2*ind_qubit-1)
+
+    g = np.zeros(index.shape + (0,), dtype=np.int64)
+    for first_row, bits in reversed(coset):
+        t0, t1 = _find_transvection(1, first_row)
+        h0 = _transvection(t1, _transvection(t0, 1 | ((bits >> 1) << 2)))
+        f1 = np.where(bits & 1, 0, first_row)
+
+        g = np.concatenate([np.full(index.shape + (1,), 1), np.full(index.shape + (1,), 2), g << 2], axis=-1)
+        for vector in [t0, t1, h0, f1]:
+            g = _transvection(vector[...,None], g)
+    return g
+
+def symplectic_to_index(symplectic : np.ndarray) -> np.ndarray:
+    """indices of the symplectic matrices, inverse of index_to_symplectic
+
+    Arguments:
+        symplectic {np.ndarray} -- rows of the symplectic matrices as bit vectors, of shape (..., 2n)
+
+    Returns:
+        np.ndarray -- integers in [0, |Sp(2n)|)
+    """
+    g = np.asarray(symplectic, dtype=np.int64)
+    num_qubit = g.shape[-1]//2
+
+    coset = []
+    for _ in range(num_qubit):
+        t0, t1 = _find_transvection(g[...,0], 1)
+        tw = _transvection(t1, _transvection(t0, g[...,1]))
+        b = tw & 1
+        h0 = (tw & ~3) | 1
+        coset.append((g[...,0] - 1, b | ((tw >> 2) << 1)))
+
+        for vector in [t0, t1, h0, np.where(b, 0, 1)]:
+            g = _transvection(vector[...,None], g)
+        g = g[...,2:] >> 2
+
+    index = np.zeros(g.shape[:-1], dtype=np.int64)
+    for ind_qubit, (first_row, bits) in zip(range(1, num_qubit+1), reversed(coset)):
+        size = 4**ind_qubit - 1
+        index = (index*2**(2*ind_qubit-1) + bits)*size + first_row
+    return index
+
+def symplectic_to_tableau(symplectic : np.ndarray, sign_index : np.ndarray) -> tuple:
+    """tableaux of the Clifford gates given by the symplectic matrices and the sign indices
+
+    Returns:
+        tuple -- x masks, z masks and phase exponents of shape (..., 2n)
+    """
+    num_qubit = symplectic.shape[-1]//2
+    row = np.concatenate([symplectic[...,0::2], symplectic[...,1::2]], axis=-1)
+    x = np.zeros(row.shape, dtype=np.uint64)
+    z = np.zeros(row.shape, dtype=np.uint64)
+    for qubit in range(num_qubit):
+        x |= ((row >> (2*qubit)) & 1).astype(np.uint64) << np.uint64(num_qubit-1-qubit)
+        z |= ((row >> (2*qubit+1)) & 1).astype(np.uint64) << np.uint64(num_qubit-1-qubit)
+    sign = (np.asarray(sign_index, dtype=np.int64)[...,None] >> np.arange(2*num_qubit)) & 1
+    e = (popcount(x & z).astype(np.int64) + 2*sign) % 4
+    return x, z, e
+
+def tableau_to_symplectic(tableau : tuple) -> tuple:
+    """symplectic matrices and sign indices of the tableaux, inverse of symplectic_to_tableau
+    """
+    x, z, e = tableau
+    num_qubit = x.shape[-1]//2
+    row = np.zeros(x.shape, dtype=np.int64)
+    for qubit in range(num_qubit):
+        shift = np.uint64(num_qubit-1-qubit)
+        row |= ((x >> shift) & np.uint64(1)).astype(np.int64) << (2*qubit)
+        row |= ((z >> shift) & np.uint64(1)).astype(np.int64) << (2*qubit+1)
+    symplectic = np.stack([row[...,:num_qubit], row[...,num_qubit:]], axis=-1).reshape(row.shape)
+    sign = ((e - popcount(x & z).astype(np.int64)) % 4 == 2).astype(np.int64)
+    return symplectic, (sign << np.arange(2*num_qubit)).sum(axis=-1)
+
+class SymplecticCliffordGroup(GroupBase):
+    def __init__(self, num_qubit : int) -> None:
+        """Constructor of SymplecticCliffordGroup class
+
+        The elements are not enumerated. They are sampled uniformly as the IDs, i.e. integer arrays of
+        (symplectic index, sign index) along the last axis, and converted into the tableaux or the matrices on demand.
+        The IDs fit in int64 up to 5 qubits.
+
+        Arguments:
+            num_qubit {int} -- number of qubits
+
+        """
+        if num_qubit > MAX_QUBIT:
+            raise ValueError("symplectic index exceeds int64 for num_qubit > 5")
+        self.num_qubit = num_qubit
+        self.name = "SymplecticClifford"
+        self.symplectic_order = get_symplectic_order(num_qubit)
+        self.order = self.symplectic_order*4**num_qubit
+
+    def _check_is_group(self) -> None:
+        """test function to check the ID is a bijection and compatible with the tableau algebra
+        """
+        if self.order <= 11520:
+            clifford_id = np.stack(np.divmod(np.arange(self.order), 4**self.num_qubit), axis=-1)
+        else:
+            clifford_id = self.sample_id(10000)
+        assert((self.find_id(self.get_tableau(clifford_id)) == clifford_id).all())
+        assert((self.find_id(self.get_tableau(self.get_identity_id())) == self.get_identity_id()).all())
+        product = self.multiply(clifford_id, self.inverse(clifford_id))
+        assert((product == self.get_identity_id()).all())
+
+    def get_decomposition(self) -> None:
+        """SymplecticCliffordGroup has no finite elements to decompose in advance
+        """
+        return None
+
+    def get_identity_id(self) -> np.ndarray:
+        identity = 1 << np.arange(2*self.num_qubit)
+        return np.array([int(symplectic_to_index(identity)), 0])
+
+    def sample_id(self, count, seed=0) -> np.ndarray:
+        """uniformly sample <code>count</code> of element IDs
+
+        Arguments:
+            count {int} -- number of samples
+            seed {int, np.random.SeedSequence or np.random.Generator} -- seed of the random generator
+
+        Returns:
+            np.ndarray -- IDs of shape (count, 2)
+        """
+        generator = np.random.default_rng(seed)
+        symplectic_index = generator.integers(self.symplectic_order, size=count, dtype=np.int64)
+        sign_index = generator.integers(4**self.num_qubit, size=count, dtype=np.int64)
+        return np.stack([symplectic_index, sign_index], axis=-1)
+
+    def get_tableau(self, clifford_id : np.ndarray) -> tuple:
+        """tableaux of the IDs
+
+        Arguments:
+            clifford_id {np.ndarray} -- IDs of shape (..., 2)
+
+        Returns:
+            tuple -- x masks, z masks and phase exponents of shape (..., 2*num_qubit)
+        """
+        clifford_id = np.asarray(clifford_id, dtype=np.int64)
+        symplectic = index_to_symplectic(clifford_id[...,0], self.num_qubit)
+        return symplectic_to_tableau(symplectic, clifford_id[...,1])
+
+    def find_id(self, tableau : tuple) -> np.ndarray:
+        """IDs of the tableaux
+
+        Arguments:
+            tableau {tuple} -- x masks, z masks and phase exponents of shape (..., 2*num_qubit)
+
+        Returns:
+            np.ndarray -- IDs of shape (..., 2)
+        """
+        symplectic, sign_index = tableau_to_symplectic(tableau)
+        return np.stack([symplectic_to_index(symplectic), sign_index], axis=-1)
+
+    def get_matrix(self, clifford_id : np.ndarray) -> np.ndarray:
+        """unitary matrices of the IDs up to the global phase
+
+        Arguments:
+            clifford_id {np.ndarray} -- IDs of shape (..., 2)
+
+        Returns:
+            np.ndarray -- matrices of shape (..., 2**num_qubit, 2**num_qubit)
+        """
+        return tableau_to_matrix(self.get_tableau(clifford_id))
+
+    def multiply(self, id1, id2) -> np.ndarray:
+        """IDs of the products of the elements id1 and id2, where id2 is applied first
+        """
+        return self.find_id(compose_tableau(self.get_tableau(id1), self.get_tableau(id2)))
+
+    def inverse(self, clifford_id) -> np.ndarray:
+        """IDs of the inverses of the elements
+        """
+        return self.find_id(inverse_tableau(self.get_tableau(clifford_id)))
+
+    def compose(self, id_array, interleaved_id=None) -> np.ndarray:
+        """IDs of the products of the sequences applied in order along the second last axis
+
+        Arguments:
+            id_array {np.ndarray} -- IDs of shape (..., length, 2)
+            interleaved_id {np.ndarray} -- ID applied after every element of the sequences
+
+        Returns:
+            np.ndarray -- IDs of the products
+        """
+        tableau = self.get_tableau(id_array)
+        interleaved = None if interleaved_id is None else self.get_tableau(interleaved_id)
+        total = self.get_tableau(np.broadcast_to(self.get_identity_id(), np.shape(id_array)[:-2] + (2,)))
+        for position in range(np.shape(id_array)[-2]):
+            total = compose_tableau(tuple(value[...,position,:] for value in tableau), total)
+            if interleaved is not None:
+                total = compose_tableau(tuple(np.broadcast_to(value, total[0].shape) for value in interleaved), total)
+        return self.find_id(total)
+
+    def sample(self, count, seed=0):
+        """uniformly sample <code>count</code> of elements as matrices
+
+        Arguments:
+            count {int} -- number of samples
+            seed {int, np.random.SeedSequence or np.random.Generator} -- seed of the random generator
+
+        Returns:
+            np.ndarray -- matrices of shape (count, 2**num_qubit, 2**num_qubit)
+        """
+        return self.get_matrix(self.sample_id(count, seed=seed))
+
+def test_symplectic_clifford():
+    """test function for SymplecticCliffordGroup class
+    """
+    for num_qubit in range(1, 6):
+        sg = SymplecticCliffordGroup(num_qubit)
+        sg._check_is_group()
+
+    num_qubit = 2
+    sg = SymplecticCliffordGroup(num_qubit)
+    dim = 2**num_qubit
+    for u in sg.sample(100):
+        assert(np.allclose(u@u.T.conj(), np.eye(dim)))
+
+if __name__ == "__main__":
+    test_symplectic_clifford()
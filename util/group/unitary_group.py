@@ -1,7 +1,7 @@
 
 import numpy as np
 from .group_base import GroupBase
-from scipy.stats import unitary_group
+from .common import haar_random_unitary
 
 class UnitaryGroup(GroupBase):
     def __init__(self, num_qubit : int) -> None:
@@ -19,23 +19,22 @@ class UnitaryGroup(GroupBase):
         """
         pass
 
+    def get_decomposition(self) -> None:
+        """UnitaryGroup has no finite elements to decompose in advance
+        """
+        return None
+
     def sample(self, count, seed=0):
         """randomly choose <code>count</code> of elements
         
         Arguments:
             count {int} -- number of samples
+            seed {int, np.random.SeedSequence or np.random.Generator} -- seed of the random generator
         
         Returns:
             list -- list of chosen elements
         """
-        np.random.seed(seed)
-        dim = 2**self.num_qubit
-
-        element = []
-        for _ in range(count):
-            gate = unitary_group.rvs(dim)
-            element.append(gate)
-        return np.array(element)
+        return haar_random_unitary(2**self.num_qubit, count, np.random.default_rng(seed))
     
 def test_unitary():
     """test function for UnitaryGroup class    
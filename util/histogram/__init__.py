@@ -1 +1,2 @@
-from .integrate import expect_pauli
\ No newline at end of file
+from .integrate import expect_pauli, expect_pauli_batch, expect_pauli_transfer_batch, get_sign_matrix
+from .histogram import Histogram
\ No newline at end of file
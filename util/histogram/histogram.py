@@ -0,0 +1,122 @@
+import functools
+from collections.abc import Mapping
+import numpy as np
+
+"""Array-backed histogram
+The population of the outcome b is stored at the integer index int(b, 2), with the first qubit as the most significant bit.
+Bitstrings are only used at the API edge, so the Histogram can replace the bitstring-keyed dict of the job result.
+"""
+
+def pauli_to_mask(pauli):
+    """Bit mask of the non-identity positions of the Pauli label
+    Args:
+        pauli (str): Pauli label, e.g. "IZZ"
+    Returns:
+        int: bit mask with the first qubit as the most significant bit
+    """
+    mask = 0
+    for string in pauli:
+        mask = (mask << 1) | (string != "I")
+    return mask
+
+@functools.lru_cache(maxsize=1024)
+def get_parity_sign(mask, number_of_qubit):
+    """Eigenvalue of the Pauli Z-string on each computational basis state
+    Args:
+        mask (int): bit mask of the non-identity positions
+        number_of_qubit (int): number of qubits
+    Returns:
+        np.ndarray: +1 or -1 of shape (2^n,), the parity of the outcome bits in the mask
+    """
+    parity = np.arange(2**number_of_qubit) & mask
+    for shift in [32, 16, 8, 4, 2, 1]:
+        parity ^= parity >> shift
+    sign = 1. - 2.*(parity & 1)
+    sign.flags.writeable = False
+    return sign
+
+class Histogram(Mapping):
+    """Histogram of the measured outcomes backed by the array of length 2^n.
+    Note:
+    The histogram is read-only and behaves as the dict keyed by the bitstrings, e.g. histogram["01"].
+    """
+    def __init__(self, value):
+        self.value = np.asarray(value, dtype=np.float64)
+        self.number_of_qubit = int(np.log2(self.value.size))
+        if self.value.size != 2**self.number_of_qubit:
+            raise ValueError("length of the histogram must be a power of two, but {0}".format(self.value.size))
+
+    @classmethod
+    def from_dict(cls, histogram, number_of_qubit=None):
+        """Convert the histogram keyed by the bitstrings, the missing outcomes being zero
+        Args:
+            histogram (dict): population keyed by the bitstrings of the same length
+            number_of_qubit (int): number of qubits, taken from the keys if None
+        Returns:
+            Histogram: converted histogram
+        """
+        if isinstance(histogram, Histogram):
+            return histogram
+        if number_of_qubit is None:
+            if not histogram:
+                raise ValueError("number_of_qubit must be given for the empty histogram")
+            number_of_qubit = len(next(iter(histogram)))
+        value = np.zeros(2**number_of_qubit)
+        for key, population in histogram.items():
+            value[int(key, 2)] = population
+        return cls(value)
+
+    def to_dict(self):
+        """Convert into the histogram keyed by the bitstrings
+        Returns:
+            dict: population keyed by the bitstrings
+        """
+        return dict(zip(self, self.value.tolist()))
+
+    def normalize(self):
+        """Histogram devided by the sum of the elements
+        Returns:
+            Histogram: normalized histogram
+        """
+        return Histogram(self.value/self.value.sum())
+
+    def expect(self, pauli):
+        """Expectation value of the Pauli Z-string, where the non-identity elements are measured in the Z basis
+        Args:
+            pauli (str): Pauli label, e.g. "IZZ"
+        Returns:
+            float: expectation value
+        """
+        return float(get_parity_sign(pauli_to_mask(pauli), self.number_of_qubit) @ self.value)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if len(key) != self.number_of_qubit or key.strip("01"):
+                raise KeyError(key)
+            return self.value[int(key, 2)]
+        if not 0 <= key < self.value.size:
+            raise KeyError(key)
+        return self.value[key]
+
+    def __iter__(self):
+        return (format(outcome, "0{0}b".format(self.number_of_qubit)) for outcome in range(self.value.size))
+
+    def __len__(self):
+        return self.value.size
+
+    def __repr__(self):
+        return "Histogram({0})".format(self.to_dict())
+
+def test_histogram():
+    histogram = {"000": 0.1, "011": 0.2, "101": 0.3, "110": 0.15, "111": 0.25}
+    array_histogram = Histogram.from_dict(histogram)
+    assert(array_histogram.to_dict()["011"] == 0.2 and array_histogram["001"] == 0)
+    for pauli in ["III", "ZII", "IZZ", "XYZ", "ZIZ"]:
+        expected_value = 0
+        for key, value in histogram.items():
+            count = sum(key[index] == "1" for index, string in enumerate(pauli) if string != "I")
+            expected_value += (-1)**count*value
+        assert(np.isclose(array_histogram.expect(pauli), expected_value))
+    assert(np.isclose(Histogram([1, 3]).normalize()["1"], 0.75))
+    assert(Histogram.from_dict({}, 2).expect("ZZ") == 0 and Histogram.from_dict({"1": 1}, 1)["1"] == 1)
+    assert("01" in Histogram([1, 0, 0, 0]) and all(key not in Histogram([1, 0, 0, 0]) for key in ["0a", "+1", "1", 4, -1]))
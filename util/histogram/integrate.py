@@ -1,28 +1,81 @@
-import re
+import functools
+import numpy as np
+from .histogram import Histogram, pauli_to_mask, get_parity_sign
 
 def expect_pauli(pauli, histogram):
-    remove_idx = find_identity(pauli)
-    expected_value = integrate_histogram(remove_idx, histogram)
-    return expected_value
+    """Expectation value of the Pauli Z-string on the histogram
+    Args:
+        pauli (str): Pauli label, the non-identity elements are measured in the Z basis
+        histogram (Histogram or dict): population keyed by the bitstrings, zero if empty
+    Returns:
+        float: expectation value
+    """
+    return Histogram.from_dict(histogram, len(pauli)).expect(pauli)
 
-def find_identity(pauli):
-    return [i.start() for i in re.finditer("I",pauli)]
+@functools.lru_cache(maxsize=1024)
+def _get_sign_matrix(pauli_tuple):
+    sign_matrix = np.array([get_parity_sign(pauli_to_mask(pauli), len(pauli)) for pauli in pauli_tuple])
+    sign_matrix.flags.writeable = False
+    return sign_matrix
 
-def integrate_histogram(remove_idx, histogram):
-    expected_value = 0
-    for key, val in histogram.items():
-        coeff = count_one(key,remove_idx)
-        expected_value += coeff*val
-    return expected_value
+def get_sign_matrix(pauli_list):
+    """Parity signs of the Pauli Z-strings on each computational basis state, cached for each list, e.g. a clique
+    Args:
+        pauli_list (list): Pauli labels of the same length
+    Returns:
+        np.ndarray: +1 or -1 of shape (terms, 2^n)
+    """
+    return _get_sign_matrix(tuple(pauli_list))
 
-def count_one(key,remove_idx):
-    count = 0
-    for idx, string in enumerate(key):
-        if idx not in remove_idx:
-            if string is "1":
-                count += 1
-    if count%2:
-        coeff = -1
-    else:
-        coeff = +1
-    return coeff
+def stack_histogram(histogram_table):
+    """Stack the histograms keyed by the prepared bitstrings, the missing preparations being zero
+    Args:
+        histogram_table (dict): histogram (Histogram or dict) keyed by the prepared bitstring
+    Returns:
+        np.ndarray: populations of shape (2^n_prep, 2^n_meas)
+    """
+    histogram_list = [Histogram.from_dict(histogram) for histogram in histogram_table.values()]
+    number_of_qubit = len(next(iter(histogram_table)))
+    histogram_array = np.zeros((2**number_of_qubit, histogram_list[0].value.size))
+    for prep_index, histogram in zip(histogram_table.keys(), histogram_list):
+        histogram_array[int(prep_index, 2)] = histogram.value
+    return histogram_array
+
+def expect_pauli_batch(pauli_list, histogram):
+    """Expectation values of all the Pauli Z-strings, e.g. the nodes of a clique, on one histogram
+    Args:
+        pauli_list (list): Pauli labels, the non-identity elements are measured in the Z basis
+        histogram (Histogram or dict): population keyed by the bitstrings, zero if empty
+    Returns:
+        np.ndarray: expectation values of shape (terms,)
+    """
+    return get_sign_matrix(pauli_list) @ Histogram.from_dict(histogram, len(pauli_list[0])).value
+
+def expect_pauli_transfer_batch(prep_pauli_list, meas_pauli_list, histogram_table):
+    """Expectation values of the pairs of the prepared and measured Pauli Z-strings, e.g. the nodes of a clique of the PTM
+    The expectation value of each measured Pauli on the histograms of all the preparations is integrated with the prepared Pauli.
+    Args:
+        prep_pauli_list (list): prepared Pauli labels
+        meas_pauli_list (list): measured Pauli labels
+        histogram_table (dict): histogram (Histogram or dict) keyed by the prepared bitstring
+    Returns:
+        np.ndarray: expectation values of shape (terms,)
+    """
+    meas_expected_value = get_sign_matrix(meas_pauli_list) @ stack_histogram(histogram_table).T
+    return np.sum(get_sign_matrix(prep_pauli_list)*meas_expected_value, axis=1)
+
+def test_expect_pauli_batch():
+    import itertools
+    generator = np.random.default_rng(0)
+    bitstring_list = ["".join(bits) for bits in itertools.product("01", repeat=3)]
+    histogram_table = {prep_index: dict(zip(bitstring_list, generator.dirichlet(np.ones(8)))) for prep_index in bitstring_list}
+    prep_pauli_list = ["ZII", "IZZ", "III", "ZZZ"]
+    meas_pauli_list = ["IIZ", "ZIZ", "ZZZ", "III"]
+    histogram = histogram_table["010"]
+    expected_value = expect_pauli_batch(meas_pauli_list, histogram)
+    assert(np.allclose(expected_value, [expect_pauli(pauli, histogram) for pauli in meas_pauli_list]))
+    expected_value = expect_pauli_transfer_batch(prep_pauli_list, meas_pauli_list, histogram_table)
+    for index, (prep_pauli, meas_pauli) in enumerate(zip(prep_pauli_list, meas_pauli_list)):
+        prep_histogram = {prep_index: expect_pauli(meas_pauli, meas_histogram) for prep_index, meas_histogram in histogram_table.items()}
+        assert(np.isclose(expected_value[index], expect_pauli(prep_pauli, prep_histogram)))
+    assert(get_sign_matrix(meas_pauli_list) is get_sign_matrix(list(meas_pauli_list)))
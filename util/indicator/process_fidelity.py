@@ -1,13 +1,14 @@
 import numpy as np
+from scipy import sparse
 
 def average_gate_fidelity(ptm_target, ptm_ansatz):
     if ptm_target.n != ptm_ansatz.n:
         raise
     else:
         n = ptm_target.n
-    inner_prod  = 0
-    for node in ptm_target.ptm.keys():
-        inner_prod += ptm_target.ptm[node]*ptm_ansatz.ptm[node]
-    inner_prod *= 4**n/np.sum(np.abs(list(ptm_target.ptm.values()))**2) # Normalization
+    target = sparse.csr_matrix(ptm_target.matrix)
+    ansatz = sparse.csr_matrix(ptm_ansatz.matrix)
+    inner_prod  = target.multiply(ansatz).sum()
+    inner_prod *= 4**n/target.multiply(target).sum() # Normalization
     fidelity    = (inner_prod/(2**n)+1)/(1+2**n)
-    return fidelity
\ No newline at end of file
+    return fidelity
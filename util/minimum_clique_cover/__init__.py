@@ -1 +1,2 @@
-from .clique_cover import clique_cover
\ No newline at end of file
+from .clique_cover import clique_cover
+from .adjacency_graph import AdjacencyGraph
\ No newline at end of file
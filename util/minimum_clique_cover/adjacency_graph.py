@@ -0,0 +1,61 @@
+
+import numpy as np
+import networkx as nx
+from scipy import sparse
+
+class AdjacencyGraph:
+    """Undirected graph given by the list of node names and the sparse adjacency matrix
+
+    The adjacency matrix is a symmetric boolean CSR matrix without self-loops,
+    whose i-th row and column correspond to nodes[i].
+    networkx is only used when the graph is exported with to_networkx.
+    """
+    def __init__(self, nodes: list, adjacency: sparse.spmatrix) -> None:
+        """Constructor of AdjacencyGraph class
+
+        Args:
+            nodes (list): node names
+            adjacency (sparse.spmatrix): symmetric adjacency matrix of shape (len(nodes), len(nodes))
+        """
+        self.nodes = list(nodes)
+        adjacency = sparse.csr_matrix(adjacency, dtype=bool)
+        adjacency.setdiag(False)
+        adjacency.eliminate_zeros()
+        adjacency.sort_indices()
+        self.adjacency = adjacency
+
+    @classmethod
+    def from_networkx(cls, graph: nx.Graph) -> "AdjacencyGraph":
+        """Convert the networkx graph
+
+        Args:
+            graph (nx.Graph): graph to convert
+        Returns:
+            AdjacencyGraph: converted graph
+        """
+        nodes = list(graph.nodes())
+        adjacency = nx.to_scipy_sparse_array(graph, nodelist=nodes, weight=None, format="csr")
+        return cls(nodes, adjacency)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def number_of_edges(self) -> int:
+        return self.adjacency.nnz//2
+
+    def neighbors(self, index: int) -> np.ndarray:
+        """Indices of the nodes adjacent to the index-th node
+        """
+        return self.adjacency.indices[self.adjacency.indptr[index]:self.adjacency.indptr[index+1]]
+
+    def to_networkx(self) -> nx.Graph:
+        """Export as networkx graph, e.g. for visualization
+
+        Returns:
+            nx.Graph: graph with the same node names
+        """
+        graph = nx.Graph()
+        graph.add_nodes_from(self.nodes)
+        upper = sparse.triu(self.adjacency, k=1).tocoo()
+        graph.add_edges_from((self.nodes[i], self.nodes[j]) for i, j in zip(upper.row, upper.col))
+        return graph
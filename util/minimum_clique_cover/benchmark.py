@@ -0,0 +1,57 @@
+
+import sys
+import time
+import numpy as np
+from ..pauli_expression import PauliLabelArray
+from ..pauli_expression.pauli_label import get_simul_adjacency
+from .adjacency_graph import AdjacencyGraph
+from .clique_cover import clique_cover
+
+"""Benchmark of the clique cover strategies on random Pauli compatibility graphs
+
+Run as a module of the package with the node counts as arguments, e.g. ".minimum_clique_cover.benchmark 1000 10000".
+The networkx strategies are skipped above NETWORKX_LIMIT nodes.
+"""
+
+NUM_QUBIT = 12
+NETWORKX_LIMIT = 2000
+STRATEGIES = [
+    ("bitset_random_sequential", "clique_random_sequential"),
+    ("bitset_largest_first", "coloring_largest_first"),
+    ("bitset_saturation_largest_first", "coloring_saturation_largest_first"),
+]
+
+def random_graph(size: int, num_qubit: int = NUM_QUBIT, seed: int = 0) -> AdjacencyGraph:
+    """Compatibility graph of random distinct Pauli labels with low weight
+
+    Args:
+        size (int): number of nodes
+        num_qubit (int): number of qubits
+        seed (int): seed of the labels
+    Returns:
+        AdjacencyGraph: graph whose nodes are the Pauli labels
+    """
+    rng = np.random.default_rng(seed)
+    digit = rng.choice(4, size=(2*size, num_qubit), p=[0.7, 0.1, 0.1, 0.1])
+    labels = list(dict.fromkeys(''.join("IXYZ"[d] for d in row) for row in digit))[:size]
+    adjacency = get_simul_adjacency([PauliLabelArray.from_labels(labels)])
+    return AdjacencyGraph(labels, adjacency)
+
+def measure(graph, strategy: str) -> tuple:
+    start = time.perf_counter()
+    clique_list = clique_cover(graph, strategy, seed=0) if "random_sequential" in strategy else clique_cover(graph, strategy)
+    return time.perf_counter() - start, len(clique_list)
+
+def main(sizes: list) -> None:
+    for size in sizes:
+        graph = random_graph(size)
+        print("nodes {} edges {}".format(len(graph), graph.number_of_edges()))
+        for bitset_strategy, networkx_strategy in STRATEGIES:
+            elapsed, count = measure(graph, bitset_strategy)
+            print("  {:40s} {:10.3f} s {:8d} cliques".format(bitset_strategy, elapsed, count))
+            if len(graph) <= NETWORKX_LIMIT:
+                elapsed, count = measure(graph, networkx_strategy)
+                print("  {:40s} {:10.3f} s {:8d} cliques".format(networkx_strategy, elapsed, count))
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or [1000, 10000, 100000])
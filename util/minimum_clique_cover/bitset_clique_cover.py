@@ -0,0 +1,173 @@
+
+import numpy as np
+import networkx as nx
+from .adjacency_graph import AdjacencyGraph
+
+"""Clique cover solvers over the bitset adjacency matrix
+
+Each node owns one row of uint64 words whose set bits are its neighbors and itself.
+A clique is kept as the candidate bitset, i.e. the AND of the rows of its members,
+so that testing and adding a node costs O(|V|/64) word operations without networkx.
+"""
+
+WORD = 64
+
+def to_bitset(graph) -> np.ndarray:
+    """Convert the graph into the bitset adjacency matrix with self-loops
+
+    Args:
+        graph (AdjacencyGraph): graph to convert
+    Returns:
+        np.ndarray: uint64 array of shape (|V|, ceil(|V|/64))
+    """
+    size = len(graph)
+    adjacency = graph.adjacency.tocoo()
+    row = np.concatenate([adjacency.row, np.arange(size)])
+    col = np.concatenate([adjacency.col, np.arange(size)])
+    bitset = np.zeros((size, (size + WORD - 1)//WORD), dtype=np.uint64)
+    np.bitwise_or.at(bitset, (row, col//WORD), np.uint64(1) << (col%WORD).astype(np.uint64))
+    return bitset
+
+def _unpack(bits: np.ndarray, size: int) -> np.ndarray:
+    """Convert the bitset row into the boolean array of length size
+    """
+    return np.unpackbits(bits.astype("<u8").view(np.uint8), bitorder="little")[:size].astype(bool)
+
+def _has_bit(bits: np.ndarray, index: int) -> np.ndarray:
+    """Check the index-th bit of the bitset rows of shape (..., words)
+    """
+    return ((bits[..., index//WORD] >> np.uint64(index%WORD)) & np.uint64(1)).astype(bool)
+
+class _CliqueCandidate:
+    """Candidate bitsets of the cliques, stored in a buffer growing by doubling
+    """
+    def __init__(self, words: int) -> None:
+        self.buffer = np.zeros((1, words), dtype=np.uint64)
+        self.count = 0
+
+    def find(self, node: int) -> int:
+        """Index of the first clique which accepts the node, or -1
+        """
+        fit = np.flatnonzero(_has_bit(self.buffer[:self.count], node))
+        return fit[0] if len(fit) else -1
+
+    def add(self, bits: np.ndarray) -> None:
+        if self.count == len(self.buffer):
+            self.buffer = np.vstack([self.buffer, np.zeros_like(self.buffer)])
+        self.buffer[self.count] = bits
+        self.count += 1
+
+def _first_fit(bitset: np.ndarray, order) -> list:
+    """Put each node into the first clique which it is adjacent to all the members of
+
+    This is the greedy coloring of the complement graph, and also equals to
+    the sequential clique construction along the same order.
+
+    Args:
+        bitset (np.ndarray): bitset adjacency matrix
+        order (iterable): order of the node indices
+    Returns:
+        list: list of node indices for each clique
+    """
+    candidate = _CliqueCandidate(bitset.shape[1])
+    clique_list = []
+    for node in order:
+        color = candidate.find(node)
+        if color >= 0:
+            candidate.buffer[color] &= bitset[node]
+            clique_list[color].append(node)
+        else:
+            candidate.add(bitset[node])
+            clique_list.append([node])
+    return clique_list
+
+def _as_adjacency_graph(graph) -> AdjacencyGraph:
+    if isinstance(graph, nx.Graph):
+        return AdjacencyGraph.from_networkx(graph)
+    return graph
+
+def _to_names(graph: AdjacencyGraph, clique_list: list) -> list:
+    return [[graph.nodes[node] for node in clique] for clique in clique_list]
+
+def bitset_random_sequential(graph, seed: int = None) -> list:
+    """Perform minimum clique cover with random sequential greedy method on the bitset
+
+    The nodes are shuffled once with the seeded generator and added to the first clique that accepts them,
+    which gives the same cliques as clique_random_sequential with the same seed.
+
+    Args:
+        graph (AdjacencyGraph or nx.Graph): graph to solve
+        seed (int): seed of the random order
+    Returns:
+        list: list of node names for each clique
+    """
+    graph = _as_adjacency_graph(graph)
+    order = np.random.default_rng(seed).permutation(len(graph))
+    return _to_names(graph, _first_fit(to_bitset(graph), order))
+
+def bitset_largest_first(graph) -> list:
+    """Perform minimum clique cover by greedy coloring of the complement graph in the largest-first order
+
+    Gives the same cliques as coloring_largest_first.
+
+    Args:
+        graph (AdjacencyGraph or nx.Graph): graph to solve
+    Returns:
+        list: list of node names for each clique
+    """
+    graph = _as_adjacency_graph(graph)
+    degree = np.diff(graph.adjacency.indptr)
+    order = np.argsort(degree, kind="stable")
+    return _to_names(graph, _first_fit(to_bitset(graph), order))
+
+def bitset_saturation_largest_first(graph) -> list:
+    """Perform minimum clique cover by DSATUR coloring of the complement graph
+
+    The saturation of a node is the number of cliques containing a node not adjacent to it.
+    Ties are broken by the complement degree and then by the node order, which gives the same cliques as
+    coloring_saturation_largest_first.
+
+    Args:
+        graph (AdjacencyGraph or nx.Graph): graph to solve
+    Returns:
+        list: list of node names for each clique
+    """
+    graph = _as_adjacency_graph(graph)
+    size = len(graph)
+    bitset = to_bitset(graph)
+    complement_degree = size - 1 - np.diff(graph.adjacency.indptr)
+    saturation = np.zeros(size, dtype=np.int64)
+    colored = np.zeros(size, dtype=bool)
+
+    candidate = _CliqueCandidate(bitset.shape[1])
+    clique_list = []
+    for _ in range(size):
+        priority = np.where(colored, -1, saturation*size + complement_degree)
+        node = int(np.argmax(priority))
+        colored[node] = True
+
+        color = candidate.find(node)
+        if color >= 0:
+            dropped = candidate.buffer[color] & ~bitset[node]
+            candidate.buffer[color] &= bitset[node]
+            clique_list[color].append(node)
+        else:
+            dropped = ~bitset[node]
+            candidate.add(bitset[node])
+            clique_list.append([node])
+        saturation += _unpack(dropped, size)
+    return _to_names(graph, clique_list)
+
+def test_bitset_clique_cover():
+    from .benchmark import STRATEGIES
+    from .clique_cover import clique_cover
+    for graph_seed in range(5):
+        graph = nx.gnp_random_graph(60, 0.3 + 0.1*graph_seed, seed=graph_seed)
+        for bitset_strategy, networkx_strategy in STRATEGIES:
+            result = []
+            for strategy in [bitset_strategy, networkx_strategy]:
+                clique_list = clique_cover(graph, strategy, seed=graph_seed)
+                assert(sorted(sum(clique_list, [])) == list(graph.nodes))
+                assert(all(graph.has_edge(u, v) for clique in clique_list for u in clique for v in clique if u != v))
+                result.append(set(frozenset(clique) for clique in clique_list))
+            assert(result[0] == result[1])
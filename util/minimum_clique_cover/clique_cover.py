@@ -5,23 +5,30 @@ import networkx as nx
 import networkx.algorithms.approximation as approx
 import networkx.algorithms.coloring as coloring
 import pulp
+from .adjacency_graph import AdjacencyGraph
+from .bitset_clique_cover import _as_adjacency_graph, _to_names
+from .bitset_clique_cover import bitset_random_sequential, bitset_largest_first, bitset_saturation_largest_first
 
-def clique_random_sequential(graph : nx.Graph) -> list:
+def clique_random_sequential(graph : nx.Graph, seed : int = None) -> list:
     """Perform minimum clique cover with random sequential greedy method
 
     This method will create clique greedily. At least finish with O(|V|^2).
+    The nodes are shuffled once with the seeded generator, and each clique is built along that order.
 
     Args:
         graph (nx.Graph): graph to solve
+        seed (int): seed of the random order
     Returns:
         list: list of node names for each clique
     """
     graph = graph.copy()
+    node_list = list(graph.nodes())
+    order = np.random.default_rng(seed).permutation(len(node_list))
+    node_list = [node_list[index] for index in order]
     clique_list = []
     while len(graph.nodes())>0:
         clique = []
-        node_list = list(graph.nodes())
-        np.random.permutation(node_list)
+        node_list = [node for node in node_list if node in graph]
         for node in node_list:
             flag = True
             for exist_node in clique:
@@ -111,88 +118,119 @@ def coloring_greedy(graph: nx.Graph, strategy: str) -> list:
         clique_dict[color].append(node)
     return list(clique_dict.values())
 
-class AbortedError(Exception):
-    pass
+def _to_networkx(graph) -> nx.Graph:
+    if isinstance(graph, AdjacencyGraph):
+        return graph.to_networkx()
+    return graph
 
-def integer_programming(graph: nx.Graph) -> list:
+def _complement_edges(adjacency) -> tuple:
+    """Edges of the complement graph walked from the sparse adjacency matrix row by row
+
+    Args:
+        adjacency (sparse.csr_matrix): symmetric boolean adjacency matrix without self-loops
+    Returns:
+        (np.ndarray, np.ndarray): end nodes n1 < n2 of each edge of the complement graph
+    """
+    size = adjacency.shape[0]
+    not_neighbor = np.ones(size, dtype=bool)
+    first = [np.zeros(0, dtype=np.int64)]
+    second = [np.zeros(0, dtype=np.int64)]
+    for node in range(size-1):
+        neighbor = adjacency.indices[adjacency.indptr[node]:adjacency.indptr[node+1]]
+        not_neighbor[neighbor] = False
+        other = node + 1 + np.flatnonzero(not_neighbor[node+1:])
+        not_neighbor[neighbor] = True
+        first.append(np.full(other.size, node, dtype=np.int64))
+        second.append(other)
+    return np.concatenate(first), np.concatenate(second)
+
+def integer_programming(graph, time_limit: float = 5, gap: float = None) -> list:
     """Perform minimum clique cover by reducing problem into integer programming.
 
-    If solver says optimal, optimal solution for minimum clique cover is obtained,
-    but it may take very long time for large problems.
+    The number of cliques is bounded by the greedy solution of bitset_saturation_largest_first,
+    which is also given to the solver as the warm start.
+    Symmetric solutions are removed by using the cliques in order and
+    by putting the i-th node only into the first i+1 cliques.
+    Two nodes can share a clique only if they are adjacent, and this is imposed on each edge of the complement graph.
+
+    If solver says optimal, optimal solution for minimum clique cover is obtained.
+    Otherwise the best solution found within the budget is returned, or the greedy solution if the solver finds nothing.
 
     TODO: Check installation of commercial IP solvers such as CPLEX, Gurobi, and 
     use them if they are installed.
 
     Args:
-        graph (nx.Graph): graph to solve
+        graph (nx.Graph or AdjacencyGraph): graph to solve
+        time_limit (float): time limit of the solver in seconds, no limit if None
+        gap (float): relative gap at which the solver stops, solver default if None
     Returns:
         list: list of node names for each clique
-    Raises:
-        Exception: Solver cannot solve IP problem.
     """
+    graph = _as_adjacency_graph(graph)
+    size = len(graph)
+    index = {node: ind for ind, node in enumerate(graph.nodes)}
+    greedy = sorted([sorted(index[node] for node in clique) for clique in bitset_saturation_largest_first(graph)])
+    clique_max_count = len(greedy)
+    if clique_max_count <= 1:
+        return _to_names(graph, greedy)
+
     problem = pulp.LpProblem("clique_cover", pulp.LpMinimize)
+    clique_vars = [pulp.LpVariable("clique{}".format(ind), cat="Binary") for ind in range(clique_max_count)]
+    node_belong_vars = [
+        [pulp.LpVariable("node{}_{}".format(node, ind), cat="Binary") for ind in range(min(node+1, clique_max_count))]
+        for node in range(size)
+    ]
 
-    clique_max_count = len(graph.nodes())
-    clique_vars = []
-    for ind in range(clique_max_count):
-        var = pulp.LpVariable("clique{}".format(ind), cat="Binary")
-        clique_vars.append(var)
-
-    node_belong_vars = []
-    for ind in range(clique_max_count):
-        node_belong_vars.append({})
-        for node in graph.nodes():
-            nodename = str(node)
-            nodename = nodename.replace("  ","0").replace(" i","1").replace(" -","2").replace("-i","3")
-            var = pulp.LpVariable("{}_{}".format(nodename,ind), cat = "Binary")
-            node_belong_vars[ind][node] = var
-    
     # minimize used cliques
-    problem += sum(clique_vars)
+    problem += pulp.lpSum(clique_vars)
+
+    # clique must be exclusive
+    for node in range(size):
+        problem += (pulp.lpSum(node_belong_vars[node]) == 1)
 
     # if node belongs, clique must be used
-    for ind in range(clique_max_count):
-        for node in graph.nodes():
-            problem += (node_belong_vars[ind][node] <= clique_vars[ind])
+    for node in range(size):
+        for ind, var in enumerate(node_belong_vars[node]):
+            problem += (var <= clique_vars[ind])
 
-    # clique must be exclusive   
-    for node in graph.nodes():
-        items = []
-        for ind in range(clique_max_count):
-            items.append(node_belong_vars[ind][node])
-        problem += (sum(items)==1)
+    # cliques are used in order
+    for ind in range(clique_max_count-1):
+        problem += (clique_vars[ind] >= clique_vars[ind+1])
 
     # not-neighboring nodes cannot belong the same clique
-    for ind in range(clique_max_count):
-        for i1, n1 in enumerate(graph.nodes()):
-            for i2, n2 in enumerate(graph.nodes()):
-                if i2<=i1: continue
-                if n2 not in graph[n1]:
-                    problem += (node_belong_vars[ind][n1]+node_belong_vars[ind][n2]<=1)
-    
-    #status = problem.solve()
+    first, second = _complement_edges(graph.adjacency)
+    count = np.minimum(first+1, clique_max_count)
+    pair = np.repeat(np.arange(first.size), count)
+    clique_index = np.arange(pair.size) - np.repeat(np.cumsum(count)-count, count)
+    for n1, n2, ind in zip(first[pair].tolist(), second[pair].tolist(), clique_index.tolist()):
+        problem += (node_belong_vars[n1][ind] + node_belong_vars[n2][ind] <= clique_vars[ind])
+
+    # warm start from the greedy solution, cliques sorted by their first node fit the symmetry breaking
+    for ind, clique in enumerate(greedy):
+        clique_vars[ind].setInitialValue(1)
+        for node in clique:
+            for other, var in enumerate(node_belong_vars[node]):
+                var.setInitialValue(int(other == ind))
+
     import multiprocessing
     cpu_count = multiprocessing.cpu_count()
-    status = problem.solve(pulp.PULP_CBC_CMD(threads=cpu_count, keepFiles=0, mip=1, maxSeconds=5))
-    #status = problem.solve(pulp.PULP_CBC_CMD(maxSeconds=5, msg=0, fracGap=0))
-    #print(problem)
-    #print(pulp.LpStatus[status])
-    #print(problem.objective.value())
-
-    # cannot solve
-    if status <= 0:
-        raise AbortedError("Solver cannot solve problem.")
-
-    clique_dict = defaultdict(list)
-    node_count = 0
-    for node in graph.nodes():
-        for index in range(clique_max_count):
-            var = node_belong_vars[index][node]
-            if(var.value()>=0.5):
-                clique_dict[index].append(node)
-                node_count += 1
-                break
-    return list(clique_dict.values())
+    try:
+        problem.solve(pulp.PULP_CBC_CMD(threads=cpu_count, msg=0, keepFiles=0, mip=1, timeLimit=time_limit, gapRel=gap, warmStart=True))
+    except pulp.PulpSolverError:
+        return _to_names(graph, greedy)
+
+    clique_list = [[] for _ in range(clique_max_count)]
+    for node in range(size):
+        values = [var.value() for var in node_belong_vars[node]]
+        if None in values or max(values) < 0.5:
+            return _to_names(graph, greedy)
+        clique_list[int(np.argmax(values))].append(node)
+    clique_list = [clique for clique in clique_list if len(clique) > 0]
+
+    # fall back to greedy if the incumbent is not a valid cover
+    if any(graph.adjacency[clique][:,clique].nnz != len(clique)*(len(clique)-1) for clique in clique_list):
+        return _to_names(graph, greedy)
+    return _to_names(graph, clique_list)
 
 strategy_func = {
     "clique_random_sequential" : clique_random_sequential,
@@ -207,24 +245,71 @@ strategy_func = {
     "coloring_connected_sequential_dfs" : None,
     "coloring_saturation_largest_first" : None,
     "integer_programming" : integer_programming,
+    "bitset_random_sequential" : bitset_random_sequential,
+    "bitset_largest_first" : bitset_largest_first,
+    "bitset_saturation_largest_first" : bitset_saturation_largest_first,
 }
 
+random_strategies = ["clique_random_sequential", "bitset_random_sequential"]
+adjacency_strategies = [
+    "integer_programming",
+    "bitset_random_sequential",
+    "bitset_largest_first",
+    "bitset_saturation_largest_first",
+]
+
 clique_cover_strategies = strategy_func.keys()
 
-def clique_cover(graph: nx.graph, strategy:str ="clique_random_sequential") -> list:
+def clique_cover(graph: nx.graph, strategy:str ="clique_random_sequential", seed:int =None, **options) -> list:
     """Perform minimum clique cover using several strategies
 
+    The strategies starting with "bitset_" run on the bitset adjacency matrix without networkx.
+
     Args:
-        graph (nx.Graph): graph to solve
+        graph (nx.Graph or AdjacencyGraph): graph to solve
         strategy (str): name of strategy
+        seed (int): seed of the random strategies
+        options: keyword arguments of the strategy, e.g. time_limit and gap of integer_programming
     Returns:
         list: list of node names for each clique
     """
     if strategy not in strategy_func:
         raise ValueError("Unknown strategy, choose from {}".format(strategy_func.keys()))
 
+    if strategy in random_strategies:
+        options["seed"] = seed
+    if strategy not in adjacency_strategies:
+        graph = _to_networkx(graph)
+
     coloring_prefix = "coloring_"
     if coloring_prefix in strategy:
         return coloring_greedy(graph, strategy = strategy[len(coloring_prefix):])
-    return strategy_func[strategy](graph)
-
+    return strategy_func[strategy](graph, **options)
+
+
+def test_integer_programming():
+    from unittest import mock
+    graph = nx.disjoint_union_all([nx.complete_graph(4), nx.complete_graph(3), nx.complete_graph(3)])
+    graph.add_edges_from([(0, 4), (3, 7), (5, 8)])
+    def check(clique_list):
+        assert(sorted(sum(clique_list, [])) == list(graph.nodes))
+        assert(all(graph.has_edge(u, v) for clique in clique_list for u in clique for v in clique if u != v))
+
+    clique_list = clique_cover(graph, "integer_programming")
+    check(clique_list)
+    assert(len(clique_list) == 3)
+
+    solver = pulp.PULP_CBC_CMD
+    option_list = []
+    def record(**options):
+        option_list.append(options)
+        return solver(**options)
+    with mock.patch.object(pulp, "PULP_CBC_CMD", record):
+        check(clique_cover(graph, "integer_programming", time_limit=2, gap=0.1))
+    assert(option_list[0]["timeLimit"] == 2 and option_list[0]["gapRel"] == 0.1)
+
+    greedy = bitset_saturation_largest_first(graph)
+    with mock.patch.object(pulp.LpProblem, "solve", side_effect=pulp.PulpSolverError):
+        clique_list = integer_programming(graph)
+    check(clique_list)
+    assert(sorted(map(sorted, clique_list)) == sorted(map(sorted, greedy)))
@@ -1,2 +1,4 @@
 from .pauli_observable import PauliObservable
-from .pauli_transfer_matrix import PauliTransferMatrix, StabilizerPauliTransferMatrix
\ No newline at end of file
+from .pauli_transfer_matrix import PauliTransferMatrix, StabilizerPauliTransferMatrix
+from .pauli_label import PauliLabel, PauliLabelArray
+from .cache import PauliCache, pauli_cache, prepare_clique_dict
\ No newline at end of file
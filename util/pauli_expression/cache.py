@@ -0,0 +1,175 @@
+import os
+import pickle
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from scipy import sparse
+from .pauli_observable import PauliObservable
+from ..minimum_clique_cover.clique_cover import random_strategies
+
+"""Content-addressed cache of the Pauli decompositions and the clique dicts
+The decomposition is keyed by the hash of the operator (or the gate and the stabilizers),
+and the clique dict by the hash of the decomposition support, the clique cover strategy and the seed of the random strategies,
+so that the estimators created repeatedly for the same target skip calculate, get_graph and get_clique_dict.
+"""
+
+def get_key(*items):
+    """Hash the items into a hex string
+    Args:
+        items: np.ndarray, sparse matrix or objects with a deterministic repr
+    Returns:
+        str: sha256 hex digest
+    """
+    digest = hashlib.sha256()
+    for item in items:
+        if sparse.issparse(item):
+            item = sparse.csr_matrix(item)
+            item.sort_indices()
+            digest.update(get_key(item.shape, item.indptr, item.indices, item.data).encode())
+        elif isinstance(item, np.ndarray):
+            digest.update(repr((item.dtype.str, item.shape)).encode())
+            digest.update(np.ascontiguousarray(item).tobytes())
+        else:
+            digest.update(repr(item).encode())
+        digest.update(b"|")
+    return digest.hexdigest()
+
+class PauliCache:
+    """LRU cache in memory with an optional store on disk
+    """
+    def __init__(self, maxsize=128, directory=None):
+        """
+        Args:
+            maxsize (int): number of entries kept in memory
+            directory (str): directory of the pickled entries, not stored on disk if None
+        """
+        self.maxsize = maxsize
+        self.directory = directory
+        self.memory = OrderedDict()
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + ".pickle")
+
+    def get(self, key):
+        """Value of the key, or None if not cached
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+        if (self.directory is not None) and os.path.exists(self._get_path(key)):
+            with open(self._get_path(key), "rb") as f:
+                value = pickle.load(f)
+            self._set_memory(key, value)
+            return value
+        return None
+
+    def set(self, key, value):
+        self._set_memory(key, value)
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._get_path(key), "wb") as f:
+                pickle.dump(value, f)
+
+    def _set_memory(self, key, value):
+        self.memory[key] = value
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def clear(self):
+        """Clear the entries in memory, the store on disk is kept
+        """
+        self.memory.clear()
+
+pauli_cache = PauliCache()
+
+def _get_decomposition_key(expression):
+    if isinstance(expression, PauliObservable):
+        return get_key("PauliObservable", np.asarray(expression.observable, dtype=np.complex128))
+    return get_key(
+        type(expression).__name__,
+        np.asarray(expression.gate, dtype=np.complex128),
+        getattr(expression, "stabilizer_prep", None),
+        getattr(expression, "stabilizer_meas", None),
+        )
+
+def _get_support(expression):
+    if isinstance(expression, PauliObservable):
+        return tuple(expression.obs.keys())
+    return sparse.csr_matrix(expression.matrix) != 0
+
+def prepare_clique_dict(expression, strategy, cache=None, seed=None):
+    """Run calculate, get_graph and get_clique_dict of the expression through the cache
+    The graph is not built when the clique dict is cached, and expression.graph is rebuilt on its first access.
+    The clique dict of a random strategy is keyed also by the seed, and is not cached if the seed is None,
+    so that each expression gets a fresh random cover.
+    Args:
+        expression (PauliObservable or PauliTransferMatrix): expression given by the observable or the gate
+        strategy (str): name of clique cover strategy
+        cache (PauliCache): cache to use, pauli_cache if None
+        seed (int): seed of the random strategies
+    """
+    cache = pauli_cache if cache is None else cache
+    decomposition_key = _get_decomposition_key(expression)
+    decomposition = cache.get(decomposition_key)
+    if decomposition is None:
+        expression.calculate()
+        decomposition = expression.obs if isinstance(expression, PauliObservable) else expression.matrix
+        cache.set(decomposition_key, decomposition)
+    if isinstance(expression, PauliObservable):
+        expression.obs = dict(decomposition)
+    else:
+        expression.matrix = decomposition.copy()
+    expression.graph = None
+
+    if strategy in random_strategies:
+        if seed is None:
+            expression.get_graph()
+            expression.get_clique_dict(strategy=strategy)
+            return
+        clique_key = get_key("clique_dict", _get_support(expression), strategy, seed)
+    else:
+        clique_key = get_key("clique_dict", _get_support(expression), strategy)
+    clique_dict = cache.get(clique_key)
+    if clique_dict is None:
+        expression.get_graph()
+        expression.get_clique_dict(strategy=strategy, seed=seed)
+        clique_dict = expression.clique_dict
+        cache.set(clique_key, clique_dict)
+    expression.clique_dict = dict(clique_dict)
+
+def test_prepare_clique_dict():
+    from unittest import mock
+    from .pauli_transfer_matrix import PauliTransferMatrix
+    generator = np.random.default_rng(0)
+    matrix = generator.normal(size=(4, 4))
+    observable = matrix + matrix.T
+    gate = np.linalg.qr(generator.normal(size=(4, 4)) + 1.j*generator.normal(size=(4, 4)))[0]
+    for constructor, target in [(PauliObservable, observable), (PauliTransferMatrix, gate)]:
+        cache = PauliCache()
+        reference = constructor(target)
+        prepare_clique_dict(reference, "bitset_largest_first", cache)
+        assert(len(cache.memory) == 2)
+        expression = constructor(target)
+        with mock.patch.object(constructor, "calculate") as calculate, mock.patch.object(constructor, "get_graph", wraps=expression.get_graph) as get_graph:
+            prepare_clique_dict(expression, "bitset_largest_first", cache)
+            assert(not calculate.called and not get_graph.called)
+            assert(expression.clique_dict == reference.clique_dict)
+            assert(list(expression.graph.nodes) == list(reference.graph.nodes) and get_graph.call_count == 1)
+        expression.get_clique_dict("bitset_saturation_largest_first")
+
+        cover_list = []
+        for seed in [0, 0, 1]:
+            expression = constructor(target)
+            prepare_clique_dict(expression, "bitset_random_sequential", cache, seed=seed)
+            cover_list.append(expression.clique_dict)
+        assert(cover_list[0] == cover_list[1] and len(cache.memory) == 4)
+        size = len(cache.memory)
+        prepare_clique_dict(constructor(target), "bitset_random_sequential", cache)
+        assert(len(cache.memory) == size)
+
+    cache = PauliCache(maxsize=2)
+    for key in ["a", "b", "c"]:
+        cache.set(key, key)
+        cache.get("a")
+    assert(list(cache.memory.keys()) == ["c", "a"] and cache.get("b") is None)
@@ -0,0 +1,198 @@
+import numpy as np
+from scipy import sparse
+from .common import I,X,Z,tensor
+from .pauli_label import popcount
+from .pauli_transform import pauli_decompose,index_to_mask,mask_to_index
+
+"""Reference
+Improved simulation of stabilizer circuits https://arxiv.org/abs/quant-ph/0406196
+
+A Clifford gate U is stored as its tableau, the images U g U^dagger of the 2n generators
+g = X_0,...,X_{n-1},Z_0,...,Z_{n-1}. Each image is a Pauli operator i^e X^x Z^z given by
+the bit masks (x, z) and the phase exponent e (mod 4), with the first qubit as the most significant bit.
+"""
+
+ROUND_ERROR = 1e-10
+
+def get_generators(n):
+    """Matrices of the generators X_0,...,X_{n-1},Z_0,...,Z_{n-1}
+    Args:
+        n (int): number of qubits
+    Returns:
+        np.ndarray: generator matrices of shape (2n, 2^n, 2^n)
+    """
+    generators = []
+    for pauli in [X,Z]:
+        for qubit in range(n):
+            gate_list = [I]*n
+            gate_list[qubit] = pauli
+            generators.append(tensor(gate_list))
+    return np.array(generators)
+
+def get_tableau(gate):
+    """Calculate the tableau of the gate
+    Args:
+        gate (np.ndarray): unitary matrix of shape (..., 2^n, 2^n), leading axes are treated as batch
+    Returns:
+        (np.ndarray, np.ndarray, np.ndarray): x masks, z masks and phase exponents of shape (..., 2n),
+        or None if the gate is not a Clifford gate, i.e. an image of a generator is not a single Pauli operator within ROUND_ERROR
+    """
+    gate = np.asarray(gate, dtype=np.complex128)
+    n = int(np.log2(gate.shape[-1]))
+    generators = get_generators(n)
+    images = np.einsum("...ij,gjk,...lk->...gil", gate, generators, gate.conj())
+    coefficient = pauli_decompose(images)
+    index = np.argmax(np.abs(coefficient), axis=-1)
+    value = np.take_along_axis(coefficient, index[...,None], axis=-1)[...,0]
+    residual = np.abs(coefficient)
+    np.put_along_axis(residual, index[...,None], 0, axis=-1)
+    if not (np.allclose(np.abs(value), 1, rtol=0, atol=ROUND_ERROR) and np.all(residual < ROUND_ERROR)):
+        return None
+    x, z = index_to_mask(index, n)
+    e = (popcount(x & z).astype(np.int64) + 2*(value.real < 0)) % 4
+    return x, z, e
+
+def multiply_pauli(pauli0, pauli1):
+    """Multiply two Pauli operators given as (x, z, e)
+    Args:
+        pauli0 (tuple): left operator
+        pauli1 (tuple): right operator
+    Returns:
+        tuple: (x, z, e) of the product pauli0 @ pauli1
+    """
+    x0, z0, e0 = pauli0
+    x1, z1, e1 = pauli1
+    e = (e0 + e1 + 2*popcount(z0 & x1).astype(np.int64)) % 4
+    return x0 ^ x1, z0 ^ z1, e
+
+def conjugate_pauli(tableau, x, z, e):
+    """Conjugate the Pauli operators i^e X^x Z^z by the Clifford gate
+    Costs O(n^2) per operator and broadcasts over the leading axes of the tableau and the operators.
+    Args:
+        tableau (tuple): (x, z, e) of the Clifford gate, each of shape (..., 2n)
+        x (np.ndarray): x masks of the operators
+        z (np.ndarray): z masks of the operators
+        e (np.ndarray): phase exponents of the operators
+    Returns:
+        tuple: (x, z, e) of U P U^dagger
+    """
+    tx, tz, te = tableau
+    n = tx.shape[-1]//2
+    x = np.asarray(x, dtype=np.uint64)
+    z = np.asarray(z, dtype=np.uint64)
+    shape = np.broadcast(x, z, np.asarray(e), tx[...,0]).shape
+    out = (np.zeros(shape, dtype=np.uint64), np.zeros(shape, dtype=np.uint64), np.broadcast_to(e, shape).astype(np.int64))
+    for row in range(2*n):
+        mask = z if row >= n else x
+        selected = ((mask >> np.uint64(n-1-row%n)) & np.uint64(1)).astype(bool)
+        product = multiply_pauli(out, (tx[...,row], tz[...,row], te[...,row]))
+        out = tuple(np.where(selected, new, old) for new, old in zip(product, out))
+    return out
+
+def tableau_to_ptm(tableau):
+    """Calculate the Pauli transfer matrix of the Clifford gate, which is a signed permutation matrix
+    Args:
+        tableau (tuple): (x, z, e) of the Clifford gate
+    Returns:
+        sparse.csr_matrix: real matrix R of shape (4^n, 4^n), R[prep, meas] = tr(P_meas U P_prep U^dagger)/2^n
+    """
+    n = tableau[0].shape[-1]//2
+    prep = np.arange(4**n)
+    x, z = index_to_mask(prep, n)
+    x, z, e = conjugate_pauli(tableau, x, z, popcount(x & z).astype(np.int64))
+    meas = mask_to_index(x, z, n)
+    sign = 1 - ((e - popcount(x & z).astype(np.int64)) % 4)
+    return sparse.csr_matrix((sign.astype(float), (prep, meas)), shape=(4**n, 4**n))
+
+def compose_tableau(left, right):
+    """Calculate the tableau of the product of two Clifford gates
+    Args:
+        left (tuple): (x, z, e) of the gate applied last, each of shape (..., 2n)
+        right (tuple): (x, z, e) of the gate applied first, each of shape (..., 2n)
+    Returns:
+        tuple: (x, z, e) of left @ right
+    """
+    left = tuple(value[...,None,:] for value in left)
+    return conjugate_pauli(left, *right)
+
+def _to_bit(mask, n):
+    shift = np.arange(n-1, -1, -1).astype(np.uint64)
+    return ((mask[...,None] >> shift) & np.uint64(1)).astype(bool)
+
+def _from_bit(bit):
+    n = bit.shape[-1]
+    shift = np.arange(n-1, -1, -1).astype(np.uint64)
+    return (bit.astype(np.uint64) << shift).sum(axis=-1, dtype=np.uint64)
+
+def inverse_tableau(tableau):
+    """Calculate the tableau of the inverse of the Clifford gate
+    The bit part is the symplectic inverse [[D^T, B^T], [C^T, A^T]] of [[A, B], [C, D]],
+    and the signs are fixed so that the gate maps each image back to its generator.
+    Args:
+        tableau (tuple): (x, z, e) of the Clifford gate, each of shape (..., 2n)
+    Returns:
+        tuple: (x, z, e) of the inverse gate
+    """
+    tx, tz, te = tableau
+    n = tx.shape[-1]//2
+    bx = _to_bit(tx, n)
+    bz = _to_bit(tz, n)
+    swap = lambda bit: np.swapaxes(bit, -1, -2)
+    x = np.concatenate([_from_bit(swap(bz[...,n:,:])), _from_bit(swap(bx[...,n:,:]))], axis=-1)
+    z = np.concatenate([_from_bit(swap(bz[...,:n,:])), _from_bit(swap(bx[...,:n,:]))], axis=-1)
+    e = popcount(x & z).astype(np.int64)
+    _, _, sign = conjugate_pauli(tuple(value[...,None,:] for value in tableau), x, z, e)
+    return x, z, (e + sign) % 4
+
+def get_pauli_matrix(x, z, e, n):
+    """Matrices of the Pauli operators i^e X^x Z^z
+    Args:
+        x (np.ndarray): x masks
+        z (np.ndarray): z masks
+        e (np.ndarray): phase exponents
+        n (int): number of qubits
+    Returns:
+        np.ndarray: matrices of shape (..., 2^n, 2^n)
+    """
+    x, z, e = np.broadcast_arrays(np.asarray(x, dtype=np.uint64), np.asarray(z, dtype=np.uint64), np.asarray(e))
+    column = np.arange(2**n, dtype=np.uint64)
+    row = (x[...,None] ^ column).astype(np.int64)
+    value = 1.j**e[...,None] * (1 - 2*(popcount(z[...,None] & column).astype(np.int64) % 2))
+    matrix = np.zeros(x.shape + (2**n, 2**n), dtype=np.complex128)
+    np.put_along_axis(matrix, row[...,None,:], value[...,None,:], axis=-2)
+    return matrix
+
+def tableau_to_matrix(tableau):
+    """Calculate the unitary matrix of the Clifford gate up to the global phase
+    The first column is the common +1 eigenstate of the images of Z_0,...,Z_{n-1},
+    and the column of the basis state b is the product of the images of X_q with b_q = 1 applied to it.
+    Args:
+        tableau (tuple): (x, z, e) of the Clifford gate, each of shape (..., 2n)
+    Returns:
+        np.ndarray: unitary matrix of shape (..., 2^n, 2^n)
+    """
+    tx, tz, te = tableau
+    n = tx.shape[-1]//2
+    pauli = get_pauli_matrix(tx, tz, te, n)
+    projector = np.broadcast_to(np.eye(2**n, dtype=np.complex128), pauli.shape[:-3] + (2**n, 2**n))
+    for qubit in range(n):
+        projector = projector@(np.eye(2**n) + pauli[...,n+qubit,:,:])/2
+    column = np.argmax(np.linalg.norm(projector, axis=-2), axis=-1)
+    state = np.take_along_axis(projector, column[...,None,None], axis=-1)
+    state = state/np.linalg.norm(state, axis=-2, keepdims=True)
+    for qubit in reversed(range(n)):
+        state = np.concatenate([state, pauli[...,qubit,:,:]@state], axis=-1)
+    return state
+
+def test_get_tableau():
+    from scipy.linalg import expm
+    from .pauli_transform import gate_to_ptm
+    hadamard = np.array([[1, 1], [1, -1]])/np.sqrt(2)
+    cnot = np.array([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 1], [0, 0, 1, 0]])
+    for gate in [hadamard, cnot, np.kron(hadamard, expm(-0.25j*np.pi*Z))]:
+        tableau = get_tableau(gate)
+        assert(tableau is not None)
+        assert(np.allclose(tableau_to_ptm(tableau).toarray(), gate_to_ptm(gate)))
+    for angle in [1e-3, 1e-6]:
+        assert(get_tableau(expm(-0.5j*angle*X)) is None)
+        assert(get_tableau(np.kron(cnot[:2,:2], expm(-0.5j*angle*Z))@cnot) is None)
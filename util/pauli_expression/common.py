@@ -1,5 +1,6 @@
 import math
 import numpy as np
+from .pauli_label import PauliLabel, PauliLabelArray, label_to_mask, is_simul
 
 dtype = np.complex128
 
@@ -15,31 +16,12 @@ def tensor(gate_list):
     return out
 
 def check_simul(pauli0, pauli1):
-    flag = True
-    for i,j in zip(pauli0, pauli1):
-        if (i!="I") and (j!="I") and (i!=j):
-            flag = False
-    return flag
+    x0, z0 = label_to_mask(pauli0)
+    x1, z1 = label_to_mask(pauli1)
+    return bool(is_simul(x0, z0, x1, z1))
 
 def check_commute(pauli0, pauli1):
-    count = 0
-    for i,j in zip(pauli0, pauli1):
-        if (i!="I") and (j!="I") and (i!=j):
-            count += 1
-    return not count%2
+    return PauliLabel.from_str(pauli0).is_commute(PauliLabel.from_str(pauli1))
 
 def get_most_complex_pauli_label(paulis):
-    n = len(paulis[0])
-    pauli_set = {}
-    for pauli in paulis:
-        for qubit, pauli_qubit in enumerate(pauli):
-            if pauli_set.get(qubit) is None:
-                if pauli_qubit is not "I":
-                    pauli_set[qubit] = pauli_qubit
-    pauli_product = ""
-    for qubit in range(n):
-        if pauli_set.get(qubit) is None:
-            pauli_product += "I"
-        else:
-            pauli_product += pauli_set[qubit]
-    return pauli_product
\ No newline at end of file
+    return str(PauliLabelArray.from_labels(paulis).get_most_complex())
@@ -0,0 +1,233 @@
+import numpy as np
+from scipy import sparse
+
+"""Bit-packed Pauli labels
+A Pauli label of n <= 64 qubits is stored as the x-part and z-part bit masks (I=00, X=10, Y=11, Z=01),
+with the first qubit as the most significant bit. Strings are only used at the API edge.
+"""
+
+MAX_QUBIT = 64
+
+def popcount(value):
+    """Count the set bits of each element of a 64-bit unsigned integer array
+    Args:
+        value (np.ndarray): non-negative integers
+    Returns:
+        np.ndarray: number of set bits
+    """
+    value = np.asarray(value, dtype=np.uint64)
+    value = value - ((value >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    value = (value & np.uint64(0x3333333333333333)) + ((value >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    value = (value + (value >> np.uint64(4))) & np.uint64(0x0f0f0f0f0f0f0f0f)
+    return (value*np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+def label_to_mask(label):
+    """Convert the Pauli label into the x-part and z-part bit masks
+    Args:
+        label (str): Pauli label
+    Returns:
+        (int, int): x mask and z mask
+    """
+    x = 0
+    z = 0
+    for pauli in label:
+        x = (x << 1) | (pauli in "XY")
+        z = (z << 1) | (pauli in "YZ")
+    return x, z
+
+def mask_to_label(x, z, n):
+    """Convert the x-part and z-part bit masks into the Pauli label
+    Args:
+        x (int): x mask
+        z (int): z mask
+        n (int): number of qubits
+    Returns:
+        str: Pauli label
+    """
+    x = int(x)
+    z = int(z)
+    return ''.join("IXZY"[((x >> shift) & 1) | (((z >> shift) & 1) << 1)] for shift in range(n-1,-1,-1))
+
+def is_simul(x0, z0, x1, z1):
+    """Check the qubit-wise commutation, i.e. every qubit has the identity or the same Pauli
+    Args:
+        x0, z0 (np.ndarray): bit masks of the first labels
+        x1, z1 (np.ndarray): bit masks of the second labels
+    Returns:
+        np.ndarray: boolean of the broadcasted shape
+    """
+    return ((x0 | z0) & (x1 | z1) & ((x0 ^ x1) | (z0 ^ z1))) == 0
+
+def is_commute(x0, z0, x1, z1):
+    """Check the commutation of the Pauli operators
+    Args:
+        x0, z0 (np.ndarray): bit masks of the first labels
+        x1, z1 (np.ndarray): bit masks of the second labels
+    Returns:
+        np.ndarray: boolean of the broadcasted shape
+    """
+    return (popcount((x0 & z1) ^ (z0 & x1)) & np.uint64(1)) == 0
+
+def get_simul_adjacency(label_arrays, chunk_size=1024):
+    """Build the compatibility graph of the nodes as a sparse adjacency matrix
+    Two nodes are adjacent if their labels are qubit-wise commuting in every given label array,
+    e.g. [prep_labels, meas_labels] for the elements of the Pauli transfer matrix.
+    The matrix is computed in blocks of chunk_size rows to bound the memory.
+    Args:
+        label_arrays (list): PauliLabelArray of the same length
+        chunk_size (int): number of rows computed at once
+    Returns:
+        sparse.csr_matrix: symmetric boolean adjacency matrix without self-loops
+    """
+    size = len(label_arrays[0])
+    rows = []
+    cols = []
+    for start in range(0, size, chunk_size):
+        stop = min(start + chunk_size, size)
+        block = np.ones((stop - start, size - start), dtype=bool)
+        for labels in label_arrays:
+            block &= labels[start:stop].simul_matrix(labels[start:])
+        row, col = np.nonzero(np.triu(block, k=1))
+        rows.append(row + start)
+        cols.append(col + start)
+    row = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+    col = np.concatenate(cols) if cols else np.zeros(0, dtype=np.int64)
+    data = np.ones(2*len(row), dtype=bool)
+    return sparse.csr_matrix((data, (np.concatenate([row, col]), np.concatenate([col, row]))), shape=(size, size))
+
+class PauliLabel:
+    """Pauli label backed by the x-part and z-part bit masks
+    """
+    __slots__ = ("x", "z", "n")
+
+    def __init__(self, x, z, n):
+        if n > MAX_QUBIT:
+            raise ValueError("number of qubits must be at most {}".format(MAX_QUBIT))
+        self.x = int(x)
+        self.z = int(z)
+        self.n = n
+
+    @classmethod
+    def from_str(cls, label):
+        x, z = label_to_mask(label)
+        return cls(x, z, len(label))
+
+    def __str__(self):
+        return mask_to_label(self.x, self.z, self.n)
+
+    def __repr__(self):
+        return "PauliLabel('{}')".format(str(self))
+
+    def __eq__(self, other):
+        return (self.n, self.x, self.z) == (other.n, other.x, other.z)
+
+    def __hash__(self):
+        return hash((self.n, self.x, self.z))
+
+    def weight(self):
+        return bin(self.x | self.z).count("1")
+
+    def is_simul(self, other):
+        return bool(is_simul(self.x, self.z, other.x, other.z))
+
+    def is_commute(self, other):
+        return not bin((self.x & other.z) ^ (self.z & other.x)).count("1")%2
+
+class PauliLabelArray:
+    """Array of Pauli labels backed by two uint64 arrays of the x-part and z-part bit masks
+    """
+    def __init__(self, x, z, n):
+        if n > MAX_QUBIT:
+            raise ValueError("number of qubits must be at most {}".format(MAX_QUBIT))
+        self.x = np.asarray(x, dtype=np.uint64)
+        self.z = np.asarray(z, dtype=np.uint64)
+        self.n = n
+
+    @classmethod
+    def from_labels(cls, labels):
+        """Convert the Pauli labels in one vectorized pass
+        Args:
+            labels (list): Pauli labels of the same length
+        Returns:
+            PauliLabelArray: encoded labels
+        """
+        labels = [str(label) for label in labels]
+        n = len(labels[0]) if len(labels) else 0
+        code = np.frombuffer(''.join(labels).encode("ascii"), dtype=np.uint8).reshape(len(labels), n)
+        weight = np.uint64(1) << np.arange(n-1, -1, -1, dtype=np.uint64)
+        x = np.bitwise_or.reduce(np.where((code == ord("X")) | (code == ord("Y")), weight, np.uint64(0)), axis=1)
+        z = np.bitwise_or.reduce(np.where((code == ord("Z")) | (code == ord("Y")), weight, np.uint64(0)), axis=1)
+        return cls(x, z, n)
+
+    def to_labels(self):
+        """Convert into the list of the Pauli labels
+        """
+        shift = np.arange(self.n-1, -1, -1, dtype=np.uint64)
+        code = ((self.x[:,None] >> shift) & np.uint64(1)) | (((self.z[:,None] >> shift) & np.uint64(1)) << np.uint64(1))
+        character = np.frombuffer(b"IXZY", dtype=np.uint8)[code.astype(np.int64)]
+        return [row.tobytes().decode("ascii") for row in character]
+
+    def __len__(self):
+        return len(self.x)
+
+    def __getitem__(self, index):
+        if np.ndim(index) == 0 and not isinstance(index, slice):
+            return PauliLabel(self.x[index], self.z[index], self.n)
+        return PauliLabelArray(self.x[index], self.z[index], self.n)
+
+    def __iter__(self):
+        for x, z in zip(self.x, self.z):
+            yield PauliLabel(x, z, self.n)
+
+    def simul_matrix(self, other=None):
+        """Pairwise qubit-wise commutation
+        Args:
+            other (PauliLabelArray): column labels, self if None
+        Returns:
+            np.ndarray: boolean array of shape (len(self), len(other))
+        """
+        other = self if other is None else other
+        return is_simul(self.x[:,None], self.z[:,None], other.x[None,:], other.z[None,:])
+
+    def commute_matrix(self, other=None):
+        """Pairwise commutation
+        Args:
+            other (PauliLabelArray): column labels, self if None
+        Returns:
+            np.ndarray: boolean array of shape (len(self), len(other))
+        """
+        other = self if other is None else other
+        return is_commute(self.x[:,None], self.z[:,None], other.x[None,:], other.z[None,:])
+
+    def get_most_complex(self):
+        """The label which takes the first non-identity Pauli of every qubit among the labels
+        Returns:
+            PauliLabel: merged label
+        """
+        x = 0
+        z = 0
+        support = self.x | self.z
+        for shift in range(self.n):
+            bit = np.uint64(1 << shift)
+            has_pauli = (support & bit) != 0
+            if has_pauli.any():
+                first = np.argmax(has_pauli)
+                x |= int(self.x[first] & bit)
+                z |= int(self.z[first] & bit)
+        return PauliLabel(x, z, self.n)
+
+def test_get_simul_adjacency():
+    import itertools
+    def check(label0, label1):
+        return all(a == b or "I" in (a, b) for a, b in zip(label0, label1))
+    generator = np.random.default_rng(0)
+    observable = ["".join(generator.choice(list("IXYZ"), size=3)) for _ in range(40)]
+    prep = ["".join(generator.choice(list("IXYZ"), size=2)) for _ in range(40)]
+    meas = ["".join(generator.choice(list("IXYZ"), size=2)) for _ in range(40)]
+    for labels_list in [[observable], [prep, meas]]:
+        label_arrays = [PauliLabelArray.from_labels(labels) for labels in labels_list]
+        expected = np.zeros((40, 40), dtype=bool)
+        for i, j in itertools.combinations(range(40), 2):
+            expected[i, j] = expected[j, i] = all(check(labels[i], labels[j]) for labels in labels_list)
+        for chunk_size in [7, 40, 1024]:
+            assert(np.array_equal(get_simul_adjacency(label_arrays, chunk_size).toarray(), expected))
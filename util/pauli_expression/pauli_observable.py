@@ -1,8 +1,8 @@
 import numpy as np
-import itertools
-import networkx as nx
-from .common import I,X,Y,Z,tensor,check_simul,get_most_complex_pauli_label
-from ..minimum_clique_cover import clique_cover
+from .common import get_most_complex_pauli_label
+from .pauli_label import PauliLabelArray,get_simul_adjacency
+from .pauli_transform import get_label_list,index_to_label,pauli_decompose,pauli_coefficient
+from ..minimum_clique_cover import clique_cover,AdjacencyGraph
 
 ROUND_ERROR = 1e-10
 
@@ -23,28 +23,45 @@ class PauliObservable:
             self.n = len(list(obs_dict.keys())[0][0])
             self.obs = obs_dict
 
-        self.pauli = [tensor(list(i)) for i in itertools.product([I,X,Y,Z],repeat=self.n)]
-        self.label = [''.join(i) for i in itertools.product(['I','X','Y','Z'],repeat=self.n)]
+    @property
+    def label(self):
+        return get_label_list(self.n)
 
-    def calculate(self):
+    def calculate(self, labels=None):
+        """Decompose the observable into the Pauli basis
+        Args:
+            labels (list): if given, only the coefficients of these Pauli labels are calculated
+        """
         self.obs = {}
-        for label, pauli in zip(self.label,self.pauli):
-            value = np.trace(pauli@self.observable).real/2**self.n
-            if abs(value) > ROUND_ERROR:
-                self.obs[label] = value
+        if labels is None:
+            coefficient = pauli_decompose(self.observable).real
+            for index in np.flatnonzero(np.abs(coefficient) > ROUND_ERROR):
+                self.obs[index_to_label(index, self.n)] = coefficient[index]
+        else:
+            coefficient = pauli_coefficient(self.observable, labels).real
+            for label, value in zip(labels, coefficient):
+                if abs(value) > ROUND_ERROR:
+                    self.obs[label] = value
+
+    @property
+    def graph(self):
+        """Compatibility graph of the Pauli labels, built on the first access
+        """
+        if getattr(self, "_graph", None) is None:
+            self.get_graph()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
 
     def get_graph(self):
         nodes = list(self.obs.keys())
-        edges = []
-        for pauli0, pauli1 in itertools.combinations(nodes,2):
-            if check_simul(pauli0,pauli1):
-                edges.append((pauli0, pauli1))
-        self.graph = nx.Graph()
-        self.graph.add_nodes_from(nodes)
-        self.graph.add_edges_from(edges)
-
-    def get_clique_dict(self, strategy):
-        nodes_list  = clique_cover(self.graph,strategy)
+        adjacency = get_simul_adjacency([PauliLabelArray.from_labels(nodes)])
+        self.graph = AdjacencyGraph(nodes, adjacency)
+
+    def get_clique_dict(self, strategy, seed=None):
+        nodes_list  = clique_cover(self.graph,strategy,seed=seed)
         self.clique_dict = {}
         for nodes in nodes_list:
             clique_key = get_most_complex_pauli_label(nodes)
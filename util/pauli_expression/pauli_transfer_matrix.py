@@ -1,11 +1,89 @@
 import numpy as np
-import itertools
-import networkx as nx
-from .common import I,X,Y,Z,tensor,check_commute,check_simul,get_most_complex_pauli_label
-from ..minimum_clique_cover import clique_cover
+from collections.abc import Mapping
+from scipy import sparse
+from .common import get_most_complex_pauli_label
+from .pauli_label import PauliLabelArray,get_simul_adjacency
+from .pauli_transform import get_label_list,label_to_index,index_to_label,get_commute_mask,gate_to_ptm
+from .clifford_tableau import get_tableau,tableau_to_ptm
+from ..minimum_clique_cover import clique_cover,AdjacencyGraph
 
 ROUND_ERROR = 1e-10
 
+def round_matrix(matrix):
+    """Drop the elements whose absolute values are below ROUND_ERROR
+    Args:
+        matrix (np.ndarray or sparse.csr_matrix): Pauli transfer matrix
+    Returns:
+        np.ndarray or sparse.csr_matrix: Pauli transfer matrix whose non-zero elements are the stored elements
+    """
+    if sparse.issparse(matrix):
+        matrix = sparse.csr_matrix(matrix)
+        matrix.data[np.abs(matrix.data) <= ROUND_ERROR] = 0
+        matrix.eliminate_zeros()
+        matrix.sort_indices()
+    else:
+        matrix = np.array(matrix, dtype=float)
+        matrix[np.abs(matrix) <= ROUND_ERROR] = 0
+    return matrix
+
+def dict_to_matrix(ptm_dict, n):
+    """Convert the dict keyed by (prep_label, meas_label) into the sparse Pauli transfer matrix
+    Args:
+        ptm_dict (dict): Pauli transfer matrix elements
+        n (int): number of qubits
+    Returns:
+        sparse.csr_matrix: Pauli transfer matrix of shape (4^n, 4^n) indexed by [prep, meas]
+    """
+    prep_index = [label_to_index(prep_label) for prep_label, _ in ptm_dict.keys()]
+    meas_index = [label_to_index(meas_label) for _, meas_label in ptm_dict.keys()]
+    value = np.array(list(ptm_dict.values()), dtype=float)
+    matrix = sparse.csr_matrix((value, (prep_index, meas_index)), shape=(4**n, 4**n))
+    matrix.sort_indices()
+    return matrix
+
+class PauliTransferMatrixDict(Mapping):
+    """Read-only dict view of the Pauli transfer matrix keyed by (prep_label, meas_label)
+    Only the stored elements appear as keys, so that the view behaves as the former dict expression.
+    """
+    def __init__(self, matrix, n):
+        self.matrix = matrix
+        self.n = n
+
+    def _get_index(self):
+        if sparse.issparse(self.matrix):
+            matrix = self.matrix.tocoo()
+            return matrix.row, matrix.col
+        return np.nonzero(self.matrix)
+
+    def __getitem__(self, key):
+        prep_label, meas_label = key
+        if (len(prep_label) != self.n) or (len(meas_label) != self.n):
+            raise KeyError(key)
+        try:
+            prep_index = label_to_index(prep_label)
+            meas_index = label_to_index(meas_label)
+        except ValueError:
+            raise KeyError(key)
+        if sparse.issparse(self.matrix):
+            start, stop = self.matrix.indptr[prep_index:prep_index+2]
+            position = start + np.searchsorted(self.matrix.indices[start:stop], meas_index)
+            if (position == stop) or (self.matrix.indices[position] != meas_index):
+                raise KeyError(key)
+            return self.matrix.data[position]
+        value = self.matrix[prep_index, meas_index]
+        if value == 0:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        for prep_index, meas_index in zip(*self._get_index()):
+            yield (index_to_label(prep_index, self.n), index_to_label(meas_index, self.n))
+
+    def __len__(self):
+        if sparse.issparse(self.matrix):
+            return self.matrix.nnz
+        return int(np.count_nonzero(self.matrix))
+
 class PauliTransferMatrix:
     def __init__(self,gate=None,ptm_dict=None):
         if (gate is not None) and (ptm_dict is not None):
@@ -15,65 +93,93 @@ class PauliTransferMatrix:
             raise("input must not be None")
 
         if gate is not None:
-            self.gate  = gate
-            self.n     = int(np.log2(gate.shape[0]))
-            self.ptm   = None
+            self.gate   = gate
+            self.n      = int(np.log2(gate.shape[0]))
+            self.matrix = None
 
         if ptm_dict is not None:
             self.n = len(list(ptm_dict.keys())[0][0])
-            self.ptm = ptm_dict
+            self.matrix = dict_to_matrix(ptm_dict, self.n)
+
+    @property
+    def label(self):
+        return get_label_list(self.n)
+
+    @property
+    def ptm(self):
+        if self.matrix is None:
+            return None
+        return PauliTransferMatrixDict(self.matrix, self.n)
 
-        self.pauli = [tensor(list(i)) for i in itertools.product([I,X,Y,Z],repeat=self.n)]
-        self.label = [''.join(i) for i in itertools.product(['I','X','Y','Z'],repeat=self.n)]
+    @ptm.setter
+    def ptm(self, ptm_dict):
+        if ptm_dict is None:
+            self.matrix = None
+        else:
+            self.matrix = dict_to_matrix(ptm_dict, self.n)
+
+    def _calculate_matrix(self):
+        """Pauli transfer matrix of the gate indexed by [prep, meas]
+        Clifford gates are converted through the tableau into a sparse matrix, and the others through the superoperator.
+        """
+        tableau = get_tableau(self.gate)
+        if tableau is not None:
+            return tableau_to_ptm(tableau)
+        return gate_to_ptm(self.gate)
 
     def calculate(self):
-        self.ptm = {}
-        for prep_label, prep_pauli in zip(self.label,self.pauli):
-            for meas_label, meas_pauli in zip(self.label,self.pauli):
-                value = np.trace(meas_pauli@self.gate@prep_pauli@self.gate.T.conj()).real/2**self.n
-                if abs(value) > ROUND_ERROR:
-                    self.ptm[(prep_label,meas_label)] = value
+        self.matrix = round_matrix(self._calculate_matrix())
 
     def get_complemented_ptm(self):
+        matrix = self.get_matrix()
         out = {}
-        for prep_label in self.label:
-            for meas_label in self.label:
-                out[(prep_label,meas_label)] = self.ptm.get((prep_label,meas_label))
+        for i, prep_label in enumerate(self.label):
+            for j, meas_label in enumerate(self.label):
+                out[(prep_label,meas_label)] = None if np.isnan(matrix[i,j]) else matrix[i,j]
         return out
-    
-    def get_matrix(self):
-        matrix = np.zeros([4**self.n,4**self.n])
-        for i, pi in enumerate(self.label):
-            for j, pj in enumerate(self.label):
-                matrix[i,j] = self.ptm.get((pi,pj))
-        return matrix
 
     def get_matrix(self):
-        matrix = np.zeros([4**self.n,4**self.n])
-        for i, pi in enumerate(self.label):
-            for j, pj in enumerate(self.label):
-                matrix[i,j] = self.ptm.get((pi,pj))
+        """Dense Pauli transfer matrix indexed by [prep, meas], whose elements not stored are nan
+        """
+        matrix = np.full([4**self.n,4**self.n], np.nan)
+        if sparse.issparse(self.matrix):
+            stored = self.matrix.tocoo()
+            matrix[stored.row, stored.col] = stored.data
+        else:
+            stored = self.matrix != 0
+            matrix[stored] = self.matrix[stored]
         return matrix
 
     def get_unitarity(self):
-        matrix = self.get_matrix()
-        matrix = np.nan_to_num(matrix, 0)
-        unitarity = (np.trace(matrix.T@matrix)-1)/(4**self.n-1)
+        if sparse.issparse(self.matrix):
+            norm = np.sum(self.matrix.data**2)
+        else:
+            norm = np.sum(self.matrix**2)
+        unitarity = (norm-1)/(4**self.n-1)
         return unitarity
 
+    @property
+    def graph(self):
+        """Compatibility graph of the Pauli labels, built on the first access
+        """
+        if getattr(self, "_graph", None) is None:
+            self.get_graph()
+        return self._graph
+
+    @graph.setter
+    def graph(self, graph):
+        self._graph = graph
+
     def get_graph(self):
         nodes = list(self.ptm.keys())
-        edges = []
-        for (prep0,meas0), (prep1,meas1) in itertools.combinations(nodes,2):
-            if check_simul(prep0,prep1) and check_simul(meas0,meas1):
-                edges.append(((prep0,meas0),(prep1,meas1)))
-        self.graph = nx.Graph()
-        self.graph.add_nodes_from(nodes)
-        self.graph.add_edges_from(edges)
-
-    def get_clique_dict(self, strategy):
+        prep_labels = PauliLabelArray.from_labels([prep for prep, _ in nodes])
+        meas_labels = PauliLabelArray.from_labels([meas for _, meas in nodes])
+        adjacency = get_simul_adjacency([prep_labels, meas_labels])
+        self.graph = AdjacencyGraph(nodes, adjacency)
+
+    def get_clique_dict(self, strategy, seed=None):
         self.get_graph()
-        nodes_list  = clique_cover(self.graph,strategy)
+        nodes_list  = clique_cover(self.graph,strategy,seed=seed)
         self.clique_dict = {}
         for nodes in nodes_list:
             prep_labels, meas_labels = np.array(nodes).T
@@ -89,11 +195,8 @@ class StabilizerPauliTransferMatrix(PauliTransferMatrix):
         self.stabilizer_meas = stabilizer_meas
 
     def calculate(self):
-        self.ptm = {}
-        for prep_label, prep_pauli in zip(self.label,self.pauli):
-            for meas_label, meas_pauli in zip(self.label,self.pauli):
-                if False not in [check_commute(prep_label,st_prep) for st_prep in self.stabilizer_prep]:
-                    if False not in [check_commute(meas_label,st_meas) for st_meas in self.stabilizer_meas]:
-                        value = np.trace(meas_pauli@self.gate@prep_pauli@self.gate.T.conj()).real/2**self.n
-                        if abs(value) > ROUND_ERROR:
-                            self.ptm[(prep_label,meas_label)] = value
+        prep_mask = get_commute_mask(self.n, self.stabilizer_prep)
+        meas_mask = get_commute_mask(self.n, self.stabilizer_meas)
+        matrix = sparse.diags(prep_mask.astype(float)) @ sparse.csr_matrix(self._calculate_matrix()) @ sparse.diags(meas_mask.astype(float))
+        self.matrix = round_matrix(matrix)
+
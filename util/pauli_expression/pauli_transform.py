@@ -0,0 +1,187 @@
+import itertools
+import numpy as np
+from .pauli_label import popcount,label_to_mask,is_commute
+
+"""Reference
+Pauli decomposition without building the Pauli matrices
+The operator is reshaped into a (4,4,...,4) tensor whose k-th axis is the (row, column) bit pair of qubit k,
+and a 4x4 transform is applied on each axis, which costs O(n 4^n) instead of O(4^n 8^n).
+"""
+
+PAULI_CHARACTER = "IXYZ"
+
+# _DECOMPOSE[p, 2*a+b] = P_p[b,a], so that sum_ab _DECOMPOSE[p, 2*a+b] M[a,b] = tr(P_p M) for a single qubit
+_DECOMPOSE = np.array([
+    [1,  0,   0,  1],
+    [0,  1,   1,  0],
+    [0, 1.j,-1.j, 0],
+    [1,  0,   0, -1],
+], dtype=np.complex128)
+
+# _COMPOSE[2*a+b, p] = P_p[a,b], so that sum_p c_p _COMPOSE[2*a+b, p] = (sum_p c_p P_p)[a,b] for a single qubit
+_COMPOSE = _DECOMPOSE.conj().T
+
+def get_label_list(n):
+    """List of all the Pauli labels of n qubits in the order of the base-4 label index
+    Args:
+        n (int): number of qubits
+    Returns:
+        list: Pauli labels such as "IXYZ"
+    """
+    return [''.join(i) for i in itertools.product(PAULI_CHARACTER, repeat=n)]
+
+def label_to_index(label):
+    """Convert the Pauli label into the base-4 label index (I=0, X=1, Y=2, Z=3, first qubit is the most significant digit)
+    Args:
+        label (str): Pauli label
+    Returns:
+        int: label index
+    """
+    index = 0
+    for pauli in label:
+        index = 4*index + PAULI_CHARACTER.index(pauli)
+    return index
+
+def index_to_label(index, n):
+    """Convert the base-4 label index into the Pauli label
+    Args:
+        index (int): label index
+        n (int): number of qubits
+    Returns:
+        str: Pauli label
+    """
+    label = []
+    for _ in range(n):
+        label.append(PAULI_CHARACTER[index%4])
+        index //= 4
+    return ''.join(reversed(label))
+
+def index_to_mask(index, n):
+    """Convert the label indices into the x-part and z-part bit masks
+    Args:
+        index (np.ndarray): label indices
+        n (int): number of qubits
+    Returns:
+        (np.ndarray, np.ndarray): x masks and z masks as uint64
+    """
+    index = np.asarray(index, dtype=np.uint64)
+    x = np.zeros(index.shape, dtype=np.uint64)
+    z = np.zeros(index.shape, dtype=np.uint64)
+    for qubit in range(n):
+        digit = (index >> np.uint64(2*(n-1-qubit))) & np.uint64(3)
+        x = (x << np.uint64(1)) | ((digit ^ (digit >> np.uint64(1))) & np.uint64(1))
+        z = (z << np.uint64(1)) | (digit >> np.uint64(1))
+    return x, z
+
+def mask_to_index(x, z, n):
+    """Convert the x-part and z-part bit masks into the label indices
+    Args:
+        x (np.ndarray): x masks
+        z (np.ndarray): z masks
+        n (int): number of qubits
+    Returns:
+        np.ndarray: label indices as int64
+    """
+    x = np.asarray(x, dtype=np.uint64)
+    z = np.asarray(z, dtype=np.uint64)
+    index = np.zeros(np.broadcast(x, z).shape, dtype=np.uint64)
+    for qubit in range(n):
+        shift = np.uint64(n-1-qubit)
+        xbit = (x >> shift) & np.uint64(1)
+        zbit = (z >> shift) & np.uint64(1)
+        index = (index << np.uint64(2)) | (zbit << np.uint64(1)) | (xbit ^ zbit)
+    return index.astype(np.int64)
+
+def get_commute_mask(n, paulis):
+    """Boolean mask over all the label indices which commute with every given Pauli label
+    Args:
+        n (int): number of qubits
+        paulis (list): Pauli labels
+    Returns:
+        np.ndarray: boolean array of length 4^n
+    """
+    x, z = index_to_mask(np.arange(4**n), n)
+    mask = np.ones(4**n, dtype=bool)
+    for pauli in paulis:
+        px, pz = label_to_mask(pauli)
+        mask &= is_commute(x, z, np.uint64(px), np.uint64(pz))
+    return mask
+
+def pauli_decompose(operator):
+    """Calculate the coefficients tr(P operator)/2^n of all the 4^n Pauli labels with the fast Pauli transform
+    Args:
+        operator (np.ndarray): matrix of shape (..., 2^n, 2^n), leading axes are treated as batch
+    Returns:
+        np.ndarray: complex coefficients of shape (..., 4^n) in the order of the label index
+    """
+    operator = np.asarray(operator, dtype=np.complex128)
+    batch = operator.shape[:-2]
+    b = len(batch)
+    n = int(np.log2(operator.shape[-1]))
+
+    tensor = operator.reshape(batch + (2,)*(2*n))
+    order = list(range(b)) + [b + axis for qubit in range(n) for axis in (qubit, n + qubit)]
+    tensor = tensor.transpose(order).reshape(batch + (4,)*n)
+    for qubit in range(n):
+        tensor = np.tensordot(_DECOMPOSE, tensor, axes=([1], [b + qubit]))
+        tensor = np.moveaxis(tensor, 0, b + qubit)
+    return tensor.reshape(batch + (4**n,))/2**n
+
+def pauli_coefficient(operator, labels):
+    """Calculate the coefficients tr(P operator)/2^n only for the requested Pauli labels
+    Each coefficient costs O(2^n), since P is a signed permutation matrix given by its bit masks.
+    Args:
+        operator (np.ndarray): matrix of shape (2^n, 2^n)
+        labels (list): Pauli labels to be calculated
+    Returns:
+        np.ndarray: complex coefficients in the order of labels
+    """
+    operator = np.asarray(operator, dtype=np.complex128)
+    n = int(np.log2(operator.shape[0]))
+    column = np.arange(2**n, dtype=np.uint64)
+    coefficient = np.zeros(len(labels), dtype=np.complex128)
+    for i, label in enumerate(labels):
+        x, z = label_to_mask(label)
+        sign = 1 - 2*(popcount(column & np.uint64(z)) & 1).astype(np.int8)
+        diagonal = operator[column ^ np.uint64(x), column]
+        coefficient[i] = (-1.j)**label.count("Y")*np.dot(sign, diagonal)
+    return coefficient/2**n
+
+def gate_to_ptm(gate):
+    """Calculate the Pauli transfer matrix of the unitary gate through its superoperator
+    The superoperator U (x) U^* is transformed into the Pauli basis on both sides at once,
+    so no trace is taken per element.
+    Args:
+        gate (np.ndarray): unitary matrix of shape (2^n, 2^n)
+    Returns:
+        np.ndarray: real array R of shape (4^n, 4^n), R[prep, meas] = tr(P_meas U P_prep U^dagger)/2^n
+    """
+    gate = np.asarray(gate, dtype=np.complex128)
+    n = int(np.log2(gate.shape[0]))
+
+    tensor = np.einsum("ij,kl->ikjl", gate, gate.conj()).reshape((2,)*(4*n))
+    order = [block*n + axis for side in (0, 2) for qubit in range(n) for block, axis in ((side, qubit), (side + 1, qubit))]
+    tensor = tensor.transpose(order).reshape((4,)*(2*n))
+    for qubit in range(n):
+        tensor = np.tensordot(_DECOMPOSE, tensor, axes=([1], [qubit]))
+        tensor = np.moveaxis(tensor, 0, qubit)
+    for qubit in range(n):
+        tensor = np.tensordot(tensor, _COMPOSE, axes=([n + qubit], [0]))
+        tensor = np.moveaxis(tensor, -1, n + qubit)
+    return tensor.reshape(4**n, 4**n).T.real/2**n
+
+def test_pauli_transform():
+    from .common import I, X, Y, Z, tensor
+    pauli = {"I": I, "X": X, "Y": Y, "Z": Z}
+    generator = np.random.default_rng(0)
+    for n in [1, 2, 3]:
+        labels = get_label_list(n)
+        matrix = [tensor([pauli[string] for string in label]) for label in labels]
+        operator = generator.normal(size=(2, 2**n, 2**n)) + 1.j*generator.normal(size=(2, 2**n, 2**n))
+        gate = np.linalg.qr(operator[0])[0]
+        expected = np.array([[np.trace(p@o)/2**n for p in matrix] for o in operator])
+        assert(np.allclose(pauli_decompose(operator), expected))
+        subset = labels[::3]
+        assert(np.allclose(pauli_coefficient(operator[1], subset), expected[1, ::3]))
+        ptm = np.array([[np.trace(meas@gate@prep@gate.conj().T).real/2**n for meas in matrix] for prep in matrix])
+        assert(np.allclose(gate_to_ptm(gate), ptm))
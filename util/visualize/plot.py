@@ -16,6 +16,8 @@ plt.rcParams['font.size']           = 16
 plt.rcParams['axes.linewidth']      = 1.0
 
 def show_graph(graph,figsize=(15,15)):
+    if not isinstance(graph, nx.Graph):
+        graph = graph.to_networkx()
     plt.figure(figsize=figsize)
     pos = nx.spring_layout(graph, k=0.8)
     nx.draw_networkx_edges(graph, pos, edge_color='k', widht=3)